@@ -24,6 +24,7 @@ class DataSourceConfig:
         file_output (str | None): Local file path of the output file. Defaults to None.
         base_tmp_folder (str, optional): Base path for temporary folders. Defaults to "/tmp".
         table_ddl (str | None): SQL query to create the database table in the ETL DAG. Defaults to None.
+        json_columns (list[str]): Columns holding lists or dicts, stored as JSON in the database table. Defaults to none.
 
     """
 
@@ -39,6 +40,7 @@ class DataSourceConfig:
     url_api: str | None = None
     auth_api: str | None = None
     table_ddl: str | None = None
+    json_columns: list[str] = field(default_factory=list)
 
 
 AIRFLOW_ENV = Variable.get("ENV", "dev")
@@ -84,6 +86,29 @@ METADATA_CC_MINIO_PATH = "metadata/cc/"
 INSEE_TMP_FOLDER = f"{AIRFLOW_DAG_TMP}sirene/ul/"
 CC_TMP_FOLDER = f"{AIRFLOW_DAG_TMP}convention_collective/"
 MINIO_DATA_SOURCE_UPDATE_DATES_FILE = "data_source_updates.json"
+# Worker processes formatting the établissements of the database in the ETL
+ETL_PROCESS_COUNT = int(Variable.get("ETL_PROCESS_COUNT", 4))
+# Files of the établissements by département, kept from one run to the next to only
+# download the ones which changed
+ETL_STOCK_ETABLISSEMENTS_TMP_FOLDER = f"{AIRFLOW_DAG_TMP}sirene/geo_siret/"
+# Concurrent downloads of the files of the établissements by département
+ETL_DOWNLOAD_THREAD_COUNT = int(Variable.get("ETL_DOWNLOAD_THREAD_COUNT", 8))
+# Size of the caches of the formatting of names and addresses, which often repeat
+FORMATTING_CACHE_SIZE = int(Variable.get("FORMATTING_CACHE_SIZE", 100_000))
+# Coordinates computed by the ETL, reused from one run to the next
+ETL_COORDINATES_CACHE_MINIO_PATH = Variable.get(
+    "ETL_COORDINATES_CACHE_MINIO_PATH", "sirene/coordinates_cache"
+)
+# Additional tables (RNE, open data sources...), each built into its own database
+# by concurrent tasks, then merged into the SIRENE database
+ETL_ADDITIONAL_TABLES_DATA_DIR = AIRFLOW_ETL_DATA_DIR + "additional_tables/"
+# Tasks of a run of the ETL running at the same time
+ETL_MAX_ACTIVE_TASKS = int(Variable.get("ETL_MAX_ACTIVE_TASKS", 4))
+
+# SQLite connections of the bulk_build and read_only_scan profiles : page cache
+# and memory-mapped I/O, in MB
+SQLITE_CACHE_SIZE_MB = int(Variable.get("SQLITE_CACHE_SIZE_MB", 256))
+SQLITE_MMAP_SIZE_MB = int(Variable.get("SQLITE_MMAP_SIZE_MB", 32 * 1024))
 
 # Notification
 TCHAP_ANNUAIRE_WEBHOOK = Variable.get("TCHAP_ANNUAIRE_WEBHOOK", "")
@@ -114,6 +139,10 @@ REDIS_HOST = Variable.get("REDIS_HOST", "redis")
 REDIS_PORT = Variable.get("REDIS_PORT", "6379")
 REDIS_DB = Variable.get("REDIS_DB", "0")
 REDIS_PASSWORD = Variable.get("REDIS_PASSWORD", None)
+# Above this number of changed SIRENs, the whole cache is flushed after indexing
+REDIS_INVALIDATION_MAX_SIRENS = int(
+    Variable.get("REDIS_INVALIDATION_MAX_SIRENS", 500000)
+)
 
 # ElasticSearch
 ELASTIC_PASSWORD = Variable.get("ELASTIC_PASSWORD", None)
@@ -121,8 +150,44 @@ ELASTIC_URL = Variable.get("ELASTIC_URL", None)
 ELASTIC_USER = Variable.get("ELASTIC_USER", None)
 ELASTIC_BULK_THREAD_COUNT = int(Variable.get("ELASTIC_BULK_THREAD_COUNT", 4))
 ELASTIC_BULK_SIZE = int(Variable.get("ELASTIC_BULK_SIZE", 1500))
+# Bounds of the bulk requests, adapted to the load of the cluster while indexing
+ELASTIC_BULK_MIN_BYTES = int(Variable.get("ELASTIC_BULK_MIN_BYTES", 1024 * 1024))
+ELASTIC_BULK_MAX_BYTES = int(Variable.get("ELASTIC_BULK_MAX_BYTES", 20 * 1024 * 1024))
+ELASTIC_BULK_MAX_THREAD_COUNT = int(Variable.get("ELASTIC_BULK_MAX_THREAD_COUNT", 8))
+ELASTIC_BULK_TARGET_LATENCY = float(Variable.get("ELASTIC_BULK_TARGET_LATENCY", 2))
+# Retries of the documents failing with a retryable error, with exponential backoff
+ELASTIC_BULK_MAX_RETRIES = int(Variable.get("ELASTIC_BULK_MAX_RETRIES", 3))
+ELASTIC_BULK_RETRY_BACKOFF = float(Variable.get("ELASTIC_BULK_RETRY_BACKOFF", 2))
+# Share of the documents which may fail to be indexed without failing the indexing
+ELASTIC_MAX_FAILED_DOCUMENT_RATIO = float(
+    Variable.get("ELASTIC_MAX_FAILED_DOCUMENT_RATIO", 0.0001)
+)
+# Build the bulk bodies from plain dicts serialized with orjson
+ELASTIC_FAST_SERIALIZATION = Variable.get(
+    "ELASTIC_FAST_SERIALIZATION", "False"
+).lower() not in ["false", "0"]
+# Worker processes reading and enriching SIREN ranges while indexing
+ELASTIC_INDEXING_PROCESS_COUNT = int(Variable.get("ELASTIC_INDEXING_PROCESS_COUNT", 4))
+ELASTIC_INDEXING_PARTITION_COUNT = int(
+    Variable.get("ELASTIC_INDEXING_PARTITION_COUNT", 100)
+)
 ELASTIC_SHARDS = 2
 ELASTIC_REPLICAS = 0
+# Segments per shard of a fully rebuilt index, merged before going live
+ELASTIC_FORCE_MERGE_SEGMENTS = int(Variable.get("ELASTIC_FORCE_MERGE_SEGMENTS", 5))
+
+ELASTIC_INDEXING_CHECKPOINT_MINIO_PATH = Variable.get(
+    "ELASTIC_INDEXING_CHECKPOINT_MINIO_PATH", "elastic_indexing_checkpoint"
+)
+# Documents which failed to be indexed, as gzipped NDJSON files
+ELASTIC_DEAD_LETTER_MINIO_PATH = Variable.get(
+    "ELASTIC_DEAD_LETTER_MINIO_PATH", "elastic_indexing_dead_letter"
+)
+# Days between two full rebuilds of the index, the live index being updated with
+# the changed SIRENs only (delta indexing) in between
+ELASTIC_FULL_REBUILD_INTERVAL_DAYS = int(
+    Variable.get("ELASTIC_FULL_REBUILD_INTERVAL_DAYS", 7)
+)
 
 ELASTIC_MAX_LIVE_VERSIONS = int(Variable.get("ELASTIC_MAX_LIVE_VERSIONS", 2))
 
@@ -3,6 +3,7 @@ import os
 from datetime import datetime
 from abc import ABC
 
+import pandas as pd
 import requests
 from airflow.operators.python import get_current_context
 
@@ -17,6 +18,7 @@ from dag_datalake_sirene.helpers.utils import (
     get_date_last_modified,
     save_to_metadata,
     download_file,
+    to_json,
 )
 
 
@@ -88,6 +90,30 @@ class DataProcessor(ABC):
         ti.xcom_push(key=xcom_key, value=unique_count_str)
         logging.info(f"Processed {unique_count_str} unique values for {xcom_key}.")
 
+    @staticmethod
+    def write_csv(df: pd.DataFrame, file_path: str) -> None:
+        """
+        Saves a DataFrame to a CSV file, its list and dict values being written as
+        canonical JSON (see `to_json`) instead of their Python representation, so
+        that the ETL and SQLite read them as JSON.
+
+        Args:
+            df (pd.DataFrame): The DataFrame to save.
+            file_path (str): The path of the CSV file.
+        """
+
+        def is_json(value):
+            return isinstance(value, (list, dict))
+
+        json_columns = {
+            column: df[column].map(
+                lambda value: to_json(value) if is_json(value) else value
+            )
+            for column in df.columns
+            if df[column].dtype == object and df[column].map(is_json).any()
+        }
+        df.assign(**json_columns).to_csv(file_path, index=False)
+
     def save_date_last_modified(self) -> None:
         """Saves the last modified date for a resource or URL to a metadata file.
 
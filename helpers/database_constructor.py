@@ -1,7 +1,11 @@
 import logging
 import pandas as pd
 
-from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_SCRATCH_BUILD,
+    SqliteClient,
+)
+from dag_datalake_sirene.helpers.utils import str_to_json
 from dag_datalake_sirene.config import DataSourceConfig
 
 
@@ -15,9 +19,12 @@ class DatabaseTableConstructor:
 
     def etl_get_preprocessed_data(self) -> pd.DataFrame:
         if self.config.url_minio:
-            return pd.read_csv(self.config.url_minio, dtype=str)
+            df_table = pd.read_csv(self.config.url_minio, dtype=str)
         else:
             raise ValueError("No MinIO URL provided in the configuration.")
+        for column in self.config.json_columns:
+            df_table[column] = df_table[column].map(str_to_json)
+        return df_table
 
     def etl_create_table(self, db_location: str) -> None:
         """
@@ -37,7 +44,9 @@ class DatabaseTableConstructor:
 
         df_table = self.etl_get_preprocessed_data()
 
-        with SqliteClient(db_location) as sqlite_client:
+        with SqliteClient(
+            db_location, profile=SQLITE_PROFILE_SCRATCH_BUILD
+        ) as sqlite_client:
             logging.info(f"Creating {self.config.name} table..")
             sqlite_client.drop_table(self.config.name)
             sqlite_client.execute_script(self.config.table_ddl)
@@ -1,6 +1,11 @@
 import logging
+import re
 import redis
 
+# SIREN, or SIRET starting with the SIREN, found in a cache key
+SIREN_PATTERN = re.compile(r"(?<!\d)(\d{9})(?:\d{5})?(?!\d)")
+INVALIDATION_BATCH_SIZE = 1000
+
 
 def flush_cache(host, port, db, password):
     redis_client = redis.Redis(
@@ -14,3 +19,39 @@ def flush_cache(host, port, db, password):
     logging.info(f"Flush cache command status: {flush_command}")
     if redis_client.keys():
         raise Exception(f"****** Could not flush cache: {redis_client.keys()}")
+
+
+def invalidate_cache(host, port, db, password, changed_sirens=None):
+    """
+    Delete the cached responses which may contain a changed unité légale : the keys
+    referring to a changed SIREN, and the keys referring to no SIREN at all (e.g.
+    search results). The whole cache is flushed when `changed_sirens` is None.
+    """
+    if changed_sirens is None:
+        flush_cache(host, port, db, password)
+        return
+    redis_client = redis.Redis(
+        host=host,
+        port=port,
+        db=db,
+        password=password,
+    )
+    changed_sirens = set(changed_sirens)
+    pipeline = redis_client.pipeline(transaction=False)
+    kept_count = 0
+    deleted_count = 0
+    for key in redis_client.scan_iter(count=INVALIDATION_BATCH_SIZE):
+        sirens = SIREN_PATTERN.findall(key.decode("utf-8", errors="ignore"))
+        if sirens and changed_sirens.isdisjoint(sirens):
+            kept_count += 1
+            continue
+        # Keys are freed in the background without blocking the server
+        pipeline.unlink(key)
+        deleted_count += 1
+        if deleted_count % INVALIDATION_BATCH_SIZE == 0:
+            pipeline.execute()
+    pipeline.execute()
+    logging.info(
+        f"Cache invalidated for {len(changed_sirens)} SIRENs: {deleted_count} keys "
+        f"deleted, {kept_count} keys kept"
+    )
@@ -1,3 +1,4 @@
+import numpy as np
 from pyproj import Transformer
 from dag_datalake_sirene.helpers.utils import is_valid_number
 from functools import lru_cache
@@ -25,14 +26,60 @@ def get_transformer(epsg):
     return Transformer.from_crs(f"EPSG:{epsg}", "EPSG:4326")
 
 
+def get_epsg(department_code):
+    return department_epsg_mapping.get(department_code, default_epsg)
+
+
 # Function to perform the transformation
 def transform_coordinates(department_code, x, y):
     if not is_valid_number(x) or not is_valid_number(y):
         return None, None
-    if department_code in department_epsg_mapping:
-        epsg = department_epsg_mapping[department_code]
-    else:
-        epsg = default_epsg
-    transformer = get_transformer(epsg)
+    transformer = get_transformer(get_epsg(department_code))
     lat, lon = transformer.transform(float(x), float(y))
     return str(lat), str(lon)
+
+
+def transform_coordinates_batch(department_codes, xs, ys):
+    """
+    `transform_coordinates` of many points at once : the points are grouped by EPSG
+    code, and the points of each group transformed together as arrays.
+
+    Returns:
+        tuple[list, list]: the latitude and longitude of each point.
+    """
+    return transform_coordinates_by_epsg(
+        [get_epsg(department_code) for department_code in department_codes], xs, ys
+    )
+
+
+def transform_coordinates_by_epsg(epsgs, xs, ys):
+    """
+    Same as `transform_coordinates_batch`, for points whose EPSG code is known.
+
+    Returns:
+        tuple[list, list]: the latitude and longitude of each point.
+    """
+    latitudes = [None] * len(xs)
+    longitudes = [None] * len(xs)
+    points_by_epsg = {}
+    for index, (epsg, x, y) in enumerate(zip(epsgs, xs, ys)):
+        # Same as `is_valid_number`, without converting the coordinates twice
+        if x is None or y is None:
+            continue
+        try:
+            x, y = float(x), float(y)
+        except (TypeError, ValueError):
+            continue
+        indexes, epsg_xs, epsg_ys = points_by_epsg.setdefault(epsg, ([], [], []))
+        indexes.append(index)
+        epsg_xs.append(x)
+        epsg_ys.append(y)
+
+    for epsg, (indexes, epsg_xs, epsg_ys) in points_by_epsg.items():
+        lats, lons = get_transformer(epsg).transform(
+            np.array(epsg_xs), np.array(epsg_ys)
+        )
+        for index, lat, lon in zip(indexes, lats.tolist(), lons.tolist()):
+            latitudes[index] = str(lat)
+            longitudes[index] = str(lon)
+    return latitudes, longitudes
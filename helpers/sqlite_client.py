@@ -1,6 +1,43 @@
 import logging
 import sqlite3
 import os
+from itertools import repeat
+from urllib.parse import quote
+
+from dag_datalake_sirene.config import SQLITE_CACHE_SIZE_MB, SQLITE_MMAP_SIZE_MB
+
+# Connection profiles, selected by each use of a database
+SQLITE_PROFILE_DEFAULT = "default"
+# Databases built by the ETL, such as the SIRENE database shared by its tasks :
+# written without sync to disk, the rollback journal being kept in memory so that
+# a failed task rolls its changes back
+SQLITE_PROFILE_BULK_BUILD = "bulk_build"
+# Databases built by a single task, deleted when it is retried, such as the ones
+# of the additional tables : written without journal nor sync to disk
+SQLITE_PROFILE_SCRATCH_BUILD = "scratch_build"
+# Databases which do not change while they are read, such as the SIRENE database
+# once built : opened as immutable (no locks) and read with memory-mapped I/O
+SQLITE_PROFILE_READ_ONLY_SCAN = "read_only_scan"
+
+SQLITE_BUILD_PRAGMAS = [
+    "synchronous = OFF",
+    # A negative size is in KiB
+    f"cache_size = -{SQLITE_CACHE_SIZE_MB * 1024}",
+    f"mmap_size = {SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+    "temp_store = MEMORY",
+]
+SQLITE_PROFILE_PRAGMAS = {
+    SQLITE_PROFILE_DEFAULT: [],
+    SQLITE_PROFILE_BULK_BUILD: ["journal_mode = MEMORY", *SQLITE_BUILD_PRAGMAS],
+    # Rolling back a transaction without journal is undefined
+    SQLITE_PROFILE_SCRATCH_BUILD: ["journal_mode = OFF", *SQLITE_BUILD_PRAGMAS],
+    SQLITE_PROFILE_READ_ONLY_SCAN: [
+        "query_only = ON",
+        f"cache_size = -{SQLITE_CACHE_SIZE_MB * 1024}",
+        f"mmap_size = {SQLITE_MMAP_SIZE_MB * 1024 * 1024}",
+        "temp_store = MEMORY",
+    ],
+}
 
 
 class SqliteClient:
@@ -16,6 +53,7 @@ class SqliteClient:
     Args:
         db_location (str): The file path to the SQLite database. The database file will be created if it does not exist.
         timeout (int, optional): The timeout duration for database operations. Defaults to 30 seconds.
+        profile (str, optional): The connection profile, among `SQLITE_PROFILE_PRAGMAS`. Defaults to the SQLite defaults.
 
     Example:
         ```python
@@ -37,19 +75,35 @@ class SqliteClient:
         ```
     """
 
-    def __init__(self, db_location, timeout=30) -> None:
+    def __init__(self, db_location, timeout=30, profile=SQLITE_PROFILE_DEFAULT) -> None:
         self.db_location = db_location
+        self.profile = profile
 
         # SQLite creates the database if it does not exist but not the parent folders
         self.db_folder = os.path.dirname(self.db_location)
         if not os.path.exists(self.db_folder):
             os.makedirs(self.db_folder)
 
-        self.db_conn = sqlite3.connect(self.db_location, timeout=timeout)
+        if profile == SQLITE_PROFILE_READ_ONLY_SCAN:
+            self.db_conn = sqlite3.connect(
+                f"file:{quote(os.path.abspath(self.db_location))}"
+                "?mode=ro&immutable=1",
+                timeout=timeout,
+                uri=True,
+            )
+        else:
+            self.db_conn = sqlite3.connect(self.db_location, timeout=timeout)
+        self.db_cursor = self.db_conn.cursor()
+        for pragma in SQLITE_PROFILE_PRAGMAS[profile]:
+            self.execute(f"PRAGMA {pragma}")
         logging.info(
-            f"*********** Connecting to database {self.db_location}! ***********"
+            f"*********** Connecting to database {self.db_location} "
+            f"with the {profile} profile! ***********"
         )
-        self.db_cursor = self.db_conn.cursor()
+        if profile != SQLITE_PROFILE_DEFAULT:
+            # The size of the memory map is bounded when SQLite is compiled
+            mmap_size = self.execute("PRAGMA mmap_size").fetchone()[0]
+            logging.info(f"Memory-mapped I/O of up to {mmap_size} bytes")
 
     def __enter__(self) -> "SqliteClient":
         return self
@@ -77,6 +131,29 @@ class SqliteClient:
     def execute_script(self, query) -> sqlite3.Cursor:
         return self.db_cursor.executescript(query)
 
+    def iter_dicts(self, query, params=None, batch_size=1000):
+        """
+        Stream the rows of a query as dicts, by batches of `batch_size` rows.
+
+        The column names are read once from the query description, and each batch
+        is converted without intermediate copies. A dedicated cursor is used, so that
+        other queries can be executed while iterating.
+
+        Yields:
+            list[dict]: the next batch of rows.
+        """
+        cursor = self.db_conn.cursor()
+        try:
+            cursor.execute(query, params or ())
+            columns = tuple(column[0] for column in cursor.description)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield list(map(dict, map(zip, repeat(columns), rows)))
+        finally:
+            cursor.close()
+
     def connect_to_another_db(self, db_to_connect, db_alias) -> None:
         self.execute(f"ATTACH DATABASE '{db_to_connect}' AS '{db_alias}'")
 
@@ -1,12 +1,18 @@
 import filecmp
 from ast import literal_eval
+from contextlib import contextmanager
 import logging
 import requests
 import os
 import gzip
 import re
 import json
+import zipfile
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
 from datetime import datetime, date, timedelta
 from pathlib import Path
 from typing import Literal
@@ -31,9 +37,25 @@ def is_valid_number(value):
         return False
 
 
+def to_json(value):
+    """
+    Canonical JSON of the lists and dicts stored by the pipelines : compact, with
+    sorted keys, so that the same data is always written the same way.
+    """
+    return json.dumps(value, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
 def str_to_list(string):
+    """
+    Parse a list (or dict) stored as JSON (see `to_json`), or in the legacy Python
+    representation of the data sources.
+    """
     if string is None:
         return None
+    try:
+        return json.loads(string)
+    except (TypeError, ValueError):
+        pass
     try:
         li = literal_eval(string)
         return li
@@ -41,6 +63,20 @@ def str_to_list(string):
         logging.info(f"////////////////Could not evaluate: {string}")
 
 
+def str_to_json(string):
+    """
+    Convert a list or dict in the legacy Python representation of the data sources
+    (or already in JSON) into canonical JSON, much faster to parse and readable by
+    the JSON functions of SQLite. Missing or invalid values are None.
+    """
+    if not isinstance(string, str):
+        return None
+    value = str_to_list(string)
+    if value is None:
+        return None
+    return to_json(value)
+
+
 def str_to_bool(string):
     if string is None:
         return None
@@ -80,6 +116,18 @@ def dict_from_row(row):
     return dict(zip(row.keys(), row))
 
 
+def log_cache_info(*functions):
+    """Log the hit rate of functions memoized with `functools.lru_cache`."""
+    for function in functions:
+        cache_info = function.cache_info()
+        calls = cache_info.hits + cache_info.misses
+        hit_rate = cache_info.hits / calls if calls else 0
+        logging.info(
+            f"{function.__name__} cache: {cache_info.hits} hits out of {calls} calls "
+            f"({hit_rate:.1%}), {cache_info.currsize}/{cache_info.maxsize} entries"
+        )
+
+
 def normalize_string(string):
     if string is None:
         return None
@@ -282,6 +330,92 @@ def save_data_to_zipped_csv(df: pd.DataFrame, folder: str, filename: str):
     logging.info(f"Saved {filename} with {df.shape[0]} records.")
 
 
+# Values read as missing by `pd.read_csv`
+CSV_NA_VALUES = [
+    "",
+    "#N/A",
+    "#N/A N/A",
+    "#NA",
+    "-1.#IND",
+    "-1.#QNAN",
+    "-NaN",
+    "-nan",
+    "1.#IND",
+    "1.#QNAN",
+    "<NA>",
+    "N/A",
+    "NA",
+    "NULL",
+    "NaN",
+    "None",
+    "n/a",
+    "nan",
+    "null",
+]
+# Rows of the blocks read from CSV files, and of the row groups of Parquet files
+PARQUET_ROW_GROUP_SIZE = 100_000
+
+
+@contextmanager
+def open_csv_file(csv_path):
+    """Open a CSV file, or the single CSV file of a zip archive."""
+    if csv_path.endswith(".zip"):
+        with zipfile.ZipFile(csv_path) as zip_file:
+            (csv_name,) = zip_file.namelist()
+            with zip_file.open(csv_name) as csv_file:
+                yield csv_file
+    else:
+        with pa.input_stream(csv_path, compression="detect") as csv_file:
+            yield csv_file
+
+
+def convert_csv_to_parquet(csv_path: str, parquet_path: str, columns: list[str]):
+    """
+    Convert the `columns` of a CSV file, zipped or gzipped, into a Parquet file,
+    block by block. Values are kept as strings and missing values are the ones of
+    `pd.read_csv(dtype=str)`, so that reading the Parquet file with
+    `iter_parquet_chunks` gives the same DataFrames.
+    """
+    with open_csv_file(csv_path) as csv_file:
+        reader = pa_csv.open_csv(
+            csv_file,
+            read_options=pa_csv.ReadOptions(block_size=64 * 1024 * 1024),
+            convert_options=pa_csv.ConvertOptions(
+                column_types={column: pa.string() for column in columns},
+                include_columns=columns,
+                null_values=CSV_NA_VALUES,
+                strings_can_be_null=True,
+            ),
+        )
+        row_count = 0
+        with pq.ParquetWriter(
+            parquet_path, reader.schema, compression="zstd"
+        ) as parquet_writer:
+            for batch in reader:
+                parquet_writer.write_batch(batch, row_group_size=PARQUET_ROW_GROUP_SIZE)
+                row_count += batch.num_rows
+    logging.info(f"Converted {row_count} rows of {csv_path} into {parquet_path}.")
+
+
+def iter_parquet_chunks(
+    parquet_path: str, columns: list[str], chunksize: int = PARQUET_ROW_GROUP_SIZE
+):
+    """
+    Read the `columns` of a Parquet file written by `convert_csv_to_parquet` by
+    chunks, as `pd.read_csv(dtype=str, chunksize=chunksize)` would read the CSV
+    file, without reading the other columns.
+    """
+    parquet_file = pq.ParquetFile(parquet_path)
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+        # Missing values as NaN, like `pd.read_csv`
+        yield batch.to_pandas().fillna(np.nan)
+
+
+def read_parquet_file(parquet_path: str, columns: list[str]) -> pd.DataFrame:
+    """Read the `columns` of a Parquet file written by `convert_csv_to_parquet`."""
+    return pd.read_parquet(parquet_path, columns=columns).fillna(np.nan)
+
+
 def flatten_object(obj, prop):
     res = ""
     for item in obj:
@@ -0,0 +1,49 @@
+# fmt: off
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.\
+    bulk_controller import AdaptiveBulkController
+# fmt: on
+
+
+def build_controller():
+    return AdaptiveBulkController(
+        min_bytes=1000,
+        max_bytes=8000,
+        min_concurrency=1,
+        max_concurrency=4,
+        target_latency=1,
+        initial_bytes=4000,
+        initial_concurrency=2,
+        window_size=2,
+    )
+
+
+def test_bulk_controller_grows_while_fast():
+    controller = build_controller()
+    for _ in range(20):
+        controller.record(100, 0, 0.1)
+
+    assert controller.bulk_max_bytes == 8000
+    assert controller.concurrency == 4
+
+
+def test_bulk_controller_shrinks_on_rejections():
+    controller = build_controller()
+    controller.record(50, 50, 0.1)
+
+    assert controller.bulk_max_bytes == 2000
+    assert controller.concurrency == 1
+
+    for _ in range(5):
+        controller.record(0, 100, 0.1)
+    assert controller.bulk_max_bytes == 1000
+    assert controller.concurrency == 1
+    assert controller.get_stats()["bulk_rejected_request_count"] == 6
+
+
+def test_bulk_controller_shrinks_when_slow():
+    controller = build_controller()
+    controller.record(100, 0, 3)
+    controller.record(100, 0, 3)
+
+    assert controller.bulk_max_bytes == 3200
+    assert controller.concurrency == 2
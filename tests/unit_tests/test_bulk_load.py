@@ -0,0 +1,99 @@
+import numpy as np
+import pandas as pd
+
+from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite import helpers
+from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
+    bulk_load_table_model,
+    create_index,
+    insert_dataframe,
+)
+
+ROW_COUNT = 20_000
+CHUNK_SIZE = 5_000
+COLUMNS = ["siren", "nom", "prenom", "code_postal", "effectif"]
+CREATE_TABLE_QUERY = f"CREATE TABLE personne ({', '.join(COLUMNS)})"
+
+
+def read_table(location):
+    with SqliteClient(location) as sqlite_client:
+        return sqlite_client.execute("SELECT * FROM personne ORDER BY rowid").fetchall()
+
+
+def synthetic_csv(path):
+    randomizer = np.random.default_rng(42)
+    df = pd.DataFrame(
+        {
+            column: randomizer.integers(0, 10**9, ROW_COUNT).astype(str)
+            for column in COLUMNS
+        }
+    )
+    df.loc[df.index[::3], "prenom"] = None
+    df.to_csv(path, index=False)
+
+
+def test_insert_dataframe_as_to_sql(tmp_path):
+    df = pd.DataFrame(
+        {
+            "siren": ["000000001", "000000002", None],
+            "nom": ["DUPONT", np.nan, "MARTIN"],
+            "prenom": pd.Series(["JEAN", None, "ÉLODIE"], dtype="string"),
+            "code_postal": [75002, 13001, 69001],
+            "effectif": [1.5, np.nan, 3.0],
+        }
+    )
+    for location in [tmp_path / "to_sql.db", tmp_path / "bulk.db"]:
+        with SqliteClient(str(location)) as sqlite_client:
+            sqlite_client.execute(CREATE_TABLE_QUERY)
+    with SqliteClient(str(tmp_path / "to_sql.db")) as sqlite_client:
+        df.to_sql("personne", sqlite_client.db_conn, if_exists="append", index=False)
+    with SqliteClient(str(tmp_path / "bulk.db")) as sqlite_client:
+        assert insert_dataframe(sqlite_client, "personne", df) == 3
+
+    assert read_table(str(tmp_path / "bulk.db")) == read_table(
+        str(tmp_path / "to_sql.db")
+    )
+
+
+def test_bulk_load_table_model_indexes_after_load(tmp_path, monkeypatch):
+    index_durations = {}
+    monkeypatch.setattr(
+        helpers, "push_index_duration", index_durations.__setitem__, raising=True
+    )
+    csv_path = tmp_path / "personne.csv"
+    synthetic_csv(csv_path)
+
+    with SqliteClient(str(tmp_path / "to_sql.db")) as sqlite_client:
+        sqlite_client.execute(CREATE_TABLE_QUERY)
+        sqlite_client.execute(create_index("index_personne", "personne", "siren"))
+        for df in pd.read_csv(csv_path, chunksize=CHUNK_SIZE, dtype=str):
+            df.to_sql(
+                "personne", sqlite_client.db_conn, if_exists="append", index=False
+            )
+
+    with bulk_load_table_model(
+        table_name="personne",
+        create_table_query=CREATE_TABLE_QUERY,
+        create_index_func=create_index,
+        index_name="index_personne",
+        index_column="siren",
+        db_location=str(tmp_path / "bulk.db"),
+    ) as sqlite_client:
+        for df in pd.read_csv(csv_path, chunksize=CHUNK_SIZE, dtype=str):
+            insert_dataframe(sqlite_client, "personne", df)
+        # The index is only created once the table is loaded
+        assert (
+            sqlite_client.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'index'"
+            ).fetchall()
+            == []
+        )
+
+    rows = read_table(str(tmp_path / "bulk.db"))
+    assert len(rows) == ROW_COUNT
+    assert rows == read_table(str(tmp_path / "to_sql.db"))
+    with SqliteClient(str(tmp_path / "bulk.db")) as sqlite_client:
+        assert sqlite_client.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index'"
+        ).fetchall() == [("index_personne",)]
+    assert list(index_durations) == ["index_personne"]
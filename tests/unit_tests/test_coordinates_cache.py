@@ -0,0 +1,74 @@
+from dag_datalake_sirene.helpers import geolocalisation
+from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.data_enrichment import (
+    format_departement,
+)
+from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions import (
+    create_etablissements_tables,
+)
+
+ETABLISSEMENTS = [
+    ("75102", "651000.5", "6862000.2"),
+    ("97411", "340000", "7650000"),
+    ("75102", "651000.5", "6862000.2"),
+    ("13201", None, "6250000"),
+]
+
+
+def create_database(location):
+    with SqliteClient(location) as sqlite_client:
+        for table_name in ["etablissement", "siege"]:
+            sqlite_client.execute(
+                f"CREATE TABLE {table_name} "
+                "(commune TEXT, x TEXT, y TEXT, latitude TEXT, longitude TEXT)"
+            )
+            sqlite_client.execute_many(
+                f"INSERT INTO {table_name} (commune, x, y) VALUES (?, ?, ?)",
+                ETABLISSEMENTS,
+            )
+
+
+def read_coordinates(location):
+    with SqliteClient(location) as sqlite_client:
+        return sqlite_client.execute(
+            "SELECT latitude, longitude FROM etablissement ORDER BY rowid"
+        ).fetchall()
+
+
+def test_fill_coordinates_reuses_previous_cache(tmp_path, monkeypatch):
+    computed_points = []
+
+    def transform_coordinates_by_epsg(epsgs, xs, ys):
+        computed_points.extend(zip(epsgs, xs, ys))
+        return geolocalisation.transform_coordinates_by_epsg(epsgs, xs, ys)
+
+    monkeypatch.setattr(
+        create_etablissements_tables,
+        "transform_coordinates_by_epsg",
+        transform_coordinates_by_epsg,
+    )
+    create_database(str(tmp_path / "first.db"))
+    create_database(str(tmp_path / "second.db"))
+
+    create_etablissements_tables.fill_coordinates(
+        str(tmp_path / "first.db"), str(tmp_path / "first_cache.db"), None
+    )
+    assert computed_points == [
+        (2154, "651000.5", "6862000.2"),
+        (2975, "340000", "7650000"),
+    ]
+
+    computed_points.clear()
+    create_etablissements_tables.fill_coordinates(
+        str(tmp_path / "second.db"),
+        str(tmp_path / "second_cache.db"),
+        str(tmp_path / "first_cache.db"),
+    )
+    assert computed_points == []
+
+    coordinates = read_coordinates(str(tmp_path / "second.db"))
+    assert coordinates == read_coordinates(str(tmp_path / "first.db"))
+    assert coordinates == [
+        geolocalisation.transform_coordinates(format_departement(commune), x, y)
+        for commune, x, y in ETABLISSEMENTS
+    ]
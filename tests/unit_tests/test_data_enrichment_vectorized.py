@@ -0,0 +1,128 @@
+import random
+
+import pandas as pd
+import pytest
+
+from dag_datalake_sirene.helpers.utils import convert_date_format, sqlite_str_to_bool
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch import (
+    data_enrichment as reference,
+    data_enrichment_vectorized as vectorized,
+)
+
+ROW_COUNT = 2000
+
+VALUES = {
+    "nom": [None, "", "dupont", "Martin ", "ÉLODIE"],
+    "nom_usage": [None, "", "durand", " leroy"],
+    "nom_raison_sociale": [None, "", "ACME", "la poste"],
+    "prenom": [None, "", "jean", "Marie-Ève", " "],
+    "nature_juridique": [None, "", "1", "10", "1000", "4110", "5195", "5710", "7210"]
+    + ["9220", "92", "7489", "2"],
+    "identifiant_association": [None, "", "W751234567"],
+    "siren": ["320252489", "775663438", "123456789", "000000001"]
+    + sorted(reference.service_public_whitelist)[:3]
+    + sorted(reference.service_public_blacklist)[:3],
+    "ess_insee": [None, "", "O", "N"],
+    "est_ess_france": [None, 1, 0],
+    "activite_principale": [None, "", "62.01Z", "01.11Z", "99.99Z", "XX"],
+    "categorie_entreprise": [None, "", "GE", "ETI", "PMI", "PME"],
+    "date": [None, "2024-01-31 12:00:00+00:00", "2024-01-31", "31/01/2024"],
+    "commune": [None, "", "75056", "75101", "13201", "69381", "97411", "98735"]
+    + ["2A004", "35238", "01001"],
+}
+
+
+@pytest.fixture(params=[object, None], ids=["object", "inferred"])
+def rows(request):
+    """
+    Random rows, as read by the ETL (Python objects) or by `pd.read_sql_query`
+    (inferred dtypes, missing values being NaN).
+    """
+    randomizer = random.Random(42)
+    return pd.DataFrame(
+        {
+            field: [randomizer.choice(values) for _ in range(ROW_COUNT)]
+            for field, values in VALUES.items()
+        },
+        dtype=request.param,
+    )
+
+
+def values(column):
+    return vectorized.to_object(column).tolist()
+
+
+def test_format_nom_complet(rows):
+    assert vectorized.format_nom_complet(
+        rows["nom"], rows["nom_usage"], rows["nom_raison_sociale"], rows["prenom"]
+    ).tolist() == [
+        reference.format_nom_complet(nom, nom_usage, nom_raison_sociale, prenom)
+        for nom, nom_usage, nom_raison_sociale, prenom in zip(
+            *(
+                values(rows[field])
+                for field in ["nom", "nom_usage", "nom_raison_sociale", "prenom"]
+            )
+        )
+    ]
+
+
+def test_unite_legale_labels(rows):
+    nature_juridique = values(rows["nature_juridique"])
+    assert vectorized.is_entrepreneur_individuel(rows["nature_juridique"]).tolist() == [
+        reference.is_entrepreneur_individuel(value) for value in nature_juridique
+    ]
+    assert vectorized.is_association(
+        rows["nature_juridique"], rows["identifiant_association"]
+    ).tolist() == [
+        reference.is_association(value, identifiant)
+        for value, identifiant in zip(
+            nature_juridique, values(rows["identifiant_association"])
+        )
+    ]
+    assert vectorized.is_service_public(
+        rows["nature_juridique"], rows["siren"]
+    ).tolist() == [
+        reference.is_service_public(value, siren)
+        for value, siren in zip(nature_juridique, values(rows["siren"]))
+    ]
+    assert vectorized.is_ess(
+        vectorized.sqlite_str_to_bool(rows["est_ess_france"]), rows["ess_insee"]
+    ).tolist() == [
+        reference.is_ess(sqlite_str_to_bool(est_ess_france), ess_insee)
+        for est_ess_france, ess_insee in zip(
+            values(rows["est_ess_france"]), values(rows["ess_insee"])
+        )
+    ]
+    assert vectorized.label_section_from_activite(
+        rows["activite_principale"]
+    ).tolist() == [
+        reference.label_section_from_activite(value)
+        for value in values(rows["activite_principale"])
+    ]
+    assert vectorized.map_categorie_to_number(
+        rows["categorie_entreprise"]
+    ).tolist() == [
+        reference.map_categorie_to_number(value)
+        for value in values(rows["categorie_entreprise"])
+    ]
+
+
+def test_commune_labels(rows):
+    departements = vectorized.format_departement(rows["commune"])
+    assert departements.tolist() == [
+        reference.format_departement(commune) for commune in values(rows["commune"])
+    ]
+    assert vectorized.label_region_from_departement(departements).tolist() == [
+        reference.label_region_from_departement(departement)
+        for departement in values(departements)
+    ]
+    assert vectorized.label_epci_from_commune(rows["commune"]).tolist() == [
+        reference.label_epci_from_commune(commune)
+        for commune in values(rows["commune"])
+    ]
+
+
+def test_convert_date_format(rows):
+    assert vectorized.convert_date_format(rows["date"]).tolist() == [
+        convert_date_format(date) for date in values(rows["date"])
+    ]
@@ -0,0 +1,32 @@
+import pandas as pd
+
+from dag_datalake_sirene.helpers import DataProcessor, SqliteClient
+
+
+def test_write_csv_writes_lists_and_dicts_as_json(tmp_path):
+    df = pd.DataFrame(
+        {
+            "siret": ["00000000100012", "00000000200013", "00000000300014"],
+            "liste_idcc": [["1486", "2098"], None, ["L'ÉTÉ"]],
+            "sirets_par_idcc": [{"2098": ["1"], "1486": ["2"]}, None, {}],
+            "nom": ["[not a list]", None, "ACME"],
+        }
+    )
+    file_path = str(tmp_path / "data.csv")
+
+    DataProcessor.write_csv(df, file_path)
+
+    df_csv = pd.read_csv(file_path, dtype=str)
+    assert df_csv["liste_idcc"].tolist()[::2] == ['["1486","2098"]', '["L\'ÉTÉ"]']
+    assert df_csv["sirets_par_idcc"][0] == '{"1486":["2"],"2098":["1"]}'
+    assert df_csv["nom"][0] == "[not a list]"
+    # The DataFrame itself is left unchanged
+    assert df["liste_idcc"][0] == ["1486", "2098"]
+
+    with SqliteClient(str(tmp_path / "test.db")) as sqlite_client:
+        df_csv.to_sql("convention_collective", sqlite_client.db_conn, index=False)
+        idcc = sqlite_client.execute(
+            """SELECT j.value FROM convention_collective, json_each(liste_idcc) j
+            ORDER BY j.value"""
+        ).fetchall()
+    assert idcc == [("1486",), ("2098",), ("L'ÉTÉ",)]
@@ -0,0 +1,65 @@
+from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+
+# fmt: off
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.\
+    document_hash import (
+    compute_document_hash,
+    create_changed_siren_table_query,
+    create_document_hash_table_query,
+    finalize_document_hashes,
+    get_changed_sirens,
+    save_document_hashes,
+)
+# fmt: on
+
+
+def build_document(siren, nom_complet, date_mise_a_jour):
+    return {
+        "identifiant": siren,
+        "nom_complet": nom_complet,
+        "unite_legale": {
+            "siren": siren,
+            "nom_complet": nom_complet,
+            "date_mise_a_jour": date_mise_a_jour,
+        },
+    }
+
+
+def test_compute_document_hash_ignores_indexing_date():
+    document = build_document("000000001", "ENTREPRISE", "2024-01-01T00:00:00")
+    same_document = build_document("000000001", "ENTREPRISE", "2024-01-02T00:00:00")
+    changed_document = build_document("000000001", "SOCIETE", "2024-01-01T00:00:00")
+
+    assert compute_document_hash(document) == compute_document_hash(same_document)
+    assert compute_document_hash(document) != compute_document_hash(changed_document)
+
+
+def test_finalize_document_hashes(tmp_path):
+    sirene_db_location = str(tmp_path / "sirene.db")
+    previous_db_location = str(tmp_path / "previous_document_hash.db")
+    db_location = str(tmp_path / "document_hash.db")
+    with SqliteClient(sirene_db_location) as sqlite_client:
+        sqlite_client.execute("CREATE TABLE unite_legale (siren TEXT)")
+        sqlite_client.execute_many(
+            "INSERT INTO unite_legale VALUES (?)", [("000000001",), ("000000002",)]
+        )
+    for location, document_hashes, changed_sirens in (
+        (previous_db_location, [("000000001", 1), ("000000003", 3)], []),
+        (db_location, [("000000002", 2)], ["000000002"]),
+    ):
+        with SqliteClient(location) as sqlite_client:
+            sqlite_client.execute(create_document_hash_table_query)
+            sqlite_client.execute(create_changed_siren_table_query)
+            save_document_hashes(sqlite_client, document_hashes, changed_sirens)
+
+    changed_siren_count = finalize_document_hashes(
+        db_location, previous_db_location, sirene_db_location
+    )
+
+    # 000000002 was rebuilt, 000000003 was removed
+    assert changed_siren_count == 2
+    assert get_changed_sirens(db_location) == ["000000002", "000000003"]
+    with SqliteClient(db_location) as sqlite_client:
+        assert sqlite_client.execute(
+            "SELECT siren, hash FROM document_hash ORDER BY siren"
+        ).fetchall() == [(1, 1), (2, 2)]
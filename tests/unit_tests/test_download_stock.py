@@ -0,0 +1,68 @@
+from dag_datalake_sirene.workflows.data_pipelines.etl.data_fetch_clean import (
+    etablissements,
+)
+
+CONTENT = b"siren,siret\n000000001,00000000100012\n"
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b"", headers=None):
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def raise_for_status(self):
+        pass
+
+    def iter_content(self, chunk_size):
+        yield self.content
+
+
+class FakeServer:
+    """Serves CONTENT with its ETag, as the conditional requests of a server."""
+
+    def __init__(self, etag):
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, headers, **kwargs):
+        self.requests.append(headers)
+        if headers.get("If-None-Match") == self.etag:
+            return FakeResponse(304)
+        if "Range" in headers and headers["If-Range"] == self.etag:
+            start = int(headers["Range"][len("bytes=") : -1])
+            return FakeResponse(206, CONTENT[start:])
+        return FakeResponse(200, CONTENT, {"ETag": self.etag})
+
+
+def test_download_stock_only_changed_files(tmp_path, monkeypatch):
+    data_dir = f"{tmp_path}/"
+    file_path = etablissements.get_stock_file_path("01", data_dir)
+    server = FakeServer('"v1"')
+    monkeypatch.setattr(etablissements.requests, "get", server.get)
+
+    assert etablissements.download_stock("01", data_dir) == file_path
+    assert etablissements.download_stock("01", data_dir) == file_path
+    assert server.requests == [{}, {"If-None-Match": '"v1"'}]
+
+    # Interrupted download of a new version of the file
+    server.etag = '"v2"'
+    with open(f"{file_path}.part", "wb") as part_file:
+        part_file.write(CONTENT[:10])
+    with open(f"{file_path}.part.json", "w") as validators_file:
+        validators_file.write('{"etag": "\\"v2\\"", "last_modified": null}')
+    etablissements.download_stock("01", data_dir)
+    etablissements.download_stock("01", data_dir)
+
+    assert server.requests[2:] == [
+        {"Range": "bytes=10-", "If-Range": '"v2"'},
+        {"If-None-Match": '"v2"'},
+    ]
+    with open(file_path, "rb") as file:
+        assert file.read() == CONTENT
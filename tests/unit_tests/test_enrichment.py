@@ -0,0 +1,51 @@
+from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries.enrichment import (
+    create_table_enrichment_query,
+    fill_enrichment_table_query,
+)
+
+SOURCES = {
+    "colter": {"colter_code": "colter_code"},
+    "egapro": {"egapro_renseignee": "egapro_renseignee"},
+}
+
+
+def test_enrichment_table_matches_scalar_subqueries(tmp_path):
+    with SqliteClient(str(tmp_path / "sirene.db")) as sqlite_client:
+        sqlite_client.execute("CREATE TABLE unite_legale (siren TEXT)")
+        sqlite_client.execute("CREATE TABLE colter (siren, colter_code)")
+        sqlite_client.execute("CREATE TABLE egapro (siren, egapro_renseignee)")
+        sqlite_client.execute_many(
+            "INSERT INTO unite_legale VALUES (?)",
+            [("000000001",), ("000000002",), ("000000003",)],
+        )
+        sqlite_client.execute_many(
+            "INSERT INTO colter VALUES (?, ?)",
+            [("000000002", "B"), ("000000001", "A"), ("000000001", "C"), (None, "D")],
+        )
+        sqlite_client.execute("INSERT INTO egapro VALUES ('000000002', 1)")
+
+        sqlite_client.execute(
+            create_table_enrichment_query("ul_enrichment", "siren", SOURCES)
+        )
+        for source_table, columns in SOURCES.items():
+            sqlite_client.execute(
+                fill_enrichment_table_query(
+                    "ul_enrichment", "siren", source_table, columns
+                )
+            )
+
+        expected = sqlite_client.execute(
+            """SELECT ul.siren,
+            (SELECT colter_code FROM colter WHERE siren = ul.siren),
+            (SELECT egapro_renseignee FROM egapro WHERE siren = ul.siren)
+            FROM unite_legale ul ORDER BY ul.siren"""
+        ).fetchall()
+        joined = sqlite_client.execute(
+            """SELECT ul.siren, ue.colter_code, ue.egapro_renseignee
+            FROM unite_legale ul LEFT JOIN ul_enrichment ue ON ue.siren = ul.siren
+            ORDER BY ul.siren"""
+        ).fetchall()
+
+    assert joined == expected
+    assert joined[0] == ("000000001", "A", None)
@@ -0,0 +1,23 @@
+from dag_datalake_sirene.helpers.geolocalisation import (
+    transform_coordinates,
+    transform_coordinates_batch,
+)
+
+
+def test_transform_coordinates_batch_matches_transform_coordinates():
+    points = [
+        ("75", "651000.5", "6862000.2"),
+        ("974", "340000", "7650000"),
+        ("988", 450000.0, 240000.0),
+        ("13", None, "6250000"),
+        ("13", "", "6250000"),
+        (None, "894000", "6250000"),
+        ("971", "660000", "1780000"),
+    ]
+
+    latitudes, longitudes = transform_coordinates_batch(*zip(*points))
+
+    assert list(zip(latitudes, longitudes)) == [
+        transform_coordinates(*point) for point in points
+    ]
+    assert latitudes[3] is None and longitudes[4] is None
@@ -0,0 +1,84 @@
+import pytest
+
+from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+
+# fmt: off
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.\
+    indexing_delta import compute_changed_sirens, get_expected_document_ids
+# fmt: on
+
+
+def create_database(db_location, unites_legales, egapro):
+    with SqliteClient(db_location) as sqlite_client:
+        sqlite_client.execute(
+            "CREATE TABLE unite_legale (siren TEXT, date_mise_a_jour_insee DATE, "
+            "date_mise_a_jour_rne DATE)"
+        )
+        sqlite_client.execute(
+            "CREATE TABLE etablissement (siren TEXT, siret TEXT, "
+            "date_mise_a_jour_insee DATE, date_mise_a_jour_rne DATE)"
+        )
+        sqlite_client.execute(
+            "CREATE TABLE egapro (siren TEXT, egapro_renseignee BOOLEAN)"
+        )
+        sqlite_client.execute_many(
+            "INSERT INTO unite_legale VALUES (?, ?, ?)", unites_legales
+        )
+        sqlite_client.execute_many("INSERT INTO egapro VALUES (?, ?)", egapro)
+
+
+@pytest.fixture
+def databases(tmp_path):
+    previous_db_location = str(tmp_path / "previous_sirene.db")
+    db_location = str(tmp_path / "sirene.db")
+    create_database(
+        previous_db_location,
+        [
+            ("000000001", "2024-01-01", None),
+            ("000000002", "2024-01-02", "2024-01-01"),
+            ("000000003", "2024-01-01", None),
+            ("000000004", "2024-01-01", None),
+        ],
+        [("000000003", True)],
+    )
+    create_database(
+        db_location,
+        [
+            ("000000001", "2024-01-01", None),
+            # Updated by the RNE flux
+            ("000000002", "2024-01-02", "2024-01-03"),
+            ("000000003", "2024-01-01", None),
+            # Created
+            ("000000005", "2024-01-03", None),
+        ],
+        # Changed in an auxiliary table
+        [("000000003", False)],
+    )
+    return db_location, previous_db_location
+
+
+def test_compute_changed_sirens(databases):
+    db_location, previous_db_location = databases
+    with SqliteClient(db_location) as sqlite_client:
+        changed_siren_count = compute_changed_sirens(
+            sqlite_client, previous_db_location
+        )
+        changed_sirens = [
+            row[0]
+            for row in sqlite_client.execute(
+                "SELECT siren FROM delta_siren ORDER BY siren"
+            ).fetchall()
+        ]
+
+    # 000000001 is unchanged, 000000004 was removed
+    assert changed_sirens == ["000000002", "000000003", "000000004", "000000005"]
+    assert changed_siren_count == 4
+
+
+def test_get_expected_document_ids():
+    assert get_expected_document_ids("000000001", None) == ["000000001-100"]
+    assert get_expected_document_ids("000000001", 100) == ["000000001-100"]
+    assert get_expected_document_ids("000000001", 101) == [
+        "000000001-100",
+        "000000001-200",
+    ]
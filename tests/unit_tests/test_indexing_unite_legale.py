@@ -0,0 +1,325 @@
+import copy
+import json
+import os
+
+import pytest
+
+from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch import (
+    indexing_unite_legale,
+)
+
+# fmt: off
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.\
+    indexing_unite_legale import (
+    BULK_BODY,
+    PARTITION_DONE,
+    PARTITION_FAILED,
+    check_fast_serialization_mapping,
+    doc_unite_legale_generator,
+    get_bulk_serializer,
+    index_unites_legales_by_partition,
+    plan_siren_ranges,
+    send_bulk_body,
+    serialize_bulk_bodies,
+)
+# fmt: on
+
+
+@pytest.fixture
+def sqlite_client(tmp_path):
+    with SqliteClient(str(tmp_path / "sirene.db")) as sqlite_client:
+        sqlite_client.execute("CREATE TABLE unite_legale (siren TEXT)")
+        sqlite_client.execute(
+            "CREATE TABLE count_etablissement (siren VARCHAR(10), count INTEGER)"
+        )
+        sirens = [f"{siren:09d}" for siren in range(0, 10**9, 997_000)]
+        sqlite_client.execute_many(
+            "INSERT INTO unite_legale (siren) VALUES (?)",
+            [(siren,) for siren in sirens],
+        )
+        # A few large companies concentrated at the beginning of the key space
+        sqlite_client.execute_many(
+            "INSERT INTO count_etablissement (siren, count) VALUES (?, ?)",
+            [(siren, 50) for siren in sirens[:20]],
+        )
+        yield sqlite_client
+
+
+def test_plan_siren_ranges_covers_every_siren_once(sqlite_client):
+    ranges = plan_siren_ranges(sqlite_client, 10)
+    sirens = [row[0] for row in sqlite_client.execute("SELECT siren FROM unite_legale")]
+
+    assert len(ranges) == 10
+    for siren in sirens:
+        assert sum(start <= siren <= end for start, end in ranges) == 1
+
+
+def test_plan_siren_ranges_is_weighted_by_etablissements(sqlite_client):
+    ranges = plan_siren_ranges(sqlite_client, 10)
+    first_start, first_end = ranges[0]
+    count = sqlite_client.execute(
+        "SELECT COUNT(*) FROM unite_legale WHERE siren BETWEEN ? AND ?",
+        (first_start, first_end),
+    ).fetchone()[0]
+
+    # The first range holds the large companies, hence fewer unités légales
+    assert count < 1004 / 10
+
+
+def test_plan_siren_ranges_on_empty_database(tmp_path):
+    with SqliteClient(str(tmp_path / "empty.db")) as sqlite_client:
+        sqlite_client.execute("CREATE TABLE unite_legale (siren TEXT)")
+        sqlite_client.execute(
+            "CREATE TABLE count_etablissement (siren VARCHAR(10), count INTEGER)"
+        )
+        assert plan_siren_ranges(sqlite_client, 10) == [("000000000", "999999999")]
+
+
+def build_etablissement(siret):
+    return {
+        "siret": siret,
+        "adresse": "12 RUE DE L'ÉGLISE 75001 PARIS",
+        "latitude": 48.862725,
+        "longitude": 2.287592,
+        "est_siege": siret.endswith("00001"),
+        "liste_idcc": ["1486"],
+        "liste_rge": None,
+        "date_creation": "2008-01-01",
+    }
+
+
+@pytest.fixture
+def documents():
+    return [
+        {
+            "identifiant": "000000001",
+            "nom_complet": "SOCIÉTÉ ÉTUDE & CONSEIL « ÉCO »",
+            "unite_legale": {
+                "siren": "000000001",
+                "nombre_etablissements": 1,
+                "est_entrepreneur_individuel": False,
+                "bilan_financier": {"ca": 1234567.89, "resultat_net": -12.5},
+                "colter_elus": [],
+                "sigle": None,
+                "etablissements": [build_etablissement("00000000100001")],
+            },
+        },
+        {
+            "identifiant": "000000002",
+            "nom_complet": None,
+            "adresse": "",
+            "unite_legale": {
+                "siren": "000000002",
+                "nombre_etablissements": 150,
+                "etablissements": [
+                    build_etablissement(f"000000002{index:05d}") for index in range(150)
+                ],
+            },
+        },
+    ]
+
+
+def test_fast_serialization_is_byte_equivalent(documents):
+    check_fast_serialization_mapping()
+    bodies = {}
+    for fast_serialization in (False, True):
+        bodies[fast_serialization] = list(
+            serialize_bulk_bodies(
+                doc_unite_legale_generator(
+                    copy.deepcopy(documents), "siren-test", fast_serialization
+                ),
+                get_bulk_serializer(fast_serialization),
+                lambda: 10_000,
+                1500,
+            )
+        )
+
+    assert len(bodies[False]) > 1
+    assert bodies[True] == bodies[False]
+
+
+class FakeBulkConnection:
+    """Rejects the documents listed in `statuses` with their status, once each."""
+
+    def __init__(self, statuses):
+        self.statuses = statuses
+        self.requests = []
+
+    def bulk(self, body):
+        ids = [json.loads(line)["index"]["_id"] for line in body.split(b"\n")[0:-1:2]]
+        self.requests.append(ids)
+        items = []
+        for document_id in ids:
+            status = self.statuses.pop(document_id, 201)
+            error = {"type": f"error_{status}", "reason": "failed"}
+            items.append(
+                {"index": {"_id": document_id, "status": status, "error": error}}
+            )
+        return {"items": items}
+
+
+def test_send_bulk_body_retries_retryable_failures():
+    dumps = get_bulk_serializer()
+    documents = [
+        {"_index": "siren", "_id": f"00000000{index}-100", "_source": {}}
+        for index in range(3)
+    ]
+    body, _ = next(serialize_bulk_bodies(documents, dumps, lambda: 10**6, 10))
+    connection = FakeBulkConnection({"000000001-100": 429, "000000002-100": 400})
+    requests = []
+
+    success_count, failed_documents = send_bulk_body(
+        connection,
+        body,
+        max_retries=2,
+        retry_backoff=0,
+        on_request=lambda *request: requests.append(request[:2]),
+    )
+
+    assert connection.requests == [
+        ["000000000-100", "000000001-100", "000000002-100"],
+        ["000000001-100"],
+    ]
+    assert requests == [(1, 1), (1, 0)]
+    assert success_count == 2
+    assert failed_documents == [
+        {
+            "_id": "000000002-100",
+            "status": 400,
+            "error_type": "error_400",
+            "reason": "failed",
+        }
+    ]
+
+
+class FakeCountConnection:
+    class indices:
+        @staticmethod
+        def refresh(index):
+            pass
+
+    class cat:
+        @staticmethod
+        def count(index, params):
+            return [{"count": "1"}]
+
+
+# Set by the test before the worker processes are forked
+killed_partition = {}
+
+
+def init_killed_indexing_worker(*args):
+    indexing_unite_legale.worker_context["bulk_queue"] = args[3]
+    indexing_unite_legale.worker_context["partition_pids"] = args[-1]
+
+
+def build_killed_siren_range_documents(siren_range, partition_index, attempt):
+    worker_context = indexing_unite_legale.worker_context
+    worker_context["partition_pids"][partition_index] = os.getpid()
+    if siren_range == killed_partition["siren_range"]:
+        # Attempts are counted with files, shared by the worker processes
+        attempts_dir = killed_partition["attempts_dir"]
+        (attempts_dir / f"attempt_{len(os.listdir(attempts_dir))}").touch()
+        if len(os.listdir(attempts_dir)) <= killed_partition["killed_attempts"]:
+            # Killed without reporting it, as by the OOM killer
+            os._exit(9)
+    worker_context["bulk_queue"].put(
+        (PARTITION_DONE, siren_range, attempt, ([], []), 0)
+    )
+
+
+@pytest.mark.parametrize("killed_attempts,raises", [(1, False), (3, True)])
+def test_partition_of_killed_worker_is_retried(
+    tmp_path, monkeypatch, killed_attempts, raises
+):
+    siren_ranges = [
+        ("000000000", "299999999"),
+        ("300000000", "599999999"),
+        ("600000000", "999999999"),
+    ]
+    monkeypatch.setitem(killed_partition, "siren_range", siren_ranges[1])
+    monkeypatch.setitem(killed_partition, "attempts_dir", tmp_path)
+    monkeypatch.setitem(killed_partition, "killed_attempts", killed_attempts)
+    monkeypatch.setattr(indexing_unite_legale, "PARTITION_CHECK_INTERVAL", 0.2)
+    monkeypatch.setattr(
+        indexing_unite_legale, "init_indexing_worker", init_killed_indexing_worker
+    )
+    monkeypatch.setattr(
+        indexing_unite_legale,
+        "build_siren_range_documents",
+        build_killed_siren_range_documents,
+    )
+
+    def index():
+        return index_unites_legales_by_partition(
+            str(tmp_path / "sirene.db"),
+            FakeCountConnection,
+            1,
+            10,
+            "siren",
+            2,
+            siren_ranges,
+            max_partition_attempts=3,
+        )
+
+    if raises:
+        with pytest.raises(Exception, match="worker process .* died"):
+            index()
+    else:
+        assert index() == 1
+    assert len(os.listdir(tmp_path)) == min(killed_attempts + 1, 3)
+
+
+class FakeBulkCountConnection(FakeBulkConnection, FakeCountConnection):
+    pass
+
+
+def build_failed_siren_range_documents(siren_range, partition_index, attempt):
+    bulk_queue = indexing_unite_legale.worker_context["bulk_queue"]
+    documents = [{"_index": "siren", "_id": f"{siren_range[0]}-100", "_source": {}}]
+    body, _ = next(
+        serialize_bulk_bodies(documents, get_bulk_serializer(), lambda: 10**6, 10)
+    )
+    bulk_queue.put((BULK_BODY, siren_range, attempt, body, 1))
+    if attempt == 1:
+        # Fails without reporting it, as if the sender timed out before reading it
+        raise Exception("build failed")
+    # Failure of the first attempt only read once it is retried
+    bulk_queue.put((PARTITION_FAILED, siren_range, 1, "build failed", 0))
+    bulk_queue.put((PARTITION_DONE, siren_range, attempt, ([], []), 1))
+
+
+def test_messages_of_retried_attempt_are_dropped(tmp_path, monkeypatch):
+    monkeypatch.setattr(indexing_unite_legale, "PARTITION_CHECK_INTERVAL", 0.2)
+    monkeypatch.setattr(
+        indexing_unite_legale, "init_indexing_worker", init_killed_indexing_worker
+    )
+    monkeypatch.setattr(
+        indexing_unite_legale,
+        "build_siren_range_documents",
+        build_failed_siren_range_documents,
+    )
+    # The document sent by the first attempt fails, the one sent again succeeds
+    connection = FakeBulkCountConnection({"000000000-100": 400})
+    indexed_partitions = []
+
+    assert (
+        index_unites_legales_by_partition(
+            str(tmp_path / "sirene.db"),
+            connection,
+            1,
+            10,
+            "siren",
+            1,
+            [("000000000", "999999999")],
+            on_partition_indexed=lambda *partition: indexed_partitions.append(
+                partition
+            ),
+            max_partition_attempts=2,
+        )
+        == 1
+    )
+    assert connection.requests == [["000000000-100"], ["000000000-100"]]
+    assert indexed_partitions == [(("000000000", "999999999"), 1)]
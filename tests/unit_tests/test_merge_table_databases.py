@@ -0,0 +1,49 @@
+import os
+
+from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
+    merge_table_databases,
+)
+
+
+def create_table_database(location, table_name, rows):
+    with SqliteClient(location) as sqlite_client:
+        sqlite_client.execute(
+            f"CREATE TABLE {table_name} (siren TEXT PRIMARY KEY, value TEXT)"
+        )
+        sqlite_client.execute(
+            f"CREATE INDEX index_{table_name} ON {table_name} (value)"
+        )
+        sqlite_client.execute_many(f"INSERT INTO {table_name} VALUES (?, ?)", rows)
+
+
+def test_merge_table_databases(tmp_path):
+    db_location = str(tmp_path / "sirene.db")
+    with SqliteClient(db_location) as sqlite_client:
+        sqlite_client.execute("CREATE TABLE unite_legale (siren TEXT)")
+        # Left by a previous run, replaced by the merged table
+        sqlite_client.execute("CREATE TABLE rge (siret TEXT)")
+    table_db_locations = [str(tmp_path / "rge.db"), str(tmp_path / "egapro.db")]
+    create_table_database(table_db_locations[0], "rge", [("1", "a"), ("2", "b")])
+    create_table_database(table_db_locations[1], "egapro", [("3", "c")])
+
+    merge_table_databases(db_location, table_db_locations)
+
+    with SqliteClient(db_location) as sqlite_client:
+        assert sqlite_client.execute(
+            "SELECT type, name, tbl_name FROM sqlite_master ORDER BY name"
+        ).fetchall() == [
+            ("table", "egapro", "egapro"),
+            ("index", "index_egapro", "egapro"),
+            ("index", "index_rge", "rge"),
+            ("table", "rge", "rge"),
+            ("index", "sqlite_autoindex_egapro_1", "egapro"),
+            ("index", "sqlite_autoindex_rge_1", "rge"),
+            ("table", "unite_legale", "unite_legale"),
+        ]
+        assert sqlite_client.execute("SELECT * FROM rge").fetchall() == [
+            ("1", "a"),
+            ("2", "b"),
+        ]
+        assert sqlite_client.execute("SELECT * FROM egapro").fetchall() == [("3", "c")]
+    assert not any(os.path.exists(location) for location in table_db_locations)
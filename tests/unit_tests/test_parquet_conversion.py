@@ -0,0 +1,46 @@
+import zipfile
+
+import pandas as pd
+
+from dag_datalake_sirene.helpers.utils import (
+    convert_csv_to_parquet,
+    iter_parquet_chunks,
+)
+
+COLUMNS = ["siren", "nomUniteLegale", "trancheEffectifsUniteLegale"]
+ROWS = [
+    '000000001,"DUPONT, JEAN",x,NA',
+    "000000002,,y,00",
+    '000000003,None,z,""',
+    '000000004,"ÉLODIE ""L""",w,<NA>',
+]
+
+
+def test_parquet_chunks_as_read_csv(tmp_path):
+    csv_path = tmp_path / "StockUniteLegale_utf8.csv"
+    csv_path.write_text(
+        "siren,nomUniteLegale,sigleUniteLegale,trancheEffectifsUniteLegale\n"
+        + "\n".join(ROWS * 1000)
+        + "\n",
+        encoding="utf-8",
+    )
+    with zipfile.ZipFile(tmp_path / "StockUniteLegale_utf8.zip", "w") as zip_file:
+        zip_file.write(csv_path, csv_path.name)
+
+    convert_csv_to_parquet(
+        str(tmp_path / "StockUniteLegale_utf8.zip"),
+        str(tmp_path / "StockUniteLegale_utf8.parquet"),
+        COLUMNS,
+    )
+    chunks = list(
+        iter_parquet_chunks(
+            str(tmp_path / "StockUniteLegale_utf8.parquet"), COLUMNS, 1500
+        )
+    )
+
+    expected_chunks = list(pd.read_csv(csv_path, dtype=str, chunksize=1500))
+    assert [len(chunk) for chunk in chunks] == [1500, 1500, 1000]
+    for chunk, expected_chunk in zip(chunks, expected_chunks):
+        pd.testing.assert_frame_equal(
+            chunk, expected_chunk[COLUMNS].reset_index(drop=True)
+        )
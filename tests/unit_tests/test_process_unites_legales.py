@@ -0,0 +1,138 @@
+import json
+
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.process_unites_legales import (
+    process_unites_legales,
+)
+
+DOCUMENT_COUNT = 100
+
+ADRESSE = {
+    "complement_adresse": None,
+    "numero_voie": "12",
+    "indice_repetition": None,
+    "type_voie": "RUE",
+    "libelle_voie": "DE LA PAIX",
+    "libelle_commune": "PARIS",
+    "libelle_cedex": None,
+    "distribution_speciale": None,
+    "code_postal": "75002",
+    "cedex": None,
+    "commune": "75102",
+    "libelle_commune_etranger": None,
+    "libelle_pays_etranger": None,
+    "latitude": 48.86,
+    "longitude": 2.33,
+    "x": None,
+    "y": None,
+    "liste_idcc": "['1486']",
+    "liste_rge": None,
+    "liste_uai": None,
+    "liste_finess": None,
+    "liste_id_bio": None,
+}
+
+
+def build_unite_legale(siren, nature_juridique="5710"):
+    siege = {
+        **ADRESSE,
+        "siret": f"{siren}00012",
+        "est_siege": "true",
+        "nom_commercial": None,
+    }
+    etablissement = {
+        **ADRESSE,
+        "siret": f"{siren}00012",
+        "est_siege": True,
+        "liste_idcc": ["1486"],
+        "liste_rge": None,
+    }
+    return {
+        "siren": siren,
+        "slug": f"acme-{siren}",
+        "statut_diffusion_unite_legale": "O",
+        "nom": "DUPONT",
+        "nom_usage": None,
+        "nom_raison_sociale": None if nature_juridique == "1000" else "ACME",
+        "prenom": "JEAN",
+        "sigle": None,
+        "denomination_usuelle_1_unite_legale": None,
+        "denomination_usuelle_2_unite_legale": None,
+        "denomination_usuelle_3_unite_legale": None,
+        "nature_juridique_unite_legale": nature_juridique,
+        "activite_principale_unite_legale": "62.01Z",
+        "categorie_entreprise": "PME",
+        "identifiant_association_unite_legale": None,
+        "economie_sociale_solidaire_unite_legale": "N",
+        "nombre_etablissements": 1,
+        "nombre_etablissements_ouverts": 1,
+        "colter_elus": "[]",
+        "bilan_financier": json.dumps({"ca": 1000}),
+        "immatriculation": json.dumps({"capital_variable": 1}),
+        "dirigeants_pp": json.dumps(
+            [
+                {
+                    "siren": siren,
+                    "nom": nom,
+                    "nom_usage": None,
+                    "prenoms": "MARIE",
+                    "date_de_naissance": "1970-01",
+                    "nationalite": "Française",
+                    "role_description": "Président",
+                    "date_mise_a_jour": "2024-01-01",
+                }
+                for nom in ["MARTIN", "BERNARD"]
+            ]
+        ),
+        "dirigeants_pm": "[]",
+        "beneficiaires_effectifs": "[]",
+        "est_entrepreneur_spectacle": None,
+        "est_ess_france": None,
+        "egapro_renseignee": 1,
+        "est_siae": None,
+        "est_qualiopi": None,
+        "liste_id_organisme_formation": None,
+        "liste_idcc_unite_legale": "['1486']",
+        "from_insee": 1,
+        "from_rne": 1,
+        "date_mise_a_jour_rne": "2024-01-01 00:00:00+00:00",
+        "siege": json.dumps(siege),
+        "etablissements": json.dumps([etablissement]),
+        "etablissements_complements": json.dumps(
+            {
+                "est_uai": False,
+                "est_rge": False,
+                "est_bio": False,
+                "est_finess": False,
+                "convention_collective_renseignee": True,
+            }
+        ),
+    }
+
+
+def test_process_unites_legales_entrepreneur_individuel():
+    (document,) = process_unites_legales(
+        [build_unite_legale("000000001", nature_juridique="1000")],
+        "2024-01-02T00:00:00",
+    )
+
+    unite_legale = document["unite_legale"]
+    assert document["nom_complet"] == "JEAN DUPONT"
+    assert unite_legale["liste_dirigeants"] == [
+        "MARIE BERNARD",
+        "MARIE MARTIN",
+        "JEAN DUPONT",
+    ]
+    assert unite_legale["dirigeants_pp"] == [{"nom": "DUPONT", "prenoms": "JEAN"}]
+    assert unite_legale["date_mise_a_jour"] == "2024-01-02T00:00:00"
+
+
+def test_process_unites_legales_shares_date_mise_a_jour():
+    documents = process_unites_legales(
+        [build_unite_legale(f"{siren:09d}") for siren in range(DOCUMENT_COUNT)]
+    )
+
+    assert len(documents) == DOCUMENT_COUNT
+    assert (
+        len({document["unite_legale"]["date_mise_a_jour"] for document in documents})
+        == 1
+    )
@@ -0,0 +1,26 @@
+import pytest
+
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.data_enrichment import (
+    format_slug,
+)
+
+
+@pytest.mark.parametrize(
+    "arguments, expected",
+    [
+        (("ACME", "AC", None, None, None, None, "123456789", "O"), "acme-ac-123456789"),
+        (("ACME", "AC", None, None, None, None, "123456789", "P"), "123456789"),
+        (
+            ("SOCIÉTÉ ÉCO", None, "L'ATELIER", "IGNORED", None, None, "123456789"),
+            "societe-eco-l-atelier-123456789",
+        ),
+        (
+            ("ACME", None, None, "SUPPRESSION DU NOM COMMERCIAL", "BOIS", None, None),
+            "acme-bois",
+        ),
+        ((None, None, None, None, None, None, "123456789", "O"), "123456789"),
+        ((None,), ""),
+    ],
+)
+def test_format_slug(arguments, expected):
+    assert format_slug(*arguments) == expected
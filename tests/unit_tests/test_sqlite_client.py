@@ -0,0 +1,62 @@
+import sqlite3
+
+import pytest
+
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_BULK_BUILD,
+    SQLITE_PROFILE_READ_ONLY_SCAN,
+    SQLITE_PROFILE_SCRATCH_BUILD,
+    SqliteClient,
+)
+
+
+def test_iter_dicts_streams_batches_of_dicts(tmp_path):
+    with SqliteClient(str(tmp_path / "test.db")) as sqlite_client:
+        sqlite_client.execute("CREATE TABLE unite_legale (siren TEXT, nom TEXT)")
+        sqlite_client.execute_many(
+            "INSERT INTO unite_legale (siren, nom) VALUES (?, ?)",
+            [(f"{siren:09d}", f"nom {siren}") for siren in range(5)],
+        )
+
+        batches = list(
+            sqlite_client.iter_dicts(
+                "SELECT siren, nom FROM unite_legale WHERE siren > ? ORDER BY siren",
+                ("000000000",),
+                batch_size=3,
+            )
+        )
+
+    assert [len(batch) for batch in batches] == [3, 1]
+    assert batches[0][0] == {"siren": "000000001", "nom": "nom 1"}
+
+
+def test_connection_profiles(tmp_path):
+    db_location = str(tmp_path / "sirène.db")
+    with SqliteClient(
+        str(tmp_path / "scratch.db"), profile=SQLITE_PROFILE_SCRATCH_BUILD
+    ) as sqlite_client:
+        assert sqlite_client.execute("PRAGMA journal_mode").fetchone() == ("off",)
+        assert sqlite_client.execute("PRAGMA synchronous").fetchone() == (0,)
+
+    with SqliteClient(db_location, profile=SQLITE_PROFILE_BULK_BUILD) as sqlite_client:
+        assert sqlite_client.execute("PRAGMA journal_mode").fetchone() == ("memory",)
+        assert sqlite_client.execute("PRAGMA synchronous").fetchone() == (0,)
+        sqlite_client.execute("CREATE TABLE unite_legale (siren TEXT)")
+        sqlite_client.execute("INSERT INTO unite_legale VALUES ('000000001')")
+    # The changes of a failed task are rolled back
+    with pytest.raises(ValueError):
+        with SqliteClient(
+            db_location, profile=SQLITE_PROFILE_BULK_BUILD
+        ) as sqlite_client:
+            sqlite_client.execute("DELETE FROM unite_legale")
+            raise ValueError
+
+    with SqliteClient(
+        db_location, profile=SQLITE_PROFILE_READ_ONLY_SCAN
+    ) as sqlite_client:
+        assert sqlite_client.execute("SELECT siren FROM unite_legale").fetchall() == [
+            ("000000001",)
+        ]
+        assert sqlite_client.execute("PRAGMA query_only").fetchone() == (1,)
+        with pytest.raises(sqlite3.OperationalError):
+            sqlite_client.execute("INSERT INTO unite_legale VALUES ('000000002')")
@@ -0,0 +1,58 @@
+import math
+import random
+from ast import literal_eval
+
+import pytest
+
+from dag_datalake_sirene.helpers.utils import str_to_json, str_to_list
+
+LIST_COUNT = 1000
+
+
+@pytest.mark.parametrize(
+    "string, expected",
+    [
+        ('["1486", "2098"]', ["1486", "2098"]),
+        ("['1486', '2098']", ["1486", "2098"]),
+        ("[\"L'ATELIER\", 'É']", ["L'ATELIER", "É"]),
+        ("[]", []),
+        (None, None),
+        ("['1486', nan]", None),
+    ],
+)
+def test_str_to_list(string, expected):
+    assert str_to_list(string) == expected
+
+
+@pytest.mark.parametrize(
+    "string, expected",
+    [
+        ("['1486', '2098']", '["1486","2098"]'),
+        ('["1486"]', '["1486"]'),
+        ("['É']", '["É"]'),
+        ("{'1486': ['00000000100012']}", '{"1486":["00000000100012"]}'),
+        (None, None),
+        (math.nan, None),
+        ("['1486', nan]", None),
+    ],
+)
+def test_str_to_json(string, expected):
+    assert str_to_json(string) == expected
+
+
+def test_str_to_list_json_as_literal_eval():
+    randomizer = random.Random(42)
+    legacy_lists = [
+        str(
+            [
+                f"{randomizer.randrange(10**9):09d}"
+                for _ in range(randomizer.randint(1, 3))
+            ]
+        )
+        for _ in range(LIST_COUNT)
+    ]
+    json_lists = [str_to_json(string) for string in legacy_lists]
+
+    assert [str_to_list(string) for string in json_lists] == [
+        literal_eval(string) for string in legacy_lists
+    ]
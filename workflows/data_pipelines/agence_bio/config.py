@@ -22,4 +22,5 @@ AGENCE_BIO_CONFIG = DataSourceConfig(
         CREATE INDEX idx_siren ON agence_bio (siren);
         COMMIT;
     """,
+    json_columns=["liste_id_bio"],
 )
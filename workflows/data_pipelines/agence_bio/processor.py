@@ -85,7 +85,6 @@ class AgenceBioProcessor(DataProcessor):
                 statut_bio=lambda df: df["statut_bio"].apply(
                     lambda x: self.get_bio_status(x)
                 ),
-                liste_id_bio=lambda df: df["liste_id_bio"].astype(str),
                 siren=lambda df: df["siret"].str[:9],
             )
             .loc[lambda df: df["statut_bio"] == "valide"]
@@ -184,7 +183,7 @@ class AgenceBioProcessor(DataProcessor):
         # Save to CSV
         for name, df in processed_data.items():
             file_path = f"{self.config.tmp_folder}/agence_bio_{name}.csv"
-            df.to_csv(file_path, index=False)
+            self.write_csv(df, file_path)
             logging.info(f"Saved {name} data to {file_path}")
 
         DataProcessor.push_unique_count(
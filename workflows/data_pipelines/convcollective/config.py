@@ -19,4 +19,9 @@ CONVENTION_COLLECTIVE_CONFIG = DataSourceConfig(
     url_minio=f"{MINIO_BASE_URL}convention_collective/latest/convention_collective.csv",
     url_minio_metadata=f"{MINIO_BASE_URL}convention_collective/latest/metadata.json",
     file_output=f"{DataSourceConfig.base_tmp_folder}/convention_collective/convention_collective.csv",
+    json_columns=[
+        "liste_idcc_etablissement",
+        "sirets_par_idcc",
+        "liste_idcc_unite_legale",
+    ],
 )
@@ -60,6 +60,6 @@ class ConventionCollectiveProcessor(DataProcessor):
             df_list_cc_per_siren, on="siren", how="left"
         ).merge(df_list_cc, on="siren", how="left")
 
-        df_cc.to_csv(self.config.file_output, index=False)
+        self.write_csv(df_cc, self.config.file_output)
 
         DataProcessor.push_unique_count(df_cc.siren, Notification.notification_xcom_key)
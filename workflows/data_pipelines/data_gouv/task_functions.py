@@ -7,7 +7,10 @@ import os
 import pandas as pd
 import json
 from dag_datalake_sirene.helpers.minio_helpers import minio_client
-from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_READ_ONLY_SCAN,
+    SqliteClient,
+)
 from dag_datalake_sirene.helpers.datagouv import post_resource
 from dag_datalake_sirene.workflows.data_pipelines.data_gouv.queries import (
     etab_fields_to_select,
@@ -16,21 +19,24 @@ from dag_datalake_sirene.workflows.data_pipelines.data_gouv.queries import (
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.data_enrichment import (
     create_list_names_elus,
     format_adresse_complete,
+)
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.data_enrichment_vectorized import (
+    convert_date_format,
+    format_departement,
     format_nom_complet,
     is_association,
     is_entrepreneur_individuel,
     is_ess,
     is_service_public,
-    format_departement,
+    sqlite_str_to_bool,
 )
 from dag_datalake_sirene.helpers.utils import (
+    log_cache_info,
     str_to_bool,
     str_to_list,
-    convert_date_format,
-    sqlite_str_to_bool,
 )
 from dag_datalake_sirene.helpers.geolocalisation import (
-    transform_coordinates,
+    transform_coordinates_batch,
 )
 from dag_datalake_sirene.helpers.tchap import send_message
 from dag_datalake_sirene.config import (
@@ -84,42 +90,34 @@ def process_ul_chunk(chunk):
     chunk["colter_elus"] = chunk["colter_elus"].apply(json.loads)
 
     # Generate 'nom_complet'
-    chunk["nom_complet"] = chunk.apply(
-        lambda row: format_nom_complet(
-            row["nom"], row["nom_usage"], row["nom_raison_sociale"], row["prenom"]
-        ),
-        axis=1,
+    chunk["nom_complet"] = format_nom_complet(
+        chunk["nom"], chunk["nom_usage"], chunk["nom_raison_sociale"], chunk["prenom"]
     )
 
     # Fill NA values in 'nombre_etablissements_ouverts'
     chunk["nombre_etablissements_ouverts"].fillna(0, inplace=True)
 
     # Apply transformation functions
-    chunk["est_entrepreneur_individuel"] = chunk["nature_juridique"].apply(
-        is_entrepreneur_individuel
+    chunk["est_entrepreneur_individuel"] = is_entrepreneur_individuel(
+        chunk["nature_juridique"]
     )
     chunk["liste_elus"] = chunk["colter_elus"].apply(create_list_names_elus)
 
-    chunk["est_association"] = chunk.apply(
-        lambda row: is_association(
-            row["nature_juridique"], row["identifiant_association"]
-        ),
-        axis=1,
+    chunk["est_association"] = is_association(
+        chunk["nature_juridique"], chunk["identifiant_association"]
     )
 
-    chunk["est_entrepreneur_spectacle"] = chunk["est_entrepreneur_spectacle"].apply(
-        sqlite_str_to_bool
+    chunk["est_entrepreneur_spectacle"] = sqlite_str_to_bool(
+        chunk["est_entrepreneur_spectacle"]
     )
 
-    chunk["est_ess"] = chunk.apply(
-        lambda row: is_ess(
-            sqlite_str_to_bool(row["est_ess_france"]), row["economie_sociale_solidaire"]
-        ),
-        axis=1,
+    chunk["est_ess"] = is_ess(
+        sqlite_str_to_bool(chunk["est_ess_france"]),
+        chunk["economie_sociale_solidaire"],
     )
 
-    chunk["egapro_renseignee"] = chunk["egapro_renseignee"].apply(sqlite_str_to_bool)
-    chunk["est_siae"] = chunk["est_siae"].apply(sqlite_str_to_bool)
+    chunk["egapro_renseignee"] = sqlite_str_to_bool(chunk["egapro_renseignee"])
+    chunk["est_siae"] = sqlite_str_to_bool(chunk["est_siae"])
 
     chunk["liste_id_organisme_formation"] = chunk["liste_id_organisme_formation"].apply(
         str_to_list
@@ -129,15 +127,13 @@ def process_ul_chunk(chunk):
         lambda x: bool(x)
     )
 
-    chunk["est_qualiopi"] = chunk["est_qualiopi"].apply(sqlite_str_to_bool)
+    chunk["est_qualiopi"] = sqlite_str_to_bool(chunk["est_qualiopi"])
     chunk["liste_idcc"] = chunk["liste_idcc"].apply(str_to_list)
 
-    chunk["date_mise_a_jour_rne"] = chunk["date_mise_a_jour_rne"].apply(
-        convert_date_format
-    )
+    chunk["date_mise_a_jour_rne"] = convert_date_format(chunk["date_mise_a_jour_rne"])
 
-    chunk["est_service_public"] = chunk.apply(
-        lambda row: is_service_public(row["nature_juridique"], row["siren"]), axis=1
+    chunk["est_service_public"] = is_service_public(
+        chunk["nature_juridique"], chunk["siren"]
     )
 
     return chunk
@@ -145,7 +141,9 @@ def process_ul_chunk(chunk):
 
 def fill_ul_file():
     chunk_size = 100000
-    sqlite_client = SqliteClient(AIRFLOW_DATAGOUV_DATA_DIR + "sirene.db")
+    sqlite_client = SqliteClient(
+        AIRFLOW_DATAGOUV_DATA_DIR + "sirene.db", profile=SQLITE_PROFILE_READ_ONLY_SCAN
+    )
 
     ul_csv_path = f"{AIRFLOW_DATAGOUV_DATA_DIR}unites_legales_{today_date}.csv"
 
@@ -248,14 +246,12 @@ def process_etablissement_chunk(chunk):
         ),
         axis=1,
     )
-    chunk["departement"] = chunk["commune"].apply(format_departement)
-    coordinates = chunk.apply(
-        lambda row: transform_coordinates(row["departement"], row["x"], row["y"]),
-        axis=1,
+    chunk["departement"] = format_departement(chunk["commune"])
+    chunk["latitude"], chunk["longitude"] = transform_coordinates_batch(
+        chunk["departement"], chunk["x"], chunk["y"]
     )
-    chunk["latitude"], chunk["longitude"] = zip(*coordinates)
     chunk["est_siege"] = chunk["est_siege"].apply(str_to_bool)
-    chunk["ancien_siege"] = chunk["ancien_siege"].apply(sqlite_str_to_bool)
+    chunk["ancien_siege"] = sqlite_str_to_bool(chunk["ancien_siege"])
     chunk["liste_idcc"] = chunk["liste_idcc"].apply(str_to_list)
     chunk["liste_rge"] = chunk["liste_rge"].apply(str_to_list)
     chunk["liste_uai"] = chunk["liste_uai"].apply(str_to_list)
@@ -267,7 +263,9 @@ def process_etablissement_chunk(chunk):
 
 def fill_etab_file():
     chunk_size = 100000
-    sqlite_client = SqliteClient(AIRFLOW_DATAGOUV_DATA_DIR + "sirene.db")
+    sqlite_client = SqliteClient(
+        AIRFLOW_DATAGOUV_DATA_DIR + "sirene.db", profile=SQLITE_PROFILE_READ_ONLY_SCAN
+    )
 
     etab_csv_path = f"{AIRFLOW_DATAGOUV_DATA_DIR}etablissements_{today_date}.csv"
 
@@ -307,6 +305,7 @@ def fill_etab_file():
                 etab_csv_path, mode="a", header=False, index=False, columns=columns
             )
 
+    log_cache_info(format_adresse_complete)
     sqlite_client.commit_and_close_conn()
 
 
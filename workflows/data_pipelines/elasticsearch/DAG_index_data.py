@@ -4,16 +4,18 @@ from airflow.models import DAG
 from airflow.operators.python import PythonOperator
 from airflow.operators.trigger_dagrun import TriggerDagRunOperator
 
-from dag_datalake_sirene.helpers.flush_cache import flush_cache
-
 # fmt: off
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.task_functions.\
     index import (
     get_next_index_name,
     check_elastic_index,
     create_elastic_index,
+    plan_siren_partitions,
     update_elastic_alias,
+    update_latest_indexing,
     fill_elastic_siren_index,
+    finalize_elastic_index,
+    invalidate_changed_documents_cache,
     delete_previous_elastic_indices,
 )
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.task_functions.\
@@ -42,10 +44,6 @@ from dag_datalake_sirene.config import (
     AIRFLOW_SNAPSHOT_DAG_NAME,
     AIRFLOW_DAG_FOLDER,
     EMAIL_LIST,
-    REDIS_HOST,
-    REDIS_PORT,
-    REDIS_DB,
-    REDIS_PASSWORD,
     API_IS_REMOTE,
 )
 from operators.clean_folder import CleanFolderOperator
@@ -100,12 +98,24 @@ with DAG(
         python_callable=create_elastic_index,
     )
 
+    plan_siren_partitions = PythonOperator(
+        task_id="plan_siren_partitions",
+        provide_context=True,
+        python_callable=plan_siren_partitions,
+    )
+
     fill_elastic_siren_index = PythonOperator(
         task_id="fill_elastic_siren_index",
         provide_context=True,
         python_callable=fill_elastic_siren_index,
     )
 
+    finalize_elastic_index = PythonOperator(
+        task_id="finalize_elastic_index",
+        provide_context=True,
+        python_callable=finalize_elastic_index,
+    )
+
     check_elastic_index = PythonOperator(
         task_id="check_elastic_index",
         provide_context=True,
@@ -118,6 +128,12 @@ with DAG(
         python_callable=update_elastic_alias,
     )
 
+    update_latest_indexing = PythonOperator(
+        task_id="update_latest_indexing",
+        provide_context=True,
+        python_callable=update_latest_indexing,
+    )
+
     create_sitemap = PythonOperator(
         task_id="create_sitemap",
         provide_context=True,
@@ -150,9 +166,12 @@ with DAG(
     get_latest_sqlite_database.set_upstream(clean_previous_folder)
 
     create_elastic_index.set_upstream(get_latest_sqlite_database)
-    fill_elastic_siren_index.set_upstream(create_elastic_index)
-    check_elastic_index.set_upstream(fill_elastic_siren_index)
+    plan_siren_partitions.set_upstream(get_latest_sqlite_database)
+    fill_elastic_siren_index.set_upstream([create_elastic_index, plan_siren_partitions])
+    finalize_elastic_index.set_upstream(fill_elastic_siren_index)
+    check_elastic_index.set_upstream(finalize_elastic_index)
     update_elastic_alias.set_upstream(check_elastic_index)
+    update_latest_indexing.set_upstream(update_elastic_alias)
 
     create_sitemap.set_upstream(update_elastic_alias)
     update_sitemap.set_upstream(create_sitemap)
@@ -174,19 +193,13 @@ with DAG(
         sync_data_source_updates.set_upstream(trigger_snapshot_dag)
         test_api.set_upstream(trigger_snapshot_dag)
 
-        clean_folder.set_upstream([test_api, update_sitemap])
+        clean_folder.set_upstream([test_api, update_sitemap, update_latest_indexing])
         send_notification_tchap.set_upstream([clean_folder, update_sitemap])
     else:
         flush_cache = PythonOperator(
             task_id="flush_cache",
             provide_context=True,
-            python_callable=flush_cache,
-            op_args=(
-                REDIS_HOST,
-                REDIS_PORT,
-                REDIS_DB,
-                REDIS_PASSWORD,
-            ),
+            python_callable=invalidate_changed_documents_cache,
         )
         clean_folder = CleanFolderOperator(
             task_id="clean_folder",
@@ -194,5 +207,5 @@ with DAG(
         )
         sync_data_source_updates.set_upstream(update_elastic_alias)
         test_api.set_upstream(sync_data_source_updates)
-        clean_folder.set_upstream([test_api, update_sitemap])
+        clean_folder.set_upstream([test_api, update_sitemap, update_latest_indexing])
         flush_cache.set_upstream(clean_folder)
@@ -0,0 +1,119 @@
+import logging
+import multiprocessing
+import threading
+
+
+class AdaptiveBulkController:
+    """
+    Adapt the size of the bulk requests and the number of concurrent requests to
+    the back-pressure of Elasticsearch.
+
+    The size (in bytes) grows while the mean latency of the last `window_size`
+    requests stays under `target_latency`, and shrinks when it gets too slow.
+    Rejected documents (HTTP 429, `es_rejected_execution_exception`) halve the size
+    and remove one concurrent request. Values always stay within the given bounds.
+
+    The size is shared with the worker processes building the bulk bodies through
+    `shared_max_bytes`, which must be created before the workers are forked.
+
+    Args:
+        min_bytes (int): Minimum size of a bulk request body.
+        max_bytes (int): Maximum size of a bulk request body.
+        min_concurrency (int): Minimum number of concurrent bulk requests.
+        max_concurrency (int): Maximum number of concurrent bulk requests.
+        target_latency (float): Latency (in seconds) aimed for a bulk request.
+        initial_bytes (int, optional): Starting size. Defaults to the middle of the
+            bounds.
+        initial_concurrency (int, optional): Starting number of concurrent
+            requests. Defaults to `min_concurrency`.
+        window_size (int, optional): Number of requests between two adjustments.
+    """
+
+    def __init__(
+        self,
+        min_bytes,
+        max_bytes,
+        min_concurrency,
+        max_concurrency,
+        target_latency,
+        initial_bytes=None,
+        initial_concurrency=None,
+        window_size=10,
+    ) -> None:
+        self.min_bytes = min_bytes
+        self.max_bytes = max_bytes
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max(min_concurrency, max_concurrency)
+        self.target_latency = target_latency
+        self.window_size = window_size
+
+        if initial_bytes is None:
+            initial_bytes = (min_bytes + max_bytes) // 2
+        self.shared_max_bytes = multiprocessing.get_context("fork").Value(
+            "i", min(max(initial_bytes, min_bytes), max_bytes), lock=False
+        )
+        self.concurrency = min(
+            max(initial_concurrency or min_concurrency, min_concurrency),
+            self.max_concurrency,
+        )
+
+        self.lock = threading.Lock()
+        self.window_latencies: list[float] = []
+        self.request_count = 0
+        self.rejected_request_count = 0
+        self.total_latency = 0.0
+
+    @property
+    def bulk_max_bytes(self):
+        return self.shared_max_bytes.value
+
+    def _set_bulk_max_bytes(self, bulk_max_bytes):
+        self.shared_max_bytes.value = min(
+            max(int(bulk_max_bytes), self.min_bytes), self.max_bytes
+        )
+
+    def record(self, success_count, rejected_count, latency) -> None:
+        """
+        Record the outcome of a bulk request and adjust the settings accordingly.
+        Called from the sender threads.
+        """
+        with self.lock:
+            self.request_count += 1
+            self.total_latency += latency
+            previous_settings = (self.bulk_max_bytes, self.concurrency)
+            if rejected_count > 0:
+                self.rejected_request_count += 1
+                self.window_latencies = []
+                self._set_bulk_max_bytes(self.bulk_max_bytes / 2)
+                self.concurrency = max(self.min_concurrency, self.concurrency - 1)
+            else:
+                self.window_latencies.append(latency)
+                if len(self.window_latencies) >= self.window_size:
+                    mean_latency = sum(self.window_latencies) / len(
+                        self.window_latencies
+                    )
+                    self.window_latencies = []
+                    if mean_latency > self.target_latency * 1.5:
+                        self._set_bulk_max_bytes(self.bulk_max_bytes * 0.8)
+                    elif mean_latency < self.target_latency:
+                        self._set_bulk_max_bytes(self.bulk_max_bytes * 1.25)
+                        self.concurrency = min(
+                            self.max_concurrency, self.concurrency + 1
+                        )
+            if (self.bulk_max_bytes, self.concurrency) != previous_settings:
+                logging.info(
+                    f"Bulk settings: {self.bulk_max_bytes} bytes, "
+                    f"{self.concurrency} concurrent requests "
+                    f"(latency {latency:.2f}s, {rejected_count} rejected)"
+                )
+
+    def get_stats(self) -> dict:
+        return {
+            "bulk_max_bytes": self.bulk_max_bytes,
+            "bulk_concurrency": self.concurrency,
+            "bulk_request_count": self.request_count,
+            "bulk_rejected_request_count": self.rejected_request_count,
+            "bulk_mean_latency": round(
+                self.total_latency / max(self.request_count, 1), 3
+            ),
+        }
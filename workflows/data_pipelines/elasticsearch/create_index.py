@@ -1,11 +1,27 @@
 import logging
+import time
 from typing import Optional
 from elasticsearch_dsl import Index, connections
 
+from dag_datalake_sirene.config import ELASTIC_REPLICAS
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.mapping_index import (
     StructureMapping,
 )
 
+# Index settings while documents are indexed : no replica to write, no refresh and
+# fewer translog fsyncs and flushes
+INGEST_SETTINGS = {
+    "number_of_replicas": 0,
+    "refresh_interval": -1,
+    "translog": {"durability": "async", "flush_threshold_size": "1gb"},
+}
+# Index settings once indexed, None resetting a setting to its default value
+SEARCH_SETTINGS = {
+    "number_of_replicas": ELASTIC_REPLICAS,
+    "refresh_interval": None,
+    "translog": {"durability": None, "flush_threshold_size": None},
+}
+
 
 class ElasticCreateIndex:
     """
@@ -20,6 +36,9 @@ class ElasticCreateIndex:
     :type elastic_user: str
     :param elastic_password: password for elasticsearch
     :type elastic_password: str
+    :param ingest_profile: create the index with the settings of `INGEST_SETTINGS`,
+        restored by `finalize` once indexed
+    :type ingest_profile: bool
     """
 
     def __init__(
@@ -30,6 +49,7 @@ class ElasticCreateIndex:
         elastic_user: Optional[str] = None,
         elastic_password: Optional[str] = None,
         elastic_bulk_size: Optional[int] = 1500,
+        ingest_profile: bool = False,
         **kwargs,
     ) -> None:
         self.elastic_url = elastic_url
@@ -37,6 +57,7 @@ class ElasticCreateIndex:
         self.elastic_user = elastic_user
         self.elastic_password = elastic_password
         self.elastic_bulk_size = elastic_bulk_size
+        self.ingest_profile = ingest_profile
 
         # initiate the default connection to elasticsearch
         connections.create_connection(
@@ -60,17 +81,93 @@ class ElasticCreateIndex:
         else:
             logging.info(f"Cluster status is functional: {self.elastic_status}")
 
-    def execute(self):
+    def execute(self, keep_existing=False):
+        """
+        Create the index with its mapping. An existing index with the same name is
+        deleted first, unless `keep_existing` is set (e.g. to resume its indexing).
+        """
         self.check_health()
 
         if not self.elastic_url:
             raise ValueError("Please provide elasticsearch url endpoint")
 
         # if self.elastic_index_shards is not None:
+        if keep_existing and Index(self.elastic_index).exists():
+            logging.info(f"Index {self.elastic_index} already exists! Keeping it.")
+            return
         if Index(self.elastic_index).exists():
             logging.info(f"Index  {self.elastic_index} already exists! Deleting...")
             Index(self.elastic_index).delete()
             logging.info(f"Index {self.elastic_index} deleted!")
         logging.info(f"Creating {self.elastic_index} index!")
         # Create the mapping in elasticsearch
-        StructureMapping.init(index=self.elastic_index)
+        index = StructureMapping._index.clone(name=self.elastic_index)
+        if self.ingest_profile:
+            index.settings(**INGEST_SETTINGS)
+        index.save()
+
+    def apply_ingest_profile(self):
+        """
+        Apply the settings of `INGEST_SETTINGS` to an existing index. Without the
+        ingest profile, only the refresh is disabled.
+        """
+        settings = INGEST_SETTINGS if self.ingest_profile else {"refresh_interval": -1}
+        self.elastic_connection.indices.put_settings(
+            index=self.elastic_index, body={"index": settings}
+        )
+        logging.info(f"Index {self.elastic_index} settings: {settings}")
+
+    def restore_settings(self):
+        settings = (
+            SEARCH_SETTINGS
+            if self.ingest_profile
+            else {"refresh_interval": SEARCH_SETTINGS["refresh_interval"]}
+        )
+        self.elastic_connection.indices.put_settings(
+            index=self.elastic_index, body={"index": settings}
+        )
+        logging.info(f"Index {self.elastic_index} settings restored: {settings}")
+
+    def finalize(self, max_num_segments=None, timeout="30m"):
+        """
+        Make the index ready to be searched once indexed : force merge it into
+        `max_num_segments` segments per shard (skipped if None), restore its search
+        settings and wait for it to be green. The search settings are restored
+        even if the force merge fails.
+        """
+        try:
+            if max_num_segments is not None:
+                start_time = time.monotonic()
+                self.elastic_connection.indices.forcemerge(
+                    index=self.elastic_index,
+                    max_num_segments=max_num_segments,
+                    request_timeout=6 * 3600,
+                )
+                logging.info(
+                    f"Index {self.elastic_index} merged into {max_num_segments} "
+                    f"segments in {time.monotonic() - start_time:.0f}s"
+                )
+        finally:
+            self.restore_settings()
+
+        start_time = time.monotonic()
+        self.elastic_connection.indices.refresh(index=self.elastic_index)
+        logging.info(
+            f"Index {self.elastic_index} refreshed in "
+            f"{time.monotonic() - start_time:.0f}s"
+        )
+
+        start_time = time.monotonic()
+        health = self.elastic_connection.cluster.health(
+            index=self.elastic_index,
+            wait_for_status="green",
+            timeout=timeout,
+            request_timeout=3600,
+        )
+        if health["status"] != "green":
+            raise Exception(
+                f"Index {self.elastic_index} is {health['status']} after {timeout}"
+            )
+        logging.info(
+            f"Index {self.elastic_index} green in {time.monotonic() - start_time:.0f}s"
+        )
@@ -1,5 +1,6 @@
 import json
 import logging
+from functools import lru_cache
 from slugify import slugify
 
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.clean_data import (
@@ -20,6 +21,7 @@ from dag_datalake_sirene.helpers.utils import (
 from dag_datalake_sirene.helpers.geolocalisation import (
     transform_coordinates,
 )
+from dag_datalake_sirene.config import FORMATTING_CACHE_SIZE
 
 labels_file_path = "dags/dag_datalake_sirene/helpers/labels/"
 
@@ -69,7 +71,14 @@ def get_nom_commercial(unite_legale):
 # Slug
 # Because we need to create sitemap and to ensure coherence
 # between sitemap values and slug in API. We calculate this field
-# with this function and we add it both in elasticsearch and in sitemap
+# with this function once in the ETL, and it is read both by elasticsearch and
+# by the sitemap
+
+
+# Names often repeat, unlike the SIREN appended to them
+@lru_cache(maxsize=FORMATTING_CACHE_SIZE)
+def slugify_name(name):
+    return slugify(name)
 
 
 def format_slug(
@@ -116,15 +125,14 @@ def format_slug(
         if denomination_usuelle:
             slug_parts.append(denomination_usuelle)
 
-    # Add sigle and siren if they exist
+    # Add sigle if it exists
     if sigle:
         slug_parts.append(sigle)
-    if siren:
-        slug_parts.append(siren)
 
-    # Join parts to form the full name, and slugify it
+    # Join parts to form the full name, and slugify it along with the siren, made
+    # of digits only, which slugify leaves as is
     full_name = " ".join(filter(None, slug_parts)).lower()
-    return slugify(full_name) if full_name else ""
+    return "-".join(filter(None, [slugify_name(full_name) if full_name else "", siren]))
 
 
 # Noms
@@ -248,6 +256,8 @@ def map_categorie_to_number(categorie):
 
 
 # Adresse complète
+# Établissements often share their address
+@lru_cache(maxsize=FORMATTING_CACHE_SIZE)
 def format_adresse_complete(
     complement_adresse,
     numero_voie,
@@ -395,7 +405,7 @@ def format_personnes_physiques(list_personnes_physiques_sqlite, list_all_personn
             personnes_physiques_processed
         )
 
-    return personnes_physiques_processed, list(set(list_all_personnes))
+    return personnes_physiques_processed, sorted(set(list_all_personnes))
 
 
 # Dirigeants PM
@@ -429,7 +439,7 @@ def format_dirigeants_pm(list_dirigeants_pm_sqlite, list_all_dirigeants=[]):
         # (eg. same name, and fistname, different date or qualities)
         dirigeants_pm_processed = drop_duplicates_dirigeants_pm(dirigeants_pm_processed)
 
-    return dirigeants_pm_processed, list(set(list_all_dirigeants))
+    return dirigeants_pm_processed, sorted(set(list_all_dirigeants))
 
 
 # Élus
@@ -438,17 +448,69 @@ def create_list_names_elus(list_elus):
     for elu in list_elus:
         name_elu = f"{elu['nom']} {elu['prenom']}"
         list_elus_names.append(name_elu)
-    return list(set(list_elus_names))
+    return sorted(set(list_elus_names))
 
 
 # Etablissements
-def format_etablissements_and_complements(
-    list_etablissements_sqlite,
-    nom_complet,
-    is_non_diffusible=False,
-):
-    etablissements = json.loads(list_etablissements_sqlite)
-    etablissements_processed = []
+def format_etablissement(etablissement, is_non_diffusible=False):
+    """
+    Format an établissement read from SQLite, except its `nom_complet` which is
+    the one of its unité légale.
+    """
+    etablissement["adresse"] = format_adresse_complete(
+        etablissement["complement_adresse"],
+        etablissement["numero_voie"],
+        etablissement["indice_repetition"],
+        etablissement["type_voie"],
+        etablissement["libelle_voie"],
+        etablissement["libelle_commune"],
+        etablissement["libelle_cedex"],
+        etablissement["distribution_speciale"],
+        etablissement["code_postal"],
+        etablissement["cedex"],
+        etablissement["commune"],
+        etablissement["libelle_commune_etranger"],
+        etablissement["libelle_pays_etranger"],
+        is_non_diffusible,
+    )
+    etablissement["concat_enseigne_adresse_siren_siret"] = (
+        get_empty_string_if_none(etablissement["enseigne_1"])
+        + " "
+        + get_empty_string_if_none(etablissement["enseigne_2"])
+        + " "
+        + get_empty_string_if_none(etablissement["enseigne_3"])
+        + " "
+        + get_empty_string_if_none(etablissement["adresse"])
+        + " "
+        + get_empty_string_if_none(etablissement["siren"])
+        + " "
+        + get_empty_string_if_none(etablissement["siret"])
+    ).strip()
+    etablissement["departement"] = format_departement(etablissement["commune"])
+    etablissement["region"] = label_region_from_departement(
+        etablissement["departement"]
+    )
+    if etablissement["latitude"] is None or etablissement["longitude"] is None:
+        etablissement["latitude"], etablissement["longitude"] = transform_coordinates(
+            etablissement["departement"],
+            etablissement["x"],
+            etablissement["y"],
+        )
+    etablissement["ancien_siege"] = sqlite_str_to_bool(etablissement["ancien_siege"])
+    etablissement["coordonnees"] = format_coordonnees(
+        etablissement["longitude"], etablissement["latitude"]
+    )
+    etablissement["epci"] = label_epci_from_commune(etablissement["commune"])
+    etablissement["est_siege"] = str_to_bool(etablissement["est_siege"])
+    etablissement["liste_idcc"] = str_to_list(etablissement["liste_idcc"])
+    etablissement["liste_rge"] = str_to_list(etablissement["liste_rge"])
+    etablissement["liste_uai"] = str_to_list(etablissement["liste_uai"])
+    etablissement["liste_finess"] = str_to_list(etablissement["liste_finess"])
+    etablissement["liste_id_bio"] = str_to_list(etablissement["liste_id_bio"])
+    return etablissement
+
+
+def get_etablissements_complements(etablissements):
     complements = {
         "est_uai": False,
         "est_rge": False,
@@ -458,64 +520,6 @@ def format_etablissements_and_complements(
         "convention_collective_renseignee": False,
     }
     for etablissement in etablissements:
-        etablissement["nom_complet"] = nom_complet
-        etablissement["adresse"] = format_adresse_complete(
-            etablissement["complement_adresse"],
-            etablissement["numero_voie"],
-            etablissement["indice_repetition"],
-            etablissement["type_voie"],
-            etablissement["libelle_voie"],
-            etablissement["libelle_commune"],
-            etablissement["libelle_cedex"],
-            etablissement["distribution_speciale"],
-            etablissement["code_postal"],
-            etablissement["cedex"],
-            etablissement["commune"],
-            etablissement["libelle_commune_etranger"],
-            etablissement["libelle_pays_etranger"],
-            is_non_diffusible,
-        )
-        etablissement["concat_enseigne_adresse_siren_siret"] = (
-            get_empty_string_if_none(etablissement["enseigne_1"])
-            + " "
-            + get_empty_string_if_none(etablissement["enseigne_2"])
-            + " "
-            + get_empty_string_if_none(etablissement["enseigne_3"])
-            + " "
-            + get_empty_string_if_none(etablissement["adresse"])
-            + " "
-            + get_empty_string_if_none(etablissement["siren"])
-            + " "
-            + get_empty_string_if_none(etablissement["siret"])
-        ).strip()
-        etablissement["departement"] = format_departement(etablissement["commune"])
-        etablissement["region"] = label_region_from_departement(
-            etablissement["departement"]
-        )
-        if etablissement["latitude"] is None or etablissement["longitude"] is None:
-            etablissement["latitude"], etablissement["longitude"] = (
-                transform_coordinates(
-                    etablissement["departement"],
-                    etablissement["x"],
-                    etablissement["y"],
-                )
-            )
-        etablissement["ancien_siege"] = sqlite_str_to_bool(
-            etablissement["ancien_siege"]
-        )
-        etablissement["coordonnees"] = format_coordonnees(
-            etablissement["longitude"], etablissement["latitude"]
-        )
-        etablissement["epci"] = label_epci_from_commune(etablissement["commune"])
-        etablissement["est_siege"] = str_to_bool(etablissement["est_siege"])
-        etablissement["liste_idcc"] = str_to_list(etablissement["liste_idcc"])
-        etablissement["liste_rge"] = str_to_list(etablissement["liste_rge"])
-        etablissement["liste_uai"] = str_to_list(etablissement["liste_uai"])
-        etablissement["liste_finess"] = str_to_list(etablissement["liste_finess"])
-        etablissement["liste_id_bio"] = str_to_list(etablissement["liste_id_bio"])
-        etablissements_processed.append(etablissement)
-
-        # Get complements
         for field in [
             "liste_finess",
             "liste_id_bio",
@@ -525,8 +529,37 @@ def format_etablissements_and_complements(
         ]:
             if etablissement[field]:
                 complements[get_elasticsearch_field_name(field)] = True
+    return complements
+
 
-    return etablissements_processed, complements
+def format_etablissements_and_complements(
+    list_etablissements_sqlite,
+    nom_complet,
+    is_non_diffusible=False,
+):
+    etablissements = json.loads(list_etablissements_sqlite)
+    etablissements_processed = []
+    for etablissement in etablissements:
+        etablissement["nom_complet"] = nom_complet
+        etablissements_processed.append(
+            format_etablissement(etablissement, is_non_diffusible)
+        )
+    return etablissements_processed, get_etablissements_complements(
+        etablissements_processed
+    )
+
+
+def load_formatted_etablissements(etablissements, complements, nom_complet):
+    """
+    Établissements and complements of an unité légale formatted during the ETL
+    (see `format_etablissement`), as JSON.
+    """
+    etablissements = json.loads(etablissements) if etablissements else []
+    for etablissement in etablissements:
+        etablissement["nom_complet"] = nom_complet
+    if complements:
+        return etablissements, json.loads(complements)
+    return etablissements, get_etablissements_complements(etablissements)
 
 
 # Siege
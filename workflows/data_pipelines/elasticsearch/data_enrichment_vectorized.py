@@ -0,0 +1,144 @@
+import numpy as np
+import pandas as pd
+
+from dag_datalake_sirene.helpers import utils
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch import data_enrichment
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.data_enrichment import (
+    service_public_blacklist,
+    service_public_whitelist,
+)
+
+# Columnar versions of the functions of `data_enrichment`, computing a field for a
+# whole batch of unités légales or établissements at once. The functions of
+# `data_enrichment` remain the reference : for each row, a function returns what
+# its namesake returns.
+#
+# Most fields only depend on low cardinality columns (nature juridique, activité,
+# commune...) : the reference function is then called once per distinct value, and
+# its results mapped back to the rows.
+#
+# Meant for large batches, such as the chunks of the data.gouv files : on the
+# batches of the indexing, the overhead of pandas outweighs what it saves.
+
+
+def to_object(column: pd.Series) -> pd.Series:
+    """Column as Python objects, missing values (None or NaN) being None."""
+    column = column.astype(object)
+    return column.where(column.notna(), None)
+
+
+def map_distinct(function, column: pd.Series) -> pd.Series:
+    """
+    Call `function` once per distinct value of the column, missing values (None or
+    NaN) being passed as None, and map its results back to the rows.
+    """
+    codes, uniques = pd.factorize(column)
+    results = np.empty(len(uniques) + 1, dtype=object)
+    for code, value in enumerate(uniques):
+        results[code] = function(value)
+    # Missing values have the code -1, i.e. the last result
+    results[-1] = function(None)
+    return pd.Series(results[codes], index=column.index, dtype=object)
+
+
+def is_set(column: pd.Series) -> pd.Series:
+    """Whether the values of a column of strings are neither missing nor empty."""
+    return column.notna() & (column != "")
+
+
+def sqlite_str_to_bool(column: pd.Series) -> pd.Series:
+    return map_distinct(utils.sqlite_str_to_bool, column).astype(bool)
+
+
+def convert_date_format(column: pd.Series) -> pd.Series:
+    return map_distinct(utils.convert_date_format, column)
+
+
+# Nom complet
+def format_nom_complet(
+    nom: pd.Series,
+    nom_usage: pd.Series,
+    nom_raison_sociale: pd.Series,
+    prenom: pd.Series,
+) -> pd.Series:
+    # Names have no small set of distinct values, and string operations on columns
+    # of Python objects loop over the rows anyway : calling the reference once per
+    # row is faster than combining columns with them
+    return pd.Series(
+        [
+            data_enrichment.format_nom_complet(*names)
+            for names in zip(
+                *(
+                    to_object(column)
+                    for column in (nom, nom_usage, nom_raison_sociale, prenom)
+                )
+            )
+        ],
+        index=nom.index,
+        dtype=object,
+    )
+
+
+# Entrepreneur individuel
+def is_entrepreneur_individuel(nature_juridique_unite_legale: pd.Series) -> pd.Series:
+    return map_distinct(
+        data_enrichment.is_entrepreneur_individuel, nature_juridique_unite_legale
+    ).astype(bool)
+
+
+# ESS
+def is_ess(est_ess_france: pd.Series, ess_insee: pd.Series) -> pd.Series:
+    return est_ess_france.astype(bool) | map_distinct(
+        lambda value: data_enrichment.is_ess(False, value), ess_insee
+    ).astype(bool)
+
+
+# Service public
+def is_service_public(
+    nature_juridique_unite_legale: pd.Series, siren: pd.Series
+) -> pd.Series:
+    # None is neither in the whitelist nor in the blacklist
+    is_public = map_distinct(
+        lambda value: data_enrichment.is_service_public(value, None),
+        nature_juridique_unite_legale,
+    ).astype(bool) | siren.isin(service_public_whitelist)
+    return is_public & ~siren.isin(service_public_blacklist)
+
+
+# Association
+def is_association(
+    nature_juridique_unite_legale: pd.Series, identifiant_association: pd.Series
+) -> pd.Series:
+    return is_set(identifiant_association) | map_distinct(
+        lambda value: data_enrichment.is_association(value, None),
+        nature_juridique_unite_legale,
+    ).astype(bool)
+
+
+# Section activité principale
+def label_section_from_activite(
+    activite_principale_unite_legale: pd.Series,
+) -> pd.Series:
+    return map_distinct(
+        data_enrichment.label_section_from_activite, activite_principale_unite_legale
+    )
+
+
+# Région
+def label_region_from_departement(departement: pd.Series) -> pd.Series:
+    return map_distinct(data_enrichment.label_region_from_departement, departement)
+
+
+# EPCI
+def label_epci_from_commune(commune: pd.Series) -> pd.Series:
+    return map_distinct(data_enrichment.label_epci_from_commune, commune)
+
+
+# Categorie entreprise
+def map_categorie_to_number(categorie: pd.Series) -> pd.Series:
+    return map_distinct(data_enrichment.map_categorie_to_number, categorie)
+
+
+# Département
+def format_departement(commune: pd.Series) -> pd.Series:
+    return map_distinct(data_enrichment.format_departement, commune)
@@ -0,0 +1,42 @@
+import gzip
+import json
+import logging
+import os
+import threading
+from typing import Optional, TextIO
+
+
+class DeadLetterWriter:
+    """
+    Write the documents Elasticsearch failed to index to a gzipped NDJSON file, one
+    line per document with its id, error type and reason.
+
+    The file is only created with the first failed document, a previous file at
+    `location` being removed. Thread-safe.
+    """
+
+    def __init__(self, location) -> None:
+        self.location = location
+        self.lock = threading.Lock()
+        self.file: Optional[TextIO] = None
+        self.count = 0
+        if os.path.exists(location):
+            os.remove(location)
+
+    def write(self, failed_documents) -> None:
+        if not failed_documents:
+            return
+        with self.lock:
+            if self.file is None:
+                self.file = gzip.open(self.location, "wt", encoding="utf-8")
+            for failed_document in failed_documents:
+                self.file.write(json.dumps(failed_document, ensure_ascii=False) + "\n")
+            self.count += len(failed_documents)
+
+    def close(self) -> None:
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+        if self.count > 0:
+            logging.warning(f"{self.count} failed documents written to {self.location}")
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import logging
+
+from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+
+# Fields of the documents which change at each indexing, left out of their hash
+VOLATILE_UNITE_LEGALE_FIELDS = ("date_mise_a_jour",)
+# Hash saved for the documents which failed to be indexed, so that they are rebuilt
+FAILED_DOCUMENT_HASH = 0
+
+create_document_hash_table_query = """CREATE TABLE IF NOT EXISTS document_hash (
+            siren INTEGER PRIMARY KEY,
+            hash INTEGER NOT NULL
+            )"""
+
+create_changed_siren_table_query = """CREATE TABLE IF NOT EXISTS changed_siren (
+            siren INTEGER PRIMARY KEY
+            )"""
+
+
+def compute_document_hash(document):
+    """
+    Stable hash of a document built by `process_unites_legales`, as a signed 64 bits
+    integer so that it is stored compactly by SQLite.
+    """
+    unite_legale = {
+        key: value
+        for key, value in document["unite_legale"].items()
+        if key not in VOLATILE_UNITE_LEGALE_FIELDS
+    }
+    content = json.dumps(
+        {**document, "unite_legale": unite_legale},
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    digest = hashlib.blake2b(content.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+def load_document_hashes(sqlite_client, siren_range, database="previous_hash"):
+    """
+    Hashes of the documents of a SIREN range, read from the `document_hash` table of
+    the attached `database`.
+
+    Returns:
+        dict[str, int]: hash of each SIREN.
+    """
+    start, end = siren_range
+    rows = sqlite_client.execute(
+        f"SELECT siren, hash FROM {database}.document_hash "
+        "WHERE siren BETWEEN ? AND ?",
+        (int(start), int(end)),
+    ).fetchall()
+    return {f"{siren:09d}": document_hash for siren, document_hash in rows}
+
+
+def save_document_hashes(sqlite_client, document_hashes, changed_sirens):
+    sqlite_client.execute_many(
+        "INSERT OR REPLACE INTO document_hash (siren, hash) VALUES (?, ?)",
+        [(int(siren), document_hash) for siren, document_hash in document_hashes],
+    )
+    sqlite_client.execute_many(
+        "INSERT OR IGNORE INTO changed_siren (siren) VALUES (?)",
+        [(int(siren),) for siren in changed_sirens],
+    )
+    sqlite_client.db_conn.commit()
+
+
+def finalize_document_hashes(db_location, previous_db_location, sirene_db_location):
+    """
+    Complete the document hashes of `db_location` with the hashes of the documents
+    which were not rebuilt, and flag the removed unités légales as changed.
+
+    Returns:
+        int: number of changed SIRENs.
+    """
+    with SqliteClient(db_location) as sqlite_client:
+        sqlite_client.connect_to_another_db(sirene_db_location, "sirene")
+        if previous_db_location is not None:
+            sqlite_client.connect_to_another_db(previous_db_location, "previous_hash")
+            sqlite_client.execute(
+                """INSERT OR IGNORE INTO document_hash (siren, hash)
+                SELECT siren, hash FROM previous_hash.document_hash"""
+            )
+        sqlite_client.execute(
+            """INSERT OR IGNORE INTO changed_siren (siren)
+            SELECT siren FROM document_hash
+            WHERE printf('%09d', siren) NOT IN (SELECT siren FROM sirene.unite_legale)
+            """
+        )
+        sqlite_client.execute(
+            """DELETE FROM document_hash
+            WHERE siren IN (SELECT siren FROM changed_siren)
+            AND printf('%09d', siren) NOT IN (SELECT siren FROM sirene.unite_legale)
+            """
+        )
+        changed_siren_count = sqlite_client.get_table_count("changed_siren")
+    logging.info(f"{changed_siren_count} documents changed since the last indexing")
+    return changed_siren_count
+
+
+def get_changed_sirens(db_location):
+    with SqliteClient(db_location) as sqlite_client:
+        return [
+            f"{siren:09d}"
+            for (siren,) in sqlite_client.execute(
+                "SELECT siren FROM changed_siren ORDER BY siren"
+            ).fetchall()
+        ]
@@ -0,0 +1,83 @@
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+
+
+@dataclass
+class IndexingCheckpoint:
+    """
+    Progress of the indexing of a siren index, persisted on MinIO so that an
+    interrupted indexing can resume where it stopped instead of starting from zero.
+
+    Attributes:
+        elastic_index (str): Name of the index being filled.
+        sirene_database_date (str | None): Date of the sirene database being indexed.
+            Indexed ranges are only reused when indexing the same database.
+        siren_ranges (list[list[str]]): SIREN ranges planned for this index.
+        indexed_ranges (list[list[str]]): SIREN ranges fully acknowledged by
+            Elasticsearch.
+        doc_count (int): Number of documents indexed in `indexed_ranges`.
+        is_complete (bool): True once every range has been indexed.
+        updated_at (str | None): Date of the last update of the checkpoint.
+    """
+
+    elastic_index: str
+    sirene_database_date: str | None = None
+    siren_ranges: list[list[str]] = field(default_factory=list)
+    indexed_ranges: list[list[str]] = field(default_factory=list)
+    doc_count: int = 0
+    is_complete: bool = False
+    updated_at: str | None = None
+
+    filename = "checkpoint.json"
+
+    @classmethod
+    def load(cls, filesystem) -> "IndexingCheckpoint | None":
+        content = filesystem.read(cls.filename)
+        if not content:
+            return None
+        return cls(**content)
+
+    def save(self, filesystem) -> None:
+        self.updated_at = datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+        filesystem.write(
+            self.filename,
+            {
+                "elastic_index": self.elastic_index,
+                "sirene_database_date": self.sirene_database_date,
+                "siren_ranges": self.siren_ranges,
+                "indexed_ranges": self.indexed_ranges,
+                "doc_count": self.doc_count,
+                "is_complete": self.is_complete,
+                "updated_at": self.updated_at,
+            },
+        )
+
+    def can_resume(self, elastic_index, sirene_database_date) -> bool:
+        if self.is_complete or self.elastic_index != elastic_index:
+            return False
+        if self.sirene_database_date != sirene_database_date:
+            logging.warning(
+                f"Checkpoint of {elastic_index} was made on the database of "
+                f"{self.sirene_database_date}, not {sirene_database_date}: "
+                "the indexing starts over."
+            )
+            return False
+        return True
+
+    def get_ranges_to_index(self) -> list[list[str]]:
+        indexed_ranges = {tuple(siren_range) for siren_range in self.indexed_ranges}
+        return [
+            siren_range
+            for siren_range in self.siren_ranges
+            if tuple(siren_range) not in indexed_ranges
+        ]
+
+    def mark_range_indexed(self, filesystem, siren_range, doc_count) -> None:
+        self.indexed_ranges.append(list(siren_range))
+        self.doc_count += doc_count
+        self.save(filesystem)
+        logging.info(
+            f"Checkpoint: {len(self.indexed_ranges)}/{len(self.siren_ranges)} SIREN "
+            f"ranges indexed ({self.doc_count} documents)"
+        )
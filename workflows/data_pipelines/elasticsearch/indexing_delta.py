@@ -0,0 +1,174 @@
+import logging
+
+# Tables of the sirene database used to build the documents, which are not tracked
+# by an update date, with the expression giving the SIREN of each of their rows
+AUXILIARY_TABLES_SIREN = {
+    "ancien_siege": "substr(siret, 1, 9)",
+    "agence_bio": "substr(siret, 1, 9)",
+    "beneficiaire": "siren",
+    "bilan_financier": "siren",
+    "colter": "siren",
+    "convention_collective": "siren",
+    "count_etablissement": "siren",
+    "count_etablissement_ouvert": "siren",
+    "dirigeant_pm": "siren",
+    "dirigeant_pp": "siren",
+    "egapro": "siren",
+    "elus": "siren",
+    "ess_france": "siren",
+    "finess": "substr(siret, 1, 9)",
+    "immatriculation": "siren",
+    "marche_inclusion": "siren",
+    "organisme_formation": "siren",
+    "rge": "substr(siret, 1, 9)",
+    "spectacle": "siren",
+    "uai": "substr(siret, 1, 9)",
+}
+
+# Tables updated by the SIRENE and RNE flux, with their update dates
+DATED_TABLES = ("unite_legale", "etablissement")
+
+DELETE_BATCH_SIZE = 1000
+
+
+def get_table_columns(sqlite_client, database, table):
+    return [
+        row[1]
+        for row in sqlite_client.execute(
+            f"PRAGMA {database}.table_info({table})"
+        ).fetchall()
+    ]
+
+
+def compute_changed_sirens(sqlite_client, previous_db_location):
+    """
+    Fill the `delta_siren` table of the database with the SIRENs whose documents
+    differ from the ones built from the database at `previous_db_location`:
+
+    - unités légales and établissements updated since the previous database,
+      according to `date_mise_a_jour_insee` and `date_mise_a_jour_rne`,
+    - unités légales created or removed since the previous database,
+    - SIRENs whose rows changed in any auxiliary table.
+
+    Returns:
+        int: number of SIRENs to reindex or delete.
+    """
+    sqlite_client.connect_to_another_db(previous_db_location, "previous")
+    sqlite_client.drop_table("delta_siren")
+    sqlite_client.execute("CREATE TABLE delta_siren (siren TEXT PRIMARY KEY)")
+    insert_query = "INSERT OR IGNORE INTO delta_siren (siren) "
+
+    for table in DATED_TABLES:
+        for date_column in ("date_mise_a_jour_insee", "date_mise_a_jour_rne"):
+            sqlite_client.execute(
+                f"""{insert_query}
+                SELECT siren FROM main.{table}
+                WHERE {date_column} >= (
+                    SELECT MAX({date_column}) FROM previous.{table}
+                )"""
+            )
+    sqlite_client.execute(
+        f"""{insert_query}
+        SELECT siren FROM main.unite_legale
+        EXCEPT SELECT siren FROM previous.unite_legale"""
+    )
+    sqlite_client.execute(
+        f"""{insert_query}
+        SELECT siren FROM previous.unite_legale
+        EXCEPT SELECT siren FROM main.unite_legale"""
+    )
+
+    for table, siren_expression in AUXILIARY_TABLES_SIREN.items():
+        columns = get_table_columns(sqlite_client, "main", table)
+        previous_columns = get_table_columns(sqlite_client, "previous", table)
+        if not columns and not previous_columns:
+            continue
+        if columns != previous_columns:
+            # The rows can not be compared : every SIREN of the table is reindexed
+            logging.warning(f"Schema of table {table} changed since last indexing")
+            for database, database_columns in (
+                ("main", columns),
+                ("previous", previous_columns),
+            ):
+                if database_columns:
+                    sqlite_client.execute(
+                        f"{insert_query} SELECT {siren_expression} "
+                        f"FROM {database}.{table}"
+                    )
+            continue
+        sqlite_client.execute(
+            f"""{insert_query}
+            SELECT {siren_expression} FROM (
+                SELECT * FROM main.{table} EXCEPT SELECT * FROM previous.{table}
+            )
+            UNION
+            SELECT {siren_expression} FROM (
+                SELECT * FROM previous.{table} EXCEPT SELECT * FROM main.{table}
+            )"""
+        )
+
+    sqlite_client.execute("DELETE FROM delta_siren WHERE siren IS NULL")
+    sqlite_client.db_conn.commit()
+    sqlite_client.detach_database("previous")
+    changed_siren_count = sqlite_client.get_table_count("delta_siren")
+    logging.info(f"{changed_siren_count} SIRENs changed since the previous database")
+    return changed_siren_count
+
+
+def get_expected_document_ids(siren, etablissements_count):
+    """
+    Ids of the documents of an unité légale, as built by `doc_unite_legale_generator`:
+    one document per group of 100 établissements.
+    """
+    document_count = max(1, -(-(etablissements_count or 0) // 100))
+    return [f"{siren}-{100 * (index + 1)}" for index in range(document_count)]
+
+
+def delete_stale_documents(sqlite_client, elastic_connection, elastic_index):
+    """
+    Delete the documents of the SIRENs of `delta_siren` that are no longer built
+    from the database : removed unités légales, and extra documents of unités
+    légales which lost établissements.
+
+    Returns:
+        int: number of documents deleted.
+    """
+    cursor = sqlite_client.execute(
+        """SELECT ds.siren, ul.siren IS NOT NULL, ce.count
+        FROM delta_siren ds
+        LEFT JOIN count_etablissement ce ON ce.siren = ds.siren
+        LEFT JOIN unite_legale ul ON ul.siren = ds.siren
+        ORDER BY ds.siren"""
+    )
+    deleted_count = 0
+    while True:
+        rows = cursor.fetchmany(DELETE_BATCH_SIZE)
+        if not rows:
+            break
+        # Removed unités légales have no document left
+        expected_ids = [
+            document_id
+            for siren, is_indexed, etablissements_count in rows
+            if is_indexed
+            for document_id in get_expected_document_ids(siren, etablissements_count)
+        ]
+        response = elastic_connection.delete_by_query(
+            index=elastic_index,
+            body={
+                "query": {
+                    "bool": {
+                        "filter": [
+                            {"terms": {"identifiant": [row[0] for row in rows]}}
+                        ],
+                        "must_not": [{"ids": {"values": expected_ids}}],
+                    }
+                }
+            },
+            params={"conflicts": "proceed"},
+        )
+        deleted_count += response.get("deleted", 0)
+    # A single refresh once every batch is deleted, rather than one per batch
+    if deleted_count > 0:
+        elastic_connection.indices.refresh(index=elastic_index)
+    logging.info(f"{deleted_count} stale documents deleted from {elastic_index}")
+    return deleted_count
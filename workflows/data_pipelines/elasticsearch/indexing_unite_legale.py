@@ -1,18 +1,123 @@
+import json
 import logging
+import multiprocessing
+import os
+import queue
 import time
-from elasticsearch.helpers import parallel_bulk
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from elasticsearch.serializer import JSONSerializer
+from elasticsearch_dsl import Object
 
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_READ_ONLY_SCAN,
+    SqliteClient,
+)
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.bulk_controller import (
+    AdaptiveBulkController,
+)
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.dead_letter import (
+    DeadLetterWriter,
+)
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.document_hash import (
+    FAILED_DOCUMENT_HASH,
+    compute_document_hash,
+    create_changed_siren_table_query,
+    create_document_hash_table_query,
+    load_document_hashes,
+    save_document_hashes,
+)
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.mapping_index import (
     StructureMapping,
 )
 
 # fmt: off
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch\
-    .process_unites_legales import process_unites_legales
+    .process_unites_legales import get_date_mise_a_jour, process_unites_legales
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.sqlite.\
+    fields_to_index import (
+    select_changed_fields_to_index_by_siren_range_query,
+    select_changed_siren_prefix_weights_query,
+    select_fields_to_index_by_siren_range_query,
+    select_siren_prefix_weights_query,
+)
 # fmt: on
 
+# Messages sent by the worker processes to the sender
+BULK_BODY = "bulk_body"
+PARTITION_DONE = "partition_done"
+PARTITION_FAILED = "partition_failed"
+
+# Size of the bulk request bodies when it is not adapted to the cluster load
+DEFAULT_BULK_MAX_BYTES = 10 * 1024 * 1024
+
+# Seconds without any message from the workers after which the SIREN ranges being
+# built are checked, in case their worker process died without reporting it
+PARTITION_CHECK_INTERVAL = 60
 
-def doc_unite_legale_generator(data, elastic_index):
+# Failures of a bulk request, or of a document, which may succeed once retried
+RETRYABLE_STATUSES = (429, 502, 503, 504)
+RETRYABLE_ERROR_TYPES = ("es_rejected_execution_exception",)
+
+# Values left out of the documents by `StructureMapping.to_dict`
+EMPTY_VALUES: tuple = ([], {}, None)
+
+# State of each worker process, set once by the pool initializer
+worker_context = {}
+
+
+def check_fast_serialization_mapping():
+    """
+    The fast serialization builds the documents from plain dicts instead of
+    `StructureMapping(**document).to_dict(include_meta=True)`, which only drops the
+    empty values as long as no top-level field of the mapping converts its value
+    (`Object` fields keep plain dicts as is).
+
+    Raises:
+        ValueError: if a top-level field of the mapping converts its value.
+    """
+    mapping = StructureMapping._doc_type.mapping
+    for field_name in mapping:
+        field = mapping[field_name]
+        if field._coerce and not isinstance(field, Object):
+            raise ValueError(
+                f"Field {field_name} ({type(field).__name__}) is converted by "
+                "StructureMapping: the fast serialization can not be used."
+            )
+
+
+def build_document(document, elastic_index, document_id, fast_serialization=False):
+    if fast_serialization:
+        return {
+            "_id": document_id,
+            "_index": elastic_index,
+            "_source": {
+                key: value
+                for key, value in document.items()
+                if value not in EMPTY_VALUES
+            },
+        }
+    return StructureMapping(
+        meta={"index": elastic_index, "id": document_id},
+        **document,
+    ).to_dict(include_meta=True)
+
+
+def get_bulk_serializer(fast_serialization=False):
+    """
+    Returns:
+        Callable[[dict], bytes]: the function serializing the bulk body lines, with
+        orjson for the fast serialization, with the serializer of the elasticsearch
+        client otherwise.
+    """
+    serializer = JSONSerializer()
+    if fast_serialization:
+        import orjson
+
+        return lambda data: orjson.dumps(data, default=serializer.default)
+    return lambda data: serializer.dumps(data).encode("utf-8")
+
+
+def doc_unite_legale_generator(data, elastic_index, fast_serialization=False):
     # Serialize the instance into a dictionary so that it can be saved in elasticsearch.
     for index, document in enumerate(data):
         etablissements_count = len(document["unite_legale"]["etablissements"])
@@ -34,90 +139,565 @@ def doc_unite_legale_generator(data, elastic_index):
                 ]
                 etablissements_left = etablissements_left - 100
                 etablissements_indexed += 100
-                yield StructureMapping(
-                    meta={
-                        "index": elastic_index,
-                        "id": f"{smaller_document['identifiant']}-"
-                        f"{etablissements_indexed}",
-                    },
-                    **smaller_document,
-                ).to_dict(include_meta=True)
+                yield build_document(
+                    smaller_document,
+                    elastic_index,
+                    f"{smaller_document['identifiant']}-{etablissements_indexed}",
+                    fast_serialization,
+                )
         # Otherwise, (the document has less than 100 établissements), index document
         # as is
         else:
-            yield StructureMapping(
-                meta={
-                    "index": elastic_index,
-                    "id": f"{document['identifiant']}-100",
-                },
-                **document,
-            ).to_dict(include_meta=True)
+            yield build_document(
+                document,
+                elastic_index,
+                f"{document['identifiant']}-100",
+                fast_serialization,
+            )
 
 
-def index_unites_legales_by_chunk(
-    cursor,
-    elastic_connection,
-    elastic_bulk_thread_count,
-    elastic_bulk_size,
+def plan_siren_ranges(sqlite_client, partition_count, only_changed_sirens=False):
+    """
+    Split the unités légales into `partition_count` SIREN ranges of similar
+    indexing cost, weighted by their number of établissements. With
+    `only_changed_sirens`, only the unités légales of the `delta_siren` table are
+    weighted.
+
+    Every unité légale of the database belongs to exactly one range, so that each
+    partition can be indexed (and retried) independently.
+
+    Returns:
+        list[tuple[str, str]]: inclusive (start, end) SIREN bounds of each range.
+    """
+    prefix_weights = sqlite_client.execute(
+        select_changed_siren_prefix_weights_query
+        if only_changed_sirens
+        else select_siren_prefix_weights_query
+    ).fetchall()
+    if not prefix_weights:
+        return [("000000000", "999999999")]
+    total_weight = sum(weight for _, weight in prefix_weights)
+
+    ranges = []
+    start = "000000000"
+    cumulated_weight = 0
+    for (siren_prefix, weight), (next_siren_prefix, _) in zip(
+        prefix_weights, prefix_weights[1:]
+    ):
+        cumulated_weight += weight
+        target_weight = total_weight * (len(ranges) + 1) / partition_count
+        if cumulated_weight >= target_weight and len(ranges) < partition_count - 1:
+            ranges.append((start, f"{siren_prefix}9999"))
+            start = f"{next_siren_prefix}0000"
+    ranges.append((start, "999999999"))
+    logging.info(
+        f"{len(ranges)} SIREN ranges planned for a total weight of {total_weight}"
+    )
+    return ranges
+
+
+def serialize_bulk_bodies(documents, dumps, bulk_max_bytes, bulk_max_size):
+    """
+    Build the NDJSON bodies of bulk requests from documents produced by
+    `doc_unite_legale_generator`, serialized with `dumps` (see
+    `get_bulk_serializer`). A body is closed once it reaches `bulk_max_bytes()`
+    bytes or `bulk_max_size` documents.
+
+    Yields:
+        tuple[bytes, int]: a bulk body and the number of documents it contains.
+    """
+    lines = []
+    body_bytes = 0
+    for document in documents:
+        action = dumps(
+            {"index": {"_index": document["_index"], "_id": document["_id"]}}
+        )
+        source = dumps(document["_source"])
+        lines.append(action)
+        lines.append(source)
+        body_bytes += len(action) + len(source) + 2
+        if body_bytes >= bulk_max_bytes() or len(lines) // 2 >= bulk_max_size:
+            yield b"\n".join(lines) + b"\n", len(lines) // 2
+            lines = []
+            body_bytes = 0
+    if lines:
+        yield b"\n".join(lines) + b"\n", len(lines) // 2
+
+
+def init_indexing_worker(
+    db_location,
     elastic_index,
+    elastic_bulk_size,
+    bulk_queue,
+    fields_to_index_query,
+    previous_document_hash_db_location,
+    skip_unchanged_documents,
+    shared_bulk_max_bytes,
+    fast_serialization,
+    date_mise_a_jour,
+    partition_pids,
 ):
-    # Indexing performance : do not refresh the index while indexing
-    elastic_connection.indices.put_settings(
-        index=elastic_index, body={"index.refresh_interval": -1}
+    worker_context["sqlite_client"] = SqliteClient(
+        db_location, profile=SQLITE_PROFILE_READ_ONLY_SCAN
+    )
+    worker_context["shared_bulk_max_bytes"] = shared_bulk_max_bytes
+    worker_context["fields_to_index_query"] = fields_to_index_query
+    worker_context["has_previous_hashes"] = (
+        previous_document_hash_db_location is not None
     )
+    if previous_document_hash_db_location is not None:
+        worker_context["sqlite_client"].connect_to_another_db(
+            previous_document_hash_db_location, "previous_hash"
+        )
+    worker_context["skip_unchanged_documents"] = skip_unchanged_documents
+    worker_context["elastic_index"] = elastic_index
+    worker_context["elastic_bulk_size"] = elastic_bulk_size
+    worker_context["bulk_queue"] = bulk_queue
+    worker_context["fast_serialization"] = fast_serialization
+    worker_context["dumps"] = get_bulk_serializer(fast_serialization)
+    worker_context["date_mise_a_jour"] = date_mise_a_jour
+    worker_context["partition_pids"] = partition_pids
 
-    logger = 0
-    doc_count = 0
-    chunk_unites_legales_sqlite = 1
-    while chunk_unites_legales_sqlite:
-        chunk_unites_legales_sqlite = cursor.fetchmany(elastic_bulk_size)
-        unite_legale_columns = tuple([x[0] for x in cursor.description])
-        liste_unites_legales_sqlite = []
-        # Group all fetched unites_legales from sqlite in one list
-        for unite_legale in chunk_unites_legales_sqlite:
-            liste_unites_legales_sqlite.append(
-                {
-                    unite_legale_columns: value
-                    for unite_legale_columns, value in zip(
-                        unite_legale_columns, unite_legale
-                    )
-                }
-            )
 
-        liste_unites_legales_sqlite = tuple(liste_unites_legales_sqlite)
+def build_siren_range_documents(siren_range, partition_index, attempt):
+    """
+    Read, enrich and serialize all the unités légales of a SIREN range.
+
+    Runs in a worker process: bulk bodies are streamed to the sender through the
+    shared queue, followed by an end-of-partition message carrying the hash of every
+    document of the range and the SIRENs whose hash changed since the last indexing.
+    Unchanged documents are not sent when `skip_unchanged_documents` is set.
+    Every message carries the `attempt` of the range, for the sender to drop the
+    messages of an attempt it retried.
+    """
+    bulk_queue = worker_context["bulk_queue"]
+    # Written right away, unlike the messages of the queue sent by a thread, so
+    # that the sender knows which process builds the range even if it is killed
+    worker_context["partition_pids"][partition_index] = os.getpid()
+    try:
+        previous_hashes = (
+            load_document_hashes(worker_context["sqlite_client"], siren_range)
+            if worker_context["has_previous_hashes"]
+            else {}
+        )
+        document_hashes = []
+        changed_sirens = []
+
+        def iter_documents_to_index():
+            for unites_legales in worker_context["sqlite_client"].iter_dicts(
+                worker_context["fields_to_index_query"],
+                siren_range,
+                worker_context["elastic_bulk_size"],
+            ):
+                for document in process_unites_legales(
+                    unites_legales, worker_context["date_mise_a_jour"]
+                ):
+                    siren = document["identifiant"]
+                    document_hash = compute_document_hash(document)
+                    document_hashes.append((siren, document_hash))
+                    if previous_hashes.get(siren) != document_hash:
+                        changed_sirens.append(siren)
+                    elif worker_context["skip_unchanged_documents"]:
+                        continue
+                    yield document
 
-        chunk_unites_legales_processed = process_unites_legales(
-            liste_unites_legales_sqlite
+        doc_count = 0
+        for body, body_doc_count in serialize_bulk_bodies(
+            doc_unite_legale_generator(
+                iter_documents_to_index(),
+                worker_context["elastic_index"],
+                worker_context["fast_serialization"],
+            ),
+            worker_context["dumps"],
+            lambda: worker_context["shared_bulk_max_bytes"].value,
+            worker_context["elastic_bulk_size"],
+        ):
+            doc_count += body_doc_count
+            bulk_queue.put((BULK_BODY, siren_range, attempt, body, body_doc_count))
+        bulk_queue.put(
+            (
+                PARTITION_DONE,
+                siren_range,
+                attempt,
+                (document_hashes, changed_sirens),
+                doc_count,
+            )
         )
-        logger += 1
-        if logger % 100000 == 0:
-            logging.info(f"logger={logger}")
+    except Exception as e:
+        bulk_queue.put((PARTITION_FAILED, siren_range, attempt, repr(e), 0))
+        raise
+
+
+def get_bulk_error(status, error):
+    """
+    Returns:
+        tuple[dict, bool]: the failure of a document, and whether indexing it again
+        may succeed (back-pressure or unavailable cluster).
+    """
+    error_type = error.get("type") if isinstance(error, dict) else None
+    reason = error.get("reason") if isinstance(error, dict) else str(error)
+    is_retryable = status in RETRYABLE_STATUSES or error_type in RETRYABLE_ERROR_TYPES
+    return {"status": status, "error_type": error_type, "reason": reason}, is_retryable
+
+
+def send_bulk_body(
+    elastic_connection,
+    body,
+    max_retries=0,
+    retry_backoff=1,
+    on_request=None,
+):
+    """
+    Send a serialized bulk body to Elasticsearch.
+
+    Documents failing with a retryable error are sent again, up to `max_retries`
+    times, waiting `retry_backoff` seconds before the first retry and twice as long
+    before each next one. `on_request(success_count, rejected_count, latency)` is
+    called after each request, `rejected_count` being the number of documents
+    rejected by Elasticsearch because of back-pressure.
+
+    Returns:
+        tuple[int, list[dict]]: number of documents successfully indexed, and the
+        documents which failed (id, status, error type and reason).
+    """
+    # Action and source lines of each document of the body
+    lines = body.split(b"\n")
+    documents = list(zip(lines[0:-1:2], lines[1:-1:2]))
+    success_count = 0
+    failed_documents = []
+    for attempt in range(max_retries + 1):
+        if attempt > 0:
+            logging.warning(
+                f"Retrying {len(documents)} documents (attempt {attempt + 1}) after "
+                f"{retry_backoff * 2 ** (attempt - 1)}s"
+            )
+            time.sleep(retry_backoff * 2 ** (attempt - 1))
+        start_time = time.monotonic()
         try:
-            chunk_doc_generator = doc_unite_legale_generator(
-                chunk_unites_legales_processed, elastic_index
+            response = elastic_connection.bulk(
+                body=b"".join(
+                    action + b"\n" + source + b"\n" for action, source in documents
+                )
             )
-            # Bulk index documents into elasticsearch using the parallel version of the
-            # bulk helper that runs in multiple threads
-            # The bulk helper accept an instance of Elasticsearch class and an
-            # iterable, a generator in our case
-            for success, details in parallel_bulk(
-                elastic_connection,
-                chunk_doc_generator,
-                thread_count=elastic_bulk_thread_count,
-                chunk_size=elastic_bulk_size,
-            ):
-                if not success:
-                    raise Exception(f"A file_access document failed: {details}")
-                else:
-                    doc_count += 1
         except Exception as e:
             logging.error(f"Failed to send to Elasticsearch: {e}")
-        logging.info(f"Number of documents indexed: {doc_count}")
+            status = getattr(e, "status_code", None)
+            error, is_retryable = get_bulk_error(
+                status if isinstance(status, int) else None,
+                {"type": type(e).__name__, "reason": str(e)},
+            )
+            # Timeouts and unavailable nodes are the sign of an overloaded cluster
+            is_retryable = is_retryable or not isinstance(status, int)
+            if on_request is not None:
+                on_request(0, len(documents), time.monotonic() - start_time)
+            errors = [(document, error, is_retryable) for document in documents]
+        else:
+            latency = time.monotonic() - start_time
+            errors = []
+            rejected_count = 0
+            for document, item in zip(documents, response["items"]):
+                result = item["index"]
+                if 200 <= result.get("status", 500) < 300:
+                    success_count += 1
+                    continue
+                error, is_retryable = get_bulk_error(
+                    result.get("status"), result.get("error")
+                )
+                if is_retryable:
+                    rejected_count += 1
+                errors.append((document, error, is_retryable))
+            if on_request is not None:
+                on_request(len(documents) - len(errors), rejected_count, latency)
+
+        documents = []
+        for document, error, is_retryable in errors:
+            if is_retryable and attempt < max_retries:
+                documents.append(document)
+            else:
+                document_id = json.loads(document[0])["index"]["_id"]
+                logging.error(f"A document failed: {document_id} {error}")
+                failed_documents.append({"_id": document_id, **error})
+        if not documents:
+            break
+    return success_count, failed_documents
+
+
+def index_unites_legales_by_partition(
+    db_location,
+    elastic_connection,
+    elastic_bulk_thread_count,
+    elastic_bulk_size,
+    elastic_index,
+    elastic_indexing_process_count,
+    siren_ranges,
+    max_partition_attempts=3,
+    on_partition_indexed=None,
+    only_changed_sirens=False,
+    document_hash_db_location=None,
+    previous_document_hash_db_location=None,
+    skip_unchanged_documents=False,
+    bulk_controller=None,
+    fast_serialization=False,
+    max_retries=0,
+    retry_backoff=1,
+    dead_letter_location=None,
+    max_failed_document_ratio=0,
+):
+    """
+    Index the unités légales of `db_location` into `elastic_index`.
+
+    SIREN ranges are read and enriched in a pool of worker processes, each one
+    streaming serialized bulk bodies to this process, which sends them to
+    Elasticsearch. The size of the bodies and the number of concurrent requests are
+    set by `bulk_controller` (fixed to `DEFAULT_BULK_MAX_BYTES` and
+    `elastic_bulk_thread_count` by default), `elastic_bulk_size` being the maximum
+    number of documents of a body. A SIREN range whose
+    build fails is retried up to `max_partition_attempts` times : documents are
+    indexed with deterministic ids, so a partially sent range is simply overwritten.
+    Only the bulk requests of the attempt which builds the range are counted.
+
+    `on_partition_indexed(siren_range, doc_count)` is called once every bulk request
+    of a SIREN range has been acknowledged by Elasticsearch.
+
+    With `only_changed_sirens`, only the unités légales listed in the `delta_siren`
+    table are indexed (delta indexing of a live index).
+
+    The hash of every document built is saved in `document_hash_db_location`, along
+    with the SIRENs whose hash differs from `previous_document_hash_db_location`.
+    With `skip_unchanged_documents`, documents whose hash did not change are not
+    sent to Elasticsearch.
 
-    # rollback to the original value
-    elastic_connection.indices.put_settings(
-        index=elastic_index, body={"index.refresh_interval": None}
+    With `fast_serialization`, the bulk bodies are built from plain dicts serialized
+    with orjson, skipping the elasticsearch_dsl documents.
+
+    Documents failing with a retryable error are sent again up to `max_retries`
+    times (see `send_bulk_body`). The documents which still failed are written to
+    `dead_letter_location`, and their hash is not kept so that they are indexed
+    again next time. An exception is raised once indexed if they exceed
+    `max_failed_document_ratio` of the documents sent.
+
+    The settings of the index are not changed : they are tuned for indexing by the
+    ingest profile of `ElasticCreateIndex`.
+    """
+    if fast_serialization:
+        check_fast_serialization_mapping()
+
+    if bulk_controller is None:
+        bulk_controller = AdaptiveBulkController(
+            min_bytes=DEFAULT_BULK_MAX_BYTES,
+            max_bytes=DEFAULT_BULK_MAX_BYTES,
+            min_concurrency=elastic_bulk_thread_count,
+            max_concurrency=elastic_bulk_thread_count,
+            target_latency=0,
+        )
+
+    context = multiprocessing.get_context("fork")
+    # Bounded queue : workers wait for the sender when Elasticsearch is the bottleneck
+    bulk_queue = context.Queue(maxsize=elastic_indexing_process_count * 4)
+    # Worker process building each SIREN range, 0 until one starts building it
+    partition_pids = context.Array("i", len(siren_ranges), lock=False)
+    pool = context.Pool(
+        processes=elastic_indexing_process_count,
+        initializer=init_indexing_worker,
+        initargs=(
+            db_location,
+            elastic_index,
+            elastic_bulk_size,
+            bulk_queue,
+            (
+                select_changed_fields_to_index_by_siren_range_query
+                if only_changed_sirens
+                else select_fields_to_index_by_siren_range_query
+            ),
+            previous_document_hash_db_location,
+            skip_unchanged_documents,
+            bulk_controller.shared_max_bytes,
+            fast_serialization,
+            get_date_mise_a_jour(),
+            partition_pids,
+        ),
+    )
+    dead_letter_writer = (
+        DeadLetterWriter(dead_letter_location)
+        if dead_letter_location is not None
+        else None
     )
+    hash_sqlite_client = None
+    if document_hash_db_location is not None:
+        hash_sqlite_client = SqliteClient(document_hash_db_location)
+        hash_sqlite_client.execute(create_document_hash_table_query)
+        hash_sqlite_client.execute(create_changed_siren_table_query)
+    # Counted for the attempts of the ranges built, the bulk requests of an
+    # attempt retried being sent again
+    doc_count = 0
+    failed_document_count = 0
+    siren_ranges = [tuple(siren_range) for siren_range in siren_ranges]
+    partitions_left = len(siren_ranges)
+    partition_attempts = {siren_range: 1 for siren_range in siren_ranges}
+    # Bulk requests sent for the current attempt of each SIREN range, and ranges
+    # entirely built
+    partition_bulks = {siren_range: [] for siren_range in siren_ranges}
+    built_partitions = set()
+    # Document hashes and changed SIRENs of the ranges built
+    partition_hashes = {}
+    # Pending result of the ranges being built
+    partition_results = {}
+    partition_indexes = {
+        siren_range: partition_index
+        for partition_index, siren_range in enumerate(siren_ranges)
+    }
+
+    def build_partition(siren_range):
+        partition_pids[partition_indexes[siren_range]] = 0
+        partition_results[siren_range] = pool.apply_async(
+            build_siren_range_documents,
+            (
+                siren_range,
+                partition_indexes[siren_range],
+                partition_attempts[siren_range],
+            ),
+        )
+
+    def retry_partition(siren_range, error):
+        if partition_attempts[siren_range] >= max_partition_attempts:
+            raise Exception(
+                f"Failed to build documents of SIREN range {siren_range}: {error}"
+            )
+        partition_attempts[siren_range] += 1
+        logging.warning(
+            f"Retrying SIREN range {siren_range} (attempt "
+            f"{partition_attempts[siren_range]}) after error: {error}"
+        )
+        # The range is sent again from its beginning, the bulk requests of the
+        # previous attempt being left out of the counts
+        partition_bulks[siren_range] = []
+        build_partition(siren_range)
+
+    def retry_lost_partitions():
+        """
+        Retry the ranges whose worker process died without reporting it (killed
+        by the OOM killer...), whose task the pool never completes.
+        """
+        alive_pids = {process.pid for process in multiprocessing.active_children()}
+        for siren_range, result in list(partition_results.items()):
+            pid = partition_pids[partition_indexes[siren_range]]
+            if result.ready() and not result.successful():
+                try:
+                    result.get()
+                except Exception as e:
+                    retry_partition(siren_range, repr(e))
+            elif pid != 0 and pid not in alive_pids:
+                retry_partition(siren_range, f"worker process {pid} died")
+
+    def acknowledge_indexed_partitions():
+        nonlocal doc_count, failed_document_count
+        for siren_range in list(built_partitions):
+            if all(future.done() for future in partition_bulks[siren_range]):
+                built_partitions.remove(siren_range)
+                bulk_results = [
+                    future.result() for future in partition_bulks.pop(siren_range)
+                ]
+                partition_doc_count = sum(
+                    success_count for success_count, _ in bulk_results
+                )
+                doc_count += partition_doc_count
+                for _, failed_documents in bulk_results:
+                    failed_document_count += len(failed_documents)
+                    if dead_letter_writer is not None:
+                        dead_letter_writer.write(failed_documents)
+                failed_sirens = {
+                    failed_document["_id"].split("-")[0]
+                    for _, failed_documents in bulk_results
+                    for failed_document in failed_documents
+                }
+                document_hashes, changed_sirens = partition_hashes.pop(siren_range)
+                if failed_sirens:
+                    document_hashes = [
+                        (
+                            siren,
+                            (
+                                FAILED_DOCUMENT_HASH
+                                if siren in failed_sirens
+                                else document_hash
+                            ),
+                        )
+                        for siren, document_hash in document_hashes
+                    ]
+                if hash_sqlite_client is not None:
+                    save_document_hashes(
+                        hash_sqlite_client, document_hashes, changed_sirens
+                    )
+                if on_partition_indexed is not None:
+                    on_partition_indexed(siren_range, partition_doc_count)
+
+    try:
+        for siren_range in siren_ranges:
+            build_partition(siren_range)
+        with ThreadPoolExecutor(max_workers=bulk_controller.max_concurrency) as sender:
+            pending_bulks = set()
+            while partitions_left > 0:
+                try:
+                    message_type, siren_range, attempt, body, body_doc_count = (
+                        bulk_queue.get(timeout=PARTITION_CHECK_INTERVAL)
+                    )
+                except queue.Empty:
+                    retry_lost_partitions()
+                    continue
+                if attempt != partition_attempts[siren_range]:
+                    # Sent by an attempt already retried, after its failure was
+                    # noticed through its result
+                    continue
+                if message_type == PARTITION_FAILED:
+                    retry_partition(siren_range, body)
+                    continue
+                if message_type == PARTITION_DONE:
+                    partitions_left -= 1
+                    partition_results.pop(siren_range)
+                    built_partitions.add(siren_range)
+                    partition_hashes[siren_range] = body
+                    logging.info(
+                        f"SIREN range {siren_range} built: {body_doc_count} documents"
+                        f", {partitions_left} partitions left"
+                    )
+                    acknowledge_indexed_partitions()
+                    continue
+                # Limit the number of in-flight bulk requests
+                while len(pending_bulks) >= bulk_controller.concurrency:
+                    _, pending_bulks = wait(pending_bulks, return_when=FIRST_COMPLETED)
+                    acknowledge_indexed_partitions()
+                future = sender.submit(
+                    send_bulk_body,
+                    elastic_connection,
+                    body,
+                    max_retries,
+                    retry_backoff,
+                    bulk_controller.record,
+                )
+                pending_bulks.add(future)
+                partition_bulks[siren_range].append(future)
+            wait(pending_bulks)
+            acknowledge_indexed_partitions()
+        logging.info(f"Number of documents indexed: {doc_count}")
+        logging.info(f"Bulk statistics: {bulk_controller.get_stats()}")
+    finally:
+        pool.terminate()
+        pool.join()
+        if dead_letter_writer is not None:
+            dead_letter_writer.close()
+        if hash_sqlite_client is not None:
+            hash_sqlite_client.commit_and_close_conn()
+
+    if failed_document_count > max_failed_document_ratio * (
+        doc_count + failed_document_count
+    ):
+        raise Exception(
+            f"{failed_document_count} documents failed to be indexed, more than "
+            f"{max_failed_document_ratio:.4%} of the documents sent"
+        )
+
+    # The refresh is disabled while indexing (see `ElasticCreateIndex`) : make the
+    # documents visible to count them
+    elastic_connection.indices.refresh(index=elastic_index)
 
     # Indexing performance :
     #
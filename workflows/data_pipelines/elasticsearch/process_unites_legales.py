@@ -5,18 +5,16 @@ from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.data_enrichment
     calculate_company_size_factor,
     create_list_names_elus,
     format_dirigeants_pm,
-    format_etablissements_and_complements,
     format_nom,
     format_nom_complet,
     format_personnes_physiques,
-    format_slug,
     format_siege_unite_legale,
-    get_nom_commercial,
     is_association,
     is_entrepreneur_individuel,
     is_ess,
     is_service_public,
     label_section_from_activite,
+    load_formatted_etablissements,
     map_categorie_to_number,
 )
 from dag_datalake_sirene.helpers.utils import (
@@ -26,42 +24,67 @@ from dag_datalake_sirene.helpers.utils import (
 )
 
 
-def process_unites_legales(chunk_unites_legales_sqlite):
+# Fields set by the indexing query to 1 when true, None otherwise
+SQLITE_BOOLEAN_FIELDS = (
+    "est_entrepreneur_spectacle",
+    "egapro_renseignee",
+    "est_siae",
+    "est_qualiopi",
+    "from_insee",
+    "from_rne",
+)
+# Fields of the unités légales computed from their établissements
+COMPLEMENT_FIELDS = (
+    "convention_collective_renseignee",
+    "est_bio",
+    "est_finess",
+    "est_rge",
+    "est_uai",
+)
+
+
+def get_date_mise_a_jour():
+    """Date of update of the documents built now."""
+    return datetime.now().strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def process_unites_legales(chunk_unites_legales_sqlite, date_mise_a_jour=None):
+    """
+    Build the documents of a batch of unités légales read by the indexing query.
+
+    `date_mise_a_jour` is set on every document, so that all the documents of an
+    indexing share it (see `get_date_mise_a_jour`, the default).
+    """
+    if date_mise_a_jour is None:
+        date_mise_a_jour = get_date_mise_a_jour()
+
     list_unites_legales_processed = []
     for unite_legale in chunk_unites_legales_sqlite:
-        unite_legale_processed = {}
-        for field in unite_legale:
-            if field in ["colter_elus"]:
-                unite_legale_processed[field] = json.loads(unite_legale[field])
-            else:
-                unite_legale_processed[field] = unite_legale[field]
+        unite_legale_processed = dict(unite_legale)
+        unite_legale_processed["colter_elus"] = json.loads(unite_legale["colter_elus"])
+
         # Statut de diffusion
-        is_non_diffusible = (
-            True if unite_legale["statut_diffusion_unite_legale"] != "O" else False
-        )
+        is_non_diffusible = unite_legale["statut_diffusion_unite_legale"] != "O"
 
         # Nom complet
-        unite_legale_processed["nom_complet"] = format_nom_complet(
+        nom_complet = format_nom_complet(
             unite_legale["nom"],
             unite_legale["nom_usage"],
             unite_legale["nom_raison_sociale"],
             unite_legale["prenom"],
         )
+        unite_legale_processed["nom_complet"] = nom_complet
 
         # Replace missing values with 0
-        unite_legale_processed["nombre_etablissements_ouverts"] = (
-            0
-            if unite_legale_processed["nombre_etablissements_ouverts"] is None
-            else unite_legale_processed["nombre_etablissements_ouverts"]
-        )
+        if unite_legale["nombre_etablissements_ouverts"] is None:
+            unite_legale_processed["nombre_etablissements_ouverts"] = 0
 
         # Bilan financier
-        if unite_legale["bilan_financier"]:
-            unite_legale_processed["bilan_financier"] = json.loads(
-                unite_legale["bilan_financier"]
-            )
-        else:
-            unite_legale_processed["bilan_financier"] = {}
+        unite_legale_processed["bilan_financier"] = (
+            json.loads(unite_legale["bilan_financier"])
+            if unite_legale["bilan_financier"]
+            else {}
+        )
 
         # Activite principale
         unite_legale_processed["section_activite_principale"] = (
@@ -71,8 +94,11 @@ def process_unites_legales(chunk_unites_legales_sqlite):
         )
 
         # Entrepreneur individuel
+        est_entrepreneur_individuel = is_entrepreneur_individuel(
+            unite_legale["nature_juridique_unite_legale"]
+        )
         unite_legale_processed["est_entrepreneur_individuel"] = (
-            is_entrepreneur_individuel(unite_legale["nature_juridique_unite_legale"])
+            est_entrepreneur_individuel
         )
 
         # Categorie entreprise
@@ -81,77 +107,38 @@ def process_unites_legales(chunk_unites_legales_sqlite):
         )
 
         # Dirigeants
-        unite_legale_processed["liste_dirigeants"] = []
-        (
-            unite_legale_processed["dirigeants_pp"],
-            unite_legale_processed["liste_dirigeants"],
-        ) = format_personnes_physiques(
-            unite_legale["dirigeants_pp"], unite_legale_processed["liste_dirigeants"]
-        )
-
-        (
-            unite_legale_processed["dirigeants_pm"],
-            unite_legale_processed["liste_dirigeants"],
-        ) = format_dirigeants_pm(
-            unite_legale["dirigeants_pm"], unite_legale_processed["liste_dirigeants"]
-        )
-
-        if unite_legale_processed["est_entrepreneur_individuel"]:
-            unite_legale_processed["liste_dirigeants"].append(
-                unite_legale_processed["nom_complet"]
-            )
-            unite_legale_processed["dirigeants_pp"] = []
-            unite_legale_processed["dirigeants_pp"].append({})
-            unite_legale_processed["dirigeants_pp"][0]["nom"] = format_nom(
-                unite_legale_processed["nom"], unite_legale_processed["nom_usage"]
-            )
-
-            unite_legale_processed["dirigeants_pp"][0]["prenoms"] = (
-                unite_legale_processed["prenom"]
-            )
+        dirigeants_pp, liste_dirigeants = format_personnes_physiques(
+            unite_legale["dirigeants_pp"], []
+        )
+        dirigeants_pm, liste_dirigeants = format_dirigeants_pm(
+            unite_legale["dirigeants_pm"], liste_dirigeants
+        )
+        if est_entrepreneur_individuel:
+            liste_dirigeants.append(nom_complet)
+            dirigeants_pp = [
+                {
+                    "nom": format_nom(unite_legale["nom"], unite_legale["nom_usage"]),
+                    "prenoms": unite_legale["prenom"],
+                }
+            ]
+        unite_legale_processed["dirigeants_pp"] = dirigeants_pp
+        unite_legale_processed["dirigeants_pm"] = dirigeants_pm
+        unite_legale_processed["liste_dirigeants"] = liste_dirigeants
 
         # Beneficiaires Effectifs
-        unite_legale_processed["liste_beneficiaires"] = []
         (
             unite_legale_processed["beneficiaires_effectifs"],
             unite_legale_processed["liste_beneficiaires"],
-        ) = format_personnes_physiques(
-            unite_legale["beneficiaires_effectifs"],
-            unite_legale_processed["liste_beneficiaires"],
-        )
+        ) = format_personnes_physiques(unite_legale["beneficiaires_effectifs"], [])
 
         # Élus
         unite_legale_processed["liste_elus"] = create_list_names_elus(
             unite_legale_processed["colter_elus"]
         )
 
-        unite_legale_processed["est_entrepreneur_individuel"] = (
-            is_entrepreneur_individuel(unite_legale["nature_juridique_unite_legale"])
-        )
-
         unite_legale_processed["est_association"] = is_association(
-            unite_legale_processed["nature_juridique_unite_legale"],
-            unite_legale_processed["identifiant_association_unite_legale"],
-        )
-
-        if unite_legale_processed["est_entrepreneur_individuel"]:
-            unite_legale_processed["liste_dirigeants"].append(
-                unite_legale_processed["nom_complet"]
-            )
-            unite_legale_processed["dirigeants_pp"] = []
-            unite_legale_processed["dirigeants_pp"].append({})
-            unite_legale_processed["dirigeants_pp"][0]["nom"] = format_nom(
-                unite_legale_processed["nom"], unite_legale_processed["nom_usage"]
-            )
-
-            unite_legale_processed["dirigeants_pp"][0]["prenoms"] = (
-                unite_legale_processed["prenom"]
-            )
-
-        unite_legale_processed["section_activite_principale"] = (
-            label_section_from_activite(
-                unite_legale["activite_principale_unite_legale"]
-            )
+            unite_legale["nature_juridique_unite_legale"],
+            unite_legale["identifiant_association_unite_legale"],
         )
 
         # Immatriculation
@@ -168,10 +155,10 @@ def process_unites_legales(chunk_unites_legales_sqlite):
         else:
             unite_legale_processed["immatriculation"] = {}
 
-        # Entrepreneur de spectacle vivant
-        unite_legale_processed["est_entrepreneur_spectacle"] = sqlite_str_to_bool(
-            unite_legale["est_entrepreneur_spectacle"]
-        )
+        # Entrepreneur de spectacle vivant, Egapro, Marche Inclusion, Qualiopi et
+        # source de données
+        for field in SQLITE_BOOLEAN_FIELDS:
+            unite_legale_processed[field] = sqlite_str_to_bool(unite_legale[field])
 
         # ESS
         unite_legale_processed["est_ess"] = is_ess(
@@ -179,43 +166,27 @@ def process_unites_legales(chunk_unites_legales_sqlite):
             unite_legale["economie_sociale_solidaire_unite_legale"],
         )
 
-        # Egapro
-        unite_legale_processed["egapro_renseignee"] = sqlite_str_to_bool(
-            unite_legale["egapro_renseignee"]
-        )
-
-        # Marche Inclusion
-        unite_legale_processed["est_siae"] = sqlite_str_to_bool(
-            unite_legale["est_siae"]
-        )
-
         # Etablissements
-        etablissements_processed, complements = format_etablissements_and_complements(
+        etablissements_processed, complements = load_formatted_etablissements(
             unite_legale["etablissements"],
-            unite_legale_processed["nom_complet"],
-            is_non_diffusible,
+            unite_legale_processed.pop("etablissements_complements"),
+            nom_complet,
         )
         unite_legale_processed["etablissements"] = etablissements_processed
 
         # Complements
-        for field in [
-            "convention_collective_renseignee",
-            "est_bio",
-            "est_finess",
-            "est_rge",
-            "est_uai",
-        ]:
+        for field in COMPLEMENT_FIELDS:
             unite_legale_processed[field] = complements[field]
 
         # Organismes de formation
-        unite_legale_processed["liste_id_organisme_formation"] = str_to_list(
-            unite_legale_processed["liste_id_organisme_formation"]
+        liste_id_organisme_formation = str_to_list(
+            unite_legale["liste_id_organisme_formation"]
         )
-        unite_legale_processed["est_organisme_formation"] = (
-            True if unite_legale_processed["liste_id_organisme_formation"] else False
+        unite_legale_processed["liste_id_organisme_formation"] = (
+            liste_id_organisme_formation
         )
-        unite_legale_processed["est_qualiopi"] = sqlite_str_to_bool(
-            unite_legale_processed["est_qualiopi"]
+        unite_legale_processed["est_organisme_formation"] = bool(
+            liste_id_organisme_formation
         )
 
         # Siege
@@ -223,35 +194,13 @@ def process_unites_legales(chunk_unites_legales_sqlite):
             unite_legale["siege"], is_non_diffusible
         )
 
-        # Slug Nom Complet
-        unite_legale_processed["slug"] = format_slug(
-            unite_legale_processed["nom_complet"],
-            unite_legale["sigle"],
-            get_nom_commercial(unite_legale_processed),
-            unite_legale["denomination_usuelle_1_unite_legale"],
-            unite_legale["denomination_usuelle_2_unite_legale"],
-            unite_legale["denomination_usuelle_3_unite_legale"],
-            unite_legale["siren"],
-            unite_legale["statut_diffusion_unite_legale"],
-        )
-
         # Convention collective
         unite_legale_processed["liste_idcc_unite_legale"] = str_to_list(
-            unite_legale_processed["liste_idcc_unite_legale"]
+            unite_legale["liste_idcc_unite_legale"]
         )
 
-        # Source de données
-        unite_legale_processed["from_insee"] = sqlite_str_to_bool(
-            unite_legale["from_insee"]
-        )
-        unite_legale_processed["from_rne"] = sqlite_str_to_bool(
-            unite_legale["from_rne"]
-        )
-
-        # Get the current date and time
-        unite_legale_processed["date_mise_a_jour"] = datetime.now().strftime(
-            "%Y-%m-%dT%H:%M:%S"
-        )
+        # Dates de mise à jour
+        unite_legale_processed["date_mise_a_jour"] = date_mise_a_jour
         unite_legale_processed["date_mise_a_jour_rne"] = convert_date_format(
             unite_legale["date_mise_a_jour_rne"]
         )
@@ -259,7 +208,7 @@ def process_unites_legales(chunk_unites_legales_sqlite):
         # Service public
         unite_legale_processed["est_service_public"] = is_service_public(
             unite_legale["nature_juridique_unite_legale"],
-            unite_legale_processed["siren"],
+            unite_legale["siren"],
         )
 
         # Produits catégorie/nombre étabs
@@ -267,11 +216,12 @@ def process_unites_legales(chunk_unites_legales_sqlite):
             calculate_company_size_factor(unite_legale_processed)
         )
         # Create unité légale (structure) to be indexed
-        unite_legale_to_index = {}
-        unite_legale_to_index["identifiant"] = unite_legale_processed["siren"]
-        unite_legale_to_index["nom_complet"] = unite_legale_processed["nom_complet"]
-        unite_legale_to_index["unite_legale"] = unite_legale_processed
-
-        list_unites_legales_processed.append(unite_legale_to_index)
+        list_unites_legales_processed.append(
+            {
+                "identifiant": unite_legale["siren"],
+                "nom_complet": nom_complet,
+                "unite_legale": unite_legale_processed,
+            }
+        )
 
     return list_unites_legales_processed
@@ -1,4 +1,4 @@
-select_fields_to_index_query = """SELECT
+select_fields_to_index_base_query = """SELECT
             ul.activite_principale_unite_legale as activite_principale_unite_legale,
             ul.caractere_employeur as caractere_employeur,
             ul.categorie_entreprise as categorie_entreprise,
@@ -23,6 +23,7 @@ select_fields_to_index_query = """SELECT
             ul.prenom as prenom,
             ul.sigle as sigle,
             ul.siren,
+            sl.slug as slug,
             st.siret as siret_siege,
             ul.tranche_effectif_salarie_unite_legale as
             tranche_effectif_salarie_unite_legale,
@@ -31,14 +32,10 @@ select_fields_to_index_query = """SELECT
             ul.est_societe_mission as est_societe_mission,
             ul.annee_categorie_entreprise as annee_categorie_entreprise,
             ul.annee_tranche_effectif_salarie as annee_tranche_effectif_salarie,
-            (SELECT sirets_par_idcc FROM convention_collective WHERE
-                        siren = ul.siren) as sirets_par_idcc,
-            (SELECT liste_idcc_unite_legale FROM convention_collective WHERE
-                        siren = ul.siren) as liste_idcc_unite_legale,
-            (SELECT count FROM count_etablissement ce WHERE ce.siren = ul.siren) as
-            nombre_etablissements,
-            (SELECT count FROM count_etablissement_ouvert ceo WHERE ceo.siren = ul.siren) as
-            nombre_etablissements_ouverts,
+            ue.sirets_par_idcc as sirets_par_idcc,
+            ue.liste_idcc_unite_legale as liste_idcc_unite_legale,
+            ue.nombre_etablissements as nombre_etablissements,
+            ue.nombre_etablissements_ouverts as nombre_etablissements_ouverts,
             (
                 SELECT json_object(
                     'ca', ca,
@@ -109,150 +106,8 @@ select_fields_to_index_query = """SELECT
                     WHERE siren = ul.siren
                 )
             ) as beneficiaires_effectifs,
-            (SELECT json_group_array(
-                    json_object(
-                        'activite_principale',activite_principale,
-                        'activite_principale_registre_metier',
-                        activite_principale_registre_metier,
-                        'ancien_siege',ancien_siege,
-                        'caractere_employeur',caractere_employeur,
-                        'cedex',cedex,
-                        'cedex_2',cedex_2,
-                        'code_pays_etranger',code_pays_etranger,
-                        'code_pays_etranger_2',code_pays_etranger_2,
-                        'code_postal',code_postal,
-                        'commune',commune,
-                        'commune_2',commune_2,
-                        'complement_adresse',complement_adresse,
-                        'complement_adresse_2',complement_adresse_2,
-                        'date_creation',date_creation,
-                        'date_debut_activite',date_debut_activite,
-                        'date_fermeture',date_fermeture,
-                        'distribution_speciale',distribution_speciale,
-                        'distribution_speciale_2',distribution_speciale_2,
-                        'enseigne_1',enseigne_1,
-                        'enseigne_2',enseigne_2,
-                        'enseigne_3',enseigne_3,
-                        'est_siege',est_siege,
-                        'etat_administratif',etat_administratif_etablissement,
-                        'geo_adresse',geo_adresse,
-                        'geo_id',geo_id,
-                        'geo_score',geo_score,
-                        'indice_repetition',indice_repetition,
-                        'indice_repetition_2',indice_repetition_2,
-                        'latitude',latitude,
-                        'libelle_cedex',libelle_cedex,
-                        'libelle_cedex_2',libelle_cedex_2,
-                        'libelle_commune',libelle_commune,
-                        'libelle_commune_2',libelle_commune_2,
-                        'libelle_commune_etranger',libelle_commune_etranger,
-                        'libelle_commune_etranger_2',libelle_commune_etranger_2,
-                        'libelle_pays_etranger',libelle_pays_etranger,
-                        'libelle_pays_etranger_2',libelle_pays_etranger_2,
-                        'libelle_voie',libelle_voie,
-                        'libelle_voie_2',libelle_voie_2,
-                        'liste_finess',liste_finess,
-                        'liste_id_bio',liste_id_bio,
-                        'liste_idcc',liste_idcc,
-                        'liste_rge',liste_rge,
-                        'liste_uai',liste_uai,
-                        'longitude',longitude,
-                        'nom_commercial',nom_commercial,
-                        'numero_voie',numero_voie,
-                        'numero_voie_2',numero_voie_2,
-                        'siren',siren,
-                        'siret',siret,
-                        'statut_diffusion_etablissement',
-                        statut_diffusion_etablissement,
-                        'tranche_effectif_salarie',tranche_effectif_salarie,
-                        'annee_tranche_effectif_salarie',annee_tranche_effectif_salarie,
-                        'date_mise_a_jour_insee',date_mise_a_jour_insee,
-                        'type_voie',type_voie,
-                        'type_voie_2',type_voie_2,
-                        'x',x,
-                        'y',y
-                        )
-                    ) FROM
-                    (
-                        SELECT
-                        s.activite_principale as activite_principale,
-                        s.activite_principale_registre_metier as
-                        activite_principale_registre_metier,
-                        CASE
-                            WHEN EXISTS (
-                                SELECT 1
-                                FROM ancien_siege
-                                WHERE siret = s.siret
-                                )
-                                THEN TRUE
-                            ELSE FALSE
-                        END AS ancien_siege,
-                        s.caractere_employeur as caractere_employeur,
-                        s.cedex as cedex,
-                        s.cedex_2 as cedex_2,
-                        s.code_pays_etranger as code_pays_etranger,
-                        s.code_pays_etranger_2 as code_pays_etranger_2,
-                        s.code_postal as code_postal,
-                        s.commune as commune,
-                        s.commune_2 as commune_2,
-                        s.complement_adresse as complement_adresse,
-                        s.complement_adresse_2 as complement_adresse_2,
-                        s.date_creation as date_creation,
-                        s.date_debut_activite as date_debut_activite,
-                        s.date_fermeture_etablissement as date_fermeture,
-                        s.distribution_speciale as distribution_speciale,
-                        s.distribution_speciale_2 as distribution_speciale_2,
-                        s.enseigne_1 as enseigne_1,
-                        s.enseigne_2 as enseigne_2,
-                        s.enseigne_3 as enseigne_3,
-                        s.est_siege as est_siege,
-                        s.etat_administratif_etablissement as
-                        etat_administratif_etablissement,
-                        s.geo_adresse as geo_adresse,
-                        s.geo_id as geo_id,
-                        s.geo_score as geo_score,
-                        s.indice_repetition as indice_repetition,
-                        s.indice_repetition_2 as indice_repetition_2,
-                        s.latitude as latitude,
-                        s.libelle_cedex as libelle_cedex,
-                        s.libelle_cedex_2 as libelle_cedex_2,
-                        s.libelle_commune as libelle_commune,
-                        s.libelle_commune_2 as libelle_commune_2,
-                        s.libelle_commune_etranger as libelle_commune_etranger,
-                        s.libelle_commune_etranger_2 as libelle_commune_etranger_2,
-                        s.libelle_pays_etranger as libelle_pays_etranger,
-                        s.libelle_pays_etranger_2 as libelle_pays_etranger_2,
-                        s.libelle_voie as libelle_voie,
-                        s.libelle_voie_2 as libelle_voie_2,
-                        s.longitude as longitude,
-                        (SELECT liste_finess FROM finess WHERE siret = s.siret) as
-                        liste_finess,
-                        (SELECT liste_id_bio FROM agence_bio WHERE siret = s.siret) as
-                        liste_id_bio,
-                        (SELECT liste_idcc_etablissement FROM convention_collective
-                        WHERE siret = s.siret) as liste_idcc,
-                        (SELECT liste_rge FROM rge WHERE siret = s.siret) as liste_rge,
-                        (SELECT liste_uai FROM uai WHERE siret = s.siret) as liste_uai,
-                        s.nom_commercial as nom_commercial,
-                        s.numero_voie as numero_voie,
-                        s.numero_voie_2 as numero_voie_2,
-                        s.siren as siren,
-                        s.siret as siret,
-                        s.statut_diffusion_etablissement as
-                        statut_diffusion_etablissement,
-                        s.tranche_effectif_salarie as
-                        tranche_effectif_salarie,
-                        s.annee_tranche_effectif_salarie as
-                        annee_tranche_effectif_salarie,
-                        s.date_mise_a_jour_insee as date_mise_a_jour_insee,
-                        s.type_voie as type_voie,
-                        s.type_voie_2 as type_voie_2,
-                        s.x as x,
-                        s.y as y
-                        FROM etablissement s
-                        WHERE s.siren = ul.siren
-                    )
-                ) as etablissements,
+            ed.etablissements as etablissements,
+            ed.complements as etablissements_complements,
             (SELECT json_object(
                         'activite_principale',activite_principale,
                         'activite_principale_registre_metier',
@@ -361,14 +216,11 @@ select_fields_to_index_query = """SELECT
                         s.libelle_pays_etranger_2 as libelle_pays_etranger_2,
                         s.libelle_voie as libelle_voie,
                         s.libelle_voie_2 as libelle_voie_2,
-                        (SELECT liste_finess FROM finess WHERE siret = s.siret) as
-                        liste_finess,
-                        (SELECT liste_id_bio FROM agence_bio WHERE siret = s.siret) as
-                        liste_id_bio,
-                        (SELECT liste_idcc_etablissement FROM convention_collective
-                        WHERE siret = s.siret) as liste_idcc,
-                        (SELECT liste_rge FROM rge WHERE siret = s.siret) as liste_rge,
-                        (SELECT liste_uai FROM uai WHERE siret = s.siret) as liste_uai,
+                        ee.liste_finess as liste_finess,
+                        ee.liste_id_bio as liste_id_bio,
+                        ee.liste_idcc as liste_idcc,
+                        ee.liste_rge as liste_rge,
+                        ee.liste_uai as liste_uai,
                         s.longitude as longitude,
                         s.nom_commercial as nom_commercial,
                         s.numero_voie as numero_voie,
@@ -387,21 +239,17 @@ select_fields_to_index_query = """SELECT
                         s.x as x,
                         s.y as y
                         FROM siege as s
+                        LEFT JOIN etab_enrichment ee ON ee.siret = s.siret
                         WHERE s.siren = st.siren
                     )
                 ) as siege,
-            (SELECT est_entrepreneur_spectacle FROM spectacle WHERE siren = ul.siren) as
-             est_entrepreneur_spectacle,
-            (SELECT statut_entrepreneur_spectacle FROM spectacle WHERE siren = ul.siren)
-              as statut_entrepreneur_spectacle,
-            (SELECT egapro_renseignee FROM egapro WHERE siren = ul.siren) as
-             egapro_renseignee,
-            (SELECT colter_code_insee FROM colter WHERE siren = ul.siren) as
-            colter_code_insee,
-            (SELECT colter_code FROM colter WHERE siren = ul.siren) as colter_code,
-            (SELECT colter_niveau FROM colter WHERE siren = ul.siren) as colter_niveau,
-            (SELECT est_ess_france FROM ess_france WHERE siren = ul.siren) as
-            est_ess_france,
+            ue.est_entrepreneur_spectacle as est_entrepreneur_spectacle,
+            ue.statut_entrepreneur_spectacle as statut_entrepreneur_spectacle,
+            ue.egapro_renseignee as egapro_renseignee,
+            ue.colter_code_insee as colter_code_insee,
+            ue.colter_code as colter_code,
+            ue.colter_niveau as colter_niveau,
+            ue.est_ess_france as est_ess_france,
             (SELECT json_group_array(
                 json_object(
                     'siren', siren,
@@ -419,13 +267,10 @@ select_fields_to_index_query = """SELECT
                     WHERE siren = ul.siren
                 )
             ) as colter_elus,
-            (SELECT est_qualiopi FROM organisme_formation WHERE siren = ul.siren) as
-            est_qualiopi,
-            (SELECT liste_id_organisme_formation FROM organisme_formation
-            WHERE siren = ul.siren)  as liste_id_organisme_formation,
-            (SELECT est_siae  FROM marche_inclusion WHERE siren = ul.siren) AS est_siae,
-            (SELECT type_siae FROM marche_inclusion WHERE siren = ul.siren)
-            AS type_siae,
+            ue.est_qualiopi as est_qualiopi,
+            ue.liste_id_organisme_formation as liste_id_organisme_formation,
+            ue.est_siae AS est_siae,
+            ue.type_siae AS type_siae,
             (
                 SELECT json_object(
                     'date_immatriculation', date_immatriculation,
@@ -455,4 +300,60 @@ select_fields_to_index_query = """SELECT
                 siege st
             ON
                 ul.siren = st.siren
+            LEFT JOIN
+                ul_enrichment ue
+            ON
+                ue.siren = ul.siren
+            LEFT JOIN
+                etablissement_document ed
+            ON
+                ed.siren = ul.siren
+            LEFT JOIN
+                slug sl
+            ON
+                sl.siren = ul.siren"""
+
+select_fields_to_index_query = f"""{select_fields_to_index_base_query}
             WHERE ul.siren IS NOT NULL;"""
+
+# Same documents restricted to a SIREN range, so that the index build can be split
+# into partitions processed independently
+select_fields_to_index_by_siren_range_query = f"""{select_fields_to_index_base_query}
+            WHERE ul.siren BETWEEN ? AND ?;"""
+
+# Indexing cost of the unités légales grouped by SIREN prefix : one unit for the
+# unité légale itself and one per établissement. Used to plan balanced partitions.
+select_siren_prefix_weights_query = """SELECT
+            substr(ul.siren, 1, 5) as siren_prefix,
+            SUM(1 + COALESCE(ce.count, 0)) as weight
+            FROM
+                unite_legale ul
+            LEFT JOIN
+                count_etablissement ce
+            ON
+                ce.siren = ul.siren
+            WHERE ul.siren IS NOT NULL
+            GROUP BY siren_prefix
+            ORDER BY siren_prefix;"""
+
+# Delta indexing : same documents and weights restricted to the SIRENs listed in the
+# `delta_siren` table, i.e. changed since the previously indexed database
+select_changed_fields_to_index_by_siren_range_query = f"""{select_fields_to_index_base_query}
+            WHERE ul.siren BETWEEN ? AND ?
+            AND ul.siren IN (SELECT siren FROM delta_siren);"""
+
+select_changed_siren_prefix_weights_query = """SELECT
+            substr(ul.siren, 1, 5) as siren_prefix,
+            SUM(1 + COALESCE(ce.count, 0)) as weight
+            FROM
+                unite_legale ul
+            JOIN
+                delta_siren ds
+            ON
+                ds.siren = ul.siren
+            LEFT JOIN
+                count_etablissement ce
+            ON
+                ce.siren = ul.siren
+            GROUP BY siren_prefix
+            ORDER BY siren_prefix;"""
@@ -14,6 +14,30 @@ from dag_datalake_sirene.helpers.minio_helpers import minio_client
 current_date = datetime.now().date()
 
 
+def download_database(database_date, database_name):
+    """
+    Download and unzip the sirene database of `database_date` saved on MinIO into
+    `AIRFLOW_ELK_DATA_DIR/database_name`.
+    """
+    minio_client.get_files(
+        list_files=[
+            {
+                "source_path": SIRENE_MINIO_DATA_PATH,
+                "source_name": f"sirene_{database_date}.db.gz",
+                "dest_path": AIRFLOW_ELK_DATA_DIR,
+                "dest_name": f"{database_name}.gz",
+            }
+        ],
+    )
+    # Unzip database file
+    db_path = f"{AIRFLOW_ELK_DATA_DIR}{database_name}"
+    with gzip.open(f"{db_path}.gz", "rb") as f_in:
+        with open(db_path, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+    os.remove(f"{db_path}.gz")
+    return db_path
+
+
 def get_latest_database(**kwargs):
     database_files = minio_client.get_files_from_prefix(
         prefix=SIRENE_MINIO_DATA_PATH,
@@ -28,22 +52,8 @@ def get_latest_database(**kwargs):
     if dates:
         last_date = dates[-1]
         logging.info(f"***** Last database saved: {last_date}")
-        minio_client.get_files(
-            list_files=[
-                {
-                    "source_path": SIRENE_MINIO_DATA_PATH,
-                    "source_name": f"sirene_{last_date}.db.gz",
-                    "dest_path": AIRFLOW_ELK_DATA_DIR,
-                    "dest_name": "sirene.db.gz",
-                }
-            ],
-        )
-        # Unzip database file
-        db_path = f"{AIRFLOW_ELK_DATA_DIR}sirene.db"
-        with gzip.open(f"{db_path}.gz", "rb") as f_in:
-            with open(db_path, "wb") as f_out:
-                shutil.copyfileobj(f_in, f_out)
-        os.remove(f"{db_path}.gz")
+        kwargs["ti"].xcom_push(key="sirene_database_date", value=last_date)
+        download_database(last_date, "sirene.db")
 
     else:
         raise Exception(
@@ -1,4 +1,8 @@
+import gzip
 import logging
+import os
+import shutil
+import time
 from datetime import datetime
 from elasticsearch_dsl import connections
 from elasticsearch import NotFoundError
@@ -6,16 +10,35 @@ from elasticsearch import NotFoundError
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.create_index import (
     ElasticCreateIndex,
 )
-from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.helpers.filesystem import (
+    Filesystem,
+    JsonSerializer,
+)
+from dag_datalake_sirene.helpers.flush_cache import invalidate_cache
+from dag_datalake_sirene.helpers.minio_helpers import minio_client
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_READ_ONLY_SCAN,
+    SqliteClient,
+)
 
 # fmt: off
-from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.sqlite.\
-    fields_to_index import (
-    select_fields_to_index_query,
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.\
+    bulk_controller import AdaptiveBulkController
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.\
+    document_hash import finalize_document_hashes, get_changed_sirens
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.\
+    indexing_checkpoint import IndexingCheckpoint
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.\
+    indexing_delta import (
+    compute_changed_sirens,
+    delete_stale_documents,
 )
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.task_functions.\
+    fetch_db import download_database
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.\
     indexing_unite_legale import (
-    index_unites_legales_by_chunk,
+    index_unites_legales_by_partition,
+    plan_siren_ranges,
 )
 # fmt: on
 from dag_datalake_sirene.config import (
@@ -25,20 +48,174 @@ from dag_datalake_sirene.config import (
     ELASTIC_PASSWORD,
     ELASTIC_BULK_THREAD_COUNT,
     ELASTIC_BULK_SIZE,
+    ELASTIC_BULK_MIN_BYTES,
+    ELASTIC_BULK_MAX_BYTES,
+    ELASTIC_BULK_MAX_THREAD_COUNT,
+    ELASTIC_BULK_TARGET_LATENCY,
+    ELASTIC_BULK_MAX_RETRIES,
+    ELASTIC_BULK_RETRY_BACKOFF,
+    ELASTIC_MAX_FAILED_DOCUMENT_RATIO,
+    ELASTIC_DEAD_LETTER_MINIO_PATH,
+    ELASTIC_FAST_SERIALIZATION,
+    ELASTIC_FORCE_MERGE_SEGMENTS,
+    ELASTIC_INDEXING_PROCESS_COUNT,
+    ELASTIC_INDEXING_PARTITION_COUNT,
+    ELASTIC_INDEXING_CHECKPOINT_MINIO_PATH,
+    ELASTIC_FULL_REBUILD_INTERVAL_DAYS,
     ELASTIC_MAX_LIVE_VERSIONS,
+    REDIS_HOST,
+    REDIS_PORT,
+    REDIS_DB,
+    REDIS_PASSWORD,
+    REDIS_INVALIDATION_MAX_SIRENS,
 )
 
+INDEXING_MODE_FULL = "full"
+INDEXING_MODE_DELTA = "delta"
+LATEST_INDEXING_FILENAME = "latest_indexing.json"
+CHANGED_SIRENS_FILENAME = "changed_sirens.json"
+DOCUMENT_HASH_FILENAME = "document_hash.db"
+
+checkpoint_filesystem = Filesystem(
+    minio_client,
+    f"{minio_client.get_root_dirpath()}/{ELASTIC_INDEXING_CHECKPOINT_MINIO_PATH}/",
+    JsonSerializer(),
+)
+
+
+def download_previous_document_hashes():
+    """
+    Download the document hashes of the live index, if any.
+
+    Returns:
+        str | None: local path of the document hashes database.
+    """
+    db_location = f"{AIRFLOW_ELK_DATA_DIR}previous_{DOCUMENT_HASH_FILENAME}"
+    if os.path.exists(db_location):
+        return db_location
+    if not minio_client.get_files_from_prefix(
+        prefix=f"{ELASTIC_INDEXING_CHECKPOINT_MINIO_PATH}/{DOCUMENT_HASH_FILENAME}.gz"
+    ):
+        logging.warning("No document hashes found, every document is changed.")
+        return None
+    minio_client.get_files(
+        list_files=[
+            {
+                "source_path": f"{ELASTIC_INDEXING_CHECKPOINT_MINIO_PATH}/",
+                "source_name": f"{DOCUMENT_HASH_FILENAME}.gz",
+                "dest_path": AIRFLOW_ELK_DATA_DIR,
+                "dest_name": f"previous_{DOCUMENT_HASH_FILENAME}.gz",
+            }
+        ],
+    )
+    with gzip.open(f"{db_location}.gz", "rb") as f_in:
+        with open(db_location, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+    os.remove(f"{db_location}.gz")
+    return db_location
+
+
+def upload_dead_letter_file(dead_letter_filename):
+    if not os.path.exists(AIRFLOW_ELK_DATA_DIR + dead_letter_filename):
+        return
+    minio_client.send_files(
+        list_files=[
+            {
+                "source_path": AIRFLOW_ELK_DATA_DIR,
+                "source_name": dead_letter_filename,
+                "dest_path": f"{ELASTIC_DEAD_LETTER_MINIO_PATH}/",
+                "dest_name": dead_letter_filename,
+            }
+        ],
+    )
+    logging.warning(
+        f"Failed documents uploaded to {ELASTIC_DEAD_LETTER_MINIO_PATH}/"
+        f"{dead_letter_filename}"
+    )
+
+
+def get_indexing_mode(dag_run_conf, latest_indexing):
+    """
+    Choose between a full rebuild of a new index and a delta indexing of the live
+    index. A full rebuild is made every `ELASTIC_FULL_REBUILD_INTERVAL_DAYS` days,
+    and can be forced by triggering the DAG with {"indexing_mode": "full"}.
+    """
+    requested_mode = dag_run_conf.get("indexing_mode")
+    if latest_indexing is None:
+        if requested_mode == INDEXING_MODE_DELTA:
+            logging.warning("No previous indexing found, a full rebuild is needed.")
+        return INDEXING_MODE_FULL
+    if requested_mode in (INDEXING_MODE_FULL, INDEXING_MODE_DELTA):
+        return requested_mode
+    last_full_rebuild = datetime.strptime(
+        latest_indexing["full_rebuild_date"], "%Y-%m-%d"
+    )
+    if (datetime.today() - last_full_rebuild).days >= (
+        ELASTIC_FULL_REBUILD_INTERVAL_DAYS
+    ):
+        return INDEXING_MODE_FULL
+    return INDEXING_MODE_DELTA
+
 
 def get_next_index_name(**kwargs):
-    current_date = datetime.today().strftime("%Y%m%d%H%M%S")
-    elastic_index = f"siren-{current_date}"
+    """
+    Name the index to fill.
+
+    - When the DAG is triggered with {"resume_indexing": true}, the unfinished index
+    of the last indexing checkpoint is reused.
+    - In delta mode, the live index is updated in place.
+    - Otherwise a new index is created.
+    """
+    dag_run = kwargs.get("dag_run")
+    dag_run_conf = (dag_run.conf or {}) if dag_run is not None else {}
+    if dag_run_conf.get("resume_indexing"):
+        checkpoint = IndexingCheckpoint.load(checkpoint_filesystem)
+        if checkpoint is not None and not checkpoint.is_complete:
+            logging.info(f"Resuming the indexing of {checkpoint.elastic_index}")
+            kwargs["ti"].xcom_push(key="elastic_index", value=checkpoint.elastic_index)
+            kwargs["ti"].xcom_push(key="resume_indexing", value=True)
+            kwargs["ti"].xcom_push(key="indexing_mode", value=INDEXING_MODE_FULL)
+            return
+        logging.warning("No unfinished indexing to resume, creating a new index.")
+
+    latest_indexing = checkpoint_filesystem.read(LATEST_INDEXING_FILENAME)
+    indexing_mode = get_indexing_mode(dag_run_conf, latest_indexing)
+    if indexing_mode == INDEXING_MODE_DELTA:
+        connections.create_connection(
+            hosts=[ELASTIC_URL],
+            http_auth=(ELASTIC_USER, ELASTIC_PASSWORD),
+            retry_on_timeout=True,
+        )
+        if not connections.get_connection().indices.exists(
+            index=latest_indexing["elastic_index"]
+        ):
+            logging.warning(
+                f"Index {latest_indexing['elastic_index']} not found, "
+                "a full rebuild is needed."
+            )
+            indexing_mode = INDEXING_MODE_FULL
+    logging.info(f"******************** Indexing mode: {indexing_mode}")
+
+    if indexing_mode == INDEXING_MODE_DELTA:
+        elastic_index = latest_indexing["elastic_index"]
+    else:
+        current_date = datetime.today().strftime("%Y%m%d%H%M%S")
+        elastic_index = f"siren-{current_date}"
     kwargs["ti"].xcom_push(key="elastic_index", value=elastic_index)
+    kwargs["ti"].xcom_push(key="resume_indexing", value=False)
+    kwargs["ti"].xcom_push(key="indexing_mode", value=indexing_mode)
 
 
 def create_elastic_index(**kwargs):
     elastic_index = kwargs["ti"].xcom_pull(
         key="elastic_index", task_ids="get_next_index_name"
     )
+    resume_indexing = kwargs["ti"].xcom_pull(
+        key="resume_indexing", task_ids="get_next_index_name"
+    )
+    indexing_mode = kwargs["ti"].xcom_pull(
+        key="indexing_mode", task_ids="get_next_index_name"
+    )
     logging.info(f"******************** Index to create: {elastic_index}")
     create_index = ElasticCreateIndex(
         elastic_url=ELASTIC_URL,
@@ -46,33 +223,299 @@ def create_elastic_index(**kwargs):
         elastic_user=ELASTIC_USER,
         elastic_password=ELASTIC_PASSWORD,
         elastic_bulk_size=ELASTIC_BULK_SIZE,
+        ingest_profile=indexing_mode == INDEXING_MODE_FULL,
+    )
+    create_index.execute(
+        keep_existing=bool(resume_indexing) or indexing_mode == INDEXING_MODE_DELTA
     )
-    create_index.execute()
 
 
-def fill_elastic_siren_index(**kwargs):
+def plan_siren_partitions(**kwargs):
+    """
+    Plan the SIREN ranges to index and initialize the indexing checkpoint, or
+    reuse the ranges of the checkpoint when resuming the indexing of the same
+    database.
+
+    In delta mode, the SIRENs changed since the previously indexed database are
+    listed first, and only them are weighted.
+    """
     elastic_index = kwargs["ti"].xcom_pull(
         key="elastic_index", task_ids="get_next_index_name"
     )
-    sqlite_client = SqliteClient(AIRFLOW_ELK_DATA_DIR + "sirene.db")
-    sqlite_client.execute(select_fields_to_index_query)
+    resume_indexing = kwargs["ti"].xcom_pull(
+        key="resume_indexing", task_ids="get_next_index_name"
+    )
+    indexing_mode = kwargs["ti"].xcom_pull(
+        key="indexing_mode", task_ids="get_next_index_name"
+    )
+    sirene_database_date = kwargs["ti"].xcom_pull(
+        key="sirene_database_date", task_ids="get_latest_sqlite_db"
+    )
 
-    connections.create_connection(
-        hosts=[ELASTIC_URL],
-        http_auth=(ELASTIC_USER, ELASTIC_PASSWORD),
-        retry_on_timeout=True,
+    if indexing_mode == INDEXING_MODE_DELTA:
+        latest_indexing = checkpoint_filesystem.read(LATEST_INDEXING_FILENAME)
+        previous_db_location = download_database(
+            latest_indexing["sirene_database_date"], "previous_sirene.db"
+        )
+        with SqliteClient(AIRFLOW_ELK_DATA_DIR + "sirene.db") as sqlite_client:
+            compute_changed_sirens(sqlite_client, previous_db_location)
+        os.remove(previous_db_location)
+
+    checkpoint = IndexingCheckpoint.load(checkpoint_filesystem)
+    if not (
+        resume_indexing
+        and checkpoint is not None
+        and checkpoint.can_resume(elastic_index, sirene_database_date)
+    ):
+        # The database does not change anymore once the changed SIRENs are computed
+        with SqliteClient(
+            AIRFLOW_ELK_DATA_DIR + "sirene.db", profile=SQLITE_PROFILE_READ_ONLY_SCAN
+        ) as sqlite_client:
+            siren_ranges = plan_siren_ranges(
+                sqlite_client,
+                ELASTIC_INDEXING_PARTITION_COUNT,
+                only_changed_sirens=indexing_mode == INDEXING_MODE_DELTA,
+            )
+        checkpoint = IndexingCheckpoint(
+            elastic_index=elastic_index,
+            sirene_database_date=sirene_database_date,
+            siren_ranges=[list(siren_range) for siren_range in siren_ranges],
+        )
+        checkpoint.save(checkpoint_filesystem)
+
+    kwargs["ti"].xcom_push(key="siren_ranges", value=checkpoint.siren_ranges)
+
+
+def fill_elastic_siren_index(siren_ranges=None, **kwargs):
+    """
+    Index the SIREN ranges planned by `plan_siren_partitions`.
+
+    Ranges already indexed according to the checkpoint are skipped, so that a retry
+    continues where the previous attempt stopped. `siren_ranges` can be given
+    explicitly to index a subset of the partitions.
+
+    In delta mode, only the changed SIRENs are indexed, then the documents of the
+    removed unités légales are deleted. Documents whose content hash did not change
+    since the last indexing are not sent again.
+
+    The SIRENs whose document changed are saved on MinIO to invalidate their cache,
+    and the documents which failed to be indexed are uploaded to
+    `ELASTIC_DEAD_LETTER_MINIO_PATH`.
+    """
+    elastic_index = kwargs["ti"].xcom_pull(
+        key="elastic_index", task_ids="get_next_index_name"
     )
-    elastic_connection = connections.get_connection()
+    indexing_mode = kwargs["ti"].xcom_pull(
+        key="indexing_mode", task_ids="get_next_index_name"
+    )
+    sirene_database_date = kwargs["ti"].xcom_pull(
+        key="sirene_database_date", task_ids="get_latest_sqlite_db"
+    )
+    if siren_ranges is None:
+        siren_ranges = kwargs["ti"].xcom_pull(
+            key="siren_ranges", task_ids="plan_siren_partitions"
+        )
 
-    doc_count = index_unites_legales_by_chunk(
-        cursor=sqlite_client.db_cursor,
-        elastic_connection=elastic_connection,
-        elastic_bulk_thread_count=ELASTIC_BULK_THREAD_COUNT,
-        elastic_bulk_size=ELASTIC_BULK_SIZE,
+    checkpoint = IndexingCheckpoint.load(checkpoint_filesystem)
+    if checkpoint is None or not checkpoint.can_resume(
+        elastic_index, sirene_database_date
+    ):
+        checkpoint = IndexingCheckpoint(
+            elastic_index=elastic_index,
+            sirene_database_date=sirene_database_date,
+            siren_ranges=[list(siren_range) for siren_range in siren_ranges],
+        )
+    requested_ranges = {tuple(siren_range) for siren_range in siren_ranges}
+    ranges_to_index = [
+        siren_range
+        for siren_range in checkpoint.get_ranges_to_index()
+        if tuple(siren_range) in requested_ranges
+    ]
+    logging.info(
+        f"{len(ranges_to_index)} SIREN ranges to index, "
+        f"{len(checkpoint.indexed_ranges)} already indexed"
+    )
+
+    document_hash_db_location = AIRFLOW_ELK_DATA_DIR + DOCUMENT_HASH_FILENAME
+    previous_document_hash_db_location = download_previous_document_hashes()
+    # Ranges indexed by a previous DAG run are missing from the local hashes
+    are_changed_sirens_complete = not checkpoint.indexed_ranges or os.path.exists(
+        document_hash_db_location
+    )
+
+    create_index = ElasticCreateIndex(
+        elastic_url=ELASTIC_URL,
         elastic_index=elastic_index,
+        elastic_user=ELASTIC_USER,
+        elastic_password=ELASTIC_PASSWORD,
+        ingest_profile=indexing_mode == INDEXING_MODE_FULL,
+    )
+    elastic_connection = create_index.elastic_connection
+    dead_letter_filename = f"{elastic_index}_{datetime.today():%Y%m%d%H%M%S}.ndjson.gz"
+
+    bulk_controller = AdaptiveBulkController(
+        min_bytes=ELASTIC_BULK_MIN_BYTES,
+        max_bytes=ELASTIC_BULK_MAX_BYTES,
+        min_concurrency=1,
+        max_concurrency=ELASTIC_BULK_MAX_THREAD_COUNT,
+        target_latency=ELASTIC_BULK_TARGET_LATENCY,
+        initial_concurrency=ELASTIC_BULK_THREAD_COUNT,
+    )
+    start_time = time.monotonic()
+    create_index.apply_ingest_profile()
+    try:
+        doc_count = index_unites_legales_by_partition(
+            db_location=AIRFLOW_ELK_DATA_DIR + "sirene.db",
+            elastic_connection=elastic_connection,
+            elastic_bulk_thread_count=ELASTIC_BULK_THREAD_COUNT,
+            elastic_bulk_size=ELASTIC_BULK_SIZE,
+            elastic_index=elastic_index,
+            elastic_indexing_process_count=ELASTIC_INDEXING_PROCESS_COUNT,
+            siren_ranges=ranges_to_index,
+            on_partition_indexed=lambda siren_range, count: (
+                checkpoint.mark_range_indexed(checkpoint_filesystem, siren_range, count)
+            ),
+            only_changed_sirens=indexing_mode == INDEXING_MODE_DELTA,
+            document_hash_db_location=document_hash_db_location,
+            previous_document_hash_db_location=previous_document_hash_db_location,
+            skip_unchanged_documents=indexing_mode == INDEXING_MODE_DELTA,
+            bulk_controller=bulk_controller,
+            fast_serialization=ELASTIC_FAST_SERIALIZATION,
+            max_retries=ELASTIC_BULK_MAX_RETRIES,
+            retry_backoff=ELASTIC_BULK_RETRY_BACKOFF,
+            dead_letter_location=AIRFLOW_ELK_DATA_DIR + dead_letter_filename,
+            max_failed_document_ratio=ELASTIC_MAX_FAILED_DOCUMENT_RATIO,
+        )
+        if indexing_mode == INDEXING_MODE_DELTA:
+            with SqliteClient(
+                AIRFLOW_ELK_DATA_DIR + "sirene.db",
+                profile=SQLITE_PROFILE_READ_ONLY_SCAN,
+            ) as sqlite_client:
+                delete_stale_documents(sqlite_client, elastic_connection, elastic_index)
+            doc_count = int(
+                elastic_connection.cat.count(
+                    index=elastic_index, params={"format": "json"}
+                )[0]["count"]
+            )
+    except Exception:
+        # The index must not be left with its indexing settings
+        create_index.restore_settings()
+        raise
+    finally:
+        upload_dead_letter_file(dead_letter_filename)
+    logging.info(
+        f"Index {elastic_index} filled in {time.monotonic() - start_time:.0f}s"
+    )
+    # Settings reached by the end of the indexing, to tune the cluster
+    kwargs["ti"].xcom_push(key="bulk_statistics", value=bulk_controller.get_stats())
+
+    changed_siren_count = finalize_document_hashes(
+        document_hash_db_location,
+        previous_document_hash_db_location,
+        AIRFLOW_ELK_DATA_DIR + "sirene.db",
+    )
+    checkpoint_filesystem.write(
+        CHANGED_SIRENS_FILENAME,
+        {
+            "elastic_index": elastic_index,
+            "changed_sirens": (
+                get_changed_sirens(document_hash_db_location)
+                if are_changed_sirens_complete
+                and changed_siren_count <= REDIS_INVALIDATION_MAX_SIRENS
+                else None
+            ),
+        },
     )
+    if not checkpoint.get_ranges_to_index():
+        checkpoint.is_complete = True
+        checkpoint.save(checkpoint_filesystem)
     kwargs["ti"].xcom_push(key="doc_count", value=doc_count)
-    sqlite_client.commit_and_close_conn()
+
+
+def finalize_elastic_index(**kwargs):
+    """
+    Restore the search settings of the index filled with the ingest profile, after
+    merging its segments on a full rebuild.
+    """
+    elastic_index = kwargs["ti"].xcom_pull(
+        key="elastic_index", task_ids="get_next_index_name"
+    )
+    indexing_mode = kwargs["ti"].xcom_pull(
+        key="indexing_mode", task_ids="get_next_index_name"
+    )
+    create_index = ElasticCreateIndex(
+        elastic_url=ELASTIC_URL,
+        elastic_index=elastic_index,
+        elastic_user=ELASTIC_USER,
+        elastic_password=ELASTIC_PASSWORD,
+        ingest_profile=indexing_mode == INDEXING_MODE_FULL,
+    )
+    create_index.finalize(
+        max_num_segments=(
+            ELASTIC_FORCE_MERGE_SEGMENTS
+            if indexing_mode == INDEXING_MODE_FULL
+            else None
+        )
+    )
+
+
+def update_latest_indexing(**kwargs):
+    """
+    Save the live index, the database it was built from and the hashes of its
+    documents, which the next indexing starts from.
+    """
+    elastic_index = kwargs["ti"].xcom_pull(
+        key="elastic_index", task_ids="get_next_index_name"
+    )
+    indexing_mode = kwargs["ti"].xcom_pull(
+        key="indexing_mode", task_ids="get_next_index_name"
+    )
+    sirene_database_date = kwargs["ti"].xcom_pull(
+        key="sirene_database_date", task_ids="get_latest_sqlite_db"
+    )
+    latest_indexing = checkpoint_filesystem.read(LATEST_INDEXING_FILENAME)
+    if indexing_mode == INDEXING_MODE_FULL or latest_indexing is None:
+        full_rebuild_date = datetime.today().strftime("%Y-%m-%d")
+    else:
+        full_rebuild_date = latest_indexing["full_rebuild_date"]
+    checkpoint_filesystem.write(
+        LATEST_INDEXING_FILENAME,
+        {
+            "elastic_index": elastic_index,
+            "sirene_database_date": sirene_database_date,
+            "full_rebuild_date": full_rebuild_date,
+        },
+    )
+
+    document_hash_db_location = AIRFLOW_ELK_DATA_DIR + DOCUMENT_HASH_FILENAME
+    with open(document_hash_db_location, "rb") as f_in:
+        with gzip.open(f"{document_hash_db_location}.gz", "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+    minio_client.send_files(
+        list_files=[
+            {
+                "source_path": AIRFLOW_ELK_DATA_DIR,
+                "source_name": f"{DOCUMENT_HASH_FILENAME}.gz",
+                "dest_path": f"{ELASTIC_INDEXING_CHECKPOINT_MINIO_PATH}/",
+                "dest_name": f"{DOCUMENT_HASH_FILENAME}.gz",
+            }
+        ],
+    )
+
+
+def invalidate_changed_documents_cache(**kwargs):
+    """
+    Invalidate the API cache of the documents changed by the last indexing, or flush
+    the whole cache when they are unknown or too many.
+    """
+    changed_sirens = checkpoint_filesystem.read(CHANGED_SIRENS_FILENAME) or {}
+    invalidate_cache(
+        REDIS_HOST,
+        REDIS_PORT,
+        REDIS_DB,
+        REDIS_PASSWORD,
+        changed_sirens.get("changed_sirens"),
+    )
 
 
 def check_elastic_index(**kwargs):
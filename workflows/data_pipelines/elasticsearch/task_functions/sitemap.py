@@ -1,12 +1,10 @@
 import os
 
-
-from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.data_enrichment import (
-    format_nom_complet,
-    format_slug,
-)
 from dag_datalake_sirene.helpers.minio_helpers import minio_client
-from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_READ_ONLY_SCAN,
+    SqliteClient,
+)
 from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.sqlite.sitemap import (
     select_sitemap_fields_query,
 )
@@ -17,30 +15,16 @@ from dag_datalake_sirene.config import (
 
 
 def create_sitemap():
-    sqlite_client = SqliteClient(AIRFLOW_ELK_DATA_DIR + "sirene.db")
-    sqlite_client.execute(select_sitemap_fields_query)
+    sqlite_client = SqliteClient(
+        AIRFLOW_ELK_DATA_DIR + "sirene.db", profile=SQLITE_PROFILE_READ_ONLY_SCAN
+    )
 
     if os.path.exists(AIRFLOW_ELK_DATA_DIR + "sitemap-" + AIRFLOW_ENV + ".csv"):
         os.remove(AIRFLOW_ELK_DATA_DIR + "sitemap-" + AIRFLOW_ENV + ".csv")
 
-    chunk_unites_legales_sqlite = 1
-    while chunk_unites_legales_sqlite:
-        chunk_unites_legales_sqlite = sqlite_client.db_cursor.fetchmany(1500)
-
-        unite_legale_columns = tuple(
-            [x[0] for x in sqlite_client.db_cursor.description]
-        )
-        liste_unites_legales_sqlite = []
-        # Group all fetched unites_legales from sqlite in one list
-        for unite_legale in chunk_unites_legales_sqlite:
-            liste_unites_legales_sqlite.append(
-                {
-                    unite_legale_columns: value
-                    for unite_legale_columns, value in zip(
-                        unite_legale_columns, unite_legale
-                    )
-                }
-            )
+    for liste_unites_legales_sqlite in sqlite_client.iter_dicts(
+        select_sitemap_fields_query, batch_size=1500
+    ):
         slugs = ""
         for ul in liste_unites_legales_sqlite:
             if (
@@ -52,22 +36,9 @@ def create_sitemap():
                     ul["code_postal"] = ""
                 if not ul["activite_principale_unite_legale"]:
                     ul["activite_principale_unite_legale"] = ""
-                nom_complet = format_nom_complet(
-                    nom_raison_sociale=ul["nom_raison_sociale"],
-                )
-                slug = format_slug(
-                    nom_complet,
-                    ul["sigle"],
-                    ul["nom_commercial"],
-                    ul["denomination_usuelle_1_unite_legale"],
-                    ul["denomination_usuelle_2_unite_legale"],
-                    ul["denomination_usuelle_3_unite_legale"],
-                    ul["siren"],
-                    ul["statut_diffusion_unite_legale"],
-                )
                 slugs = (
                     f"{slugs}{ul['code_postal']},"
-                    f"{ul['activite_principale_unite_legale']},{slug}\n"
+                    f"{ul['activite_principale_unite_legale']},{ul['slug']}\n"
                 )
 
         with open(AIRFLOW_ELK_DATA_DIR + "sitemap-" + AIRFLOW_ENV + ".csv", "a+") as f:
@@ -22,6 +22,7 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions.\
     create_flux_etablissement_table,
     create_historique_etablissement_table,
     create_siege_table,
+    fill_missing_coordinates,
     insert_date_fermeture_etablissement,
     replace_etablissement_table,
     replace_siege_table,
@@ -40,6 +41,7 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions.\
     create_uai_table,
     create_convention_collective_table,
     create_marche_inclusion_table,
+    merge_additional_tables,
 )
 from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions.\
     create_dirig_benef_tables import (
@@ -63,6 +65,17 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions.\
     add_rne_data_to_unite_legale_table,
     add_ancien_siege_flux_data,
 )
+from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions.\
+    create_enrichment_tables import (
+    create_etab_enrichment_table,
+    create_etablissement_document_table,
+    create_slug_table,
+    create_ul_enrichment_table,
+)
+from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions.\
+    analyze_database import (
+    analyze_sirene_database,
+)
 from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions.\
     create_json_last_modified import (
     create_data_source_last_modified_file,
@@ -72,6 +85,9 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions.\
 from dag_datalake_sirene.workflows.data_pipelines.etl.task_functions.upload_db import (
     upload_db_to_minio,
 )
+from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
+    reset_table_database,
+)
 
 
 from dag_datalake_sirene.config import (
@@ -79,6 +95,7 @@ from dag_datalake_sirene.config import (
     AIRFLOW_ETL_DAG_NAME,
     AIRFLOW_ELK_DAG_NAME,
     EMAIL_LIST,
+    ETL_MAX_ACTIVE_TASKS,
 )
 
 
@@ -104,6 +121,7 @@ default_args = {
     on_failure_callback=Notification.send_notification_tchap,
     on_success_callback=Notification.send_notification_tchap,
     max_active_runs=1,
+    max_active_tasks=ETL_MAX_ACTIVE_TASKS,
 )
 def database_constructor():
     @task.bash
@@ -228,6 +246,12 @@ def database_constructor():
         python_callable=insert_date_fermeture_etablissement,
     )
 
+    fill_missing_coordinates_task = PythonOperator(
+        task_id="fill_missing_coordinates",
+        provide_context=True,
+        python_callable=fill_missing_coordinates,
+    )
+
     get_latest_rne_database_task = PythonOperator(
         task_id="get_rne_database",
         provide_context=True,
@@ -296,23 +320,17 @@ def database_constructor():
 
         @task(task_id=f"create_{processor.config.name}_table")
         def create_table(**kwargs):
-            processor.etl_create_table(SIRENE_DATABASE_LOCATION)
+            processor.etl_create_table(reset_table_database(processor.config.name))
 
         task_instance = create_table()
         tasks.append(task_instance)
 
-    create_finess_table_task >> tasks[0]
-    for i in range(len(tasks) - 1):
-        tasks[i] >> tasks[i + 1]
-
     create_organisme_formation_table_task = PythonOperator(
         task_id="create_organisme_formation_table",
         provide_context=True,
         python_callable=create_organisme_formation_table,
     )
 
-    tasks[-1] >> create_organisme_formation_table_task
-
     create_uai_table_task = PythonOperator(
         task_id="create_uai_table",
         provide_context=True,
@@ -349,6 +367,42 @@ def database_constructor():
         python_callable=create_marche_inclusion_table,
     )
 
+    merge_additional_tables_task = PythonOperator(
+        task_id="merge_additional_tables",
+        provide_context=True,
+        python_callable=merge_additional_tables,
+    )
+
+    create_ul_enrichment_table_task = PythonOperator(
+        task_id="create_ul_enrichment_table",
+        provide_context=True,
+        python_callable=create_ul_enrichment_table,
+    )
+
+    create_etab_enrichment_table_task = PythonOperator(
+        task_id="create_etab_enrichment_table",
+        provide_context=True,
+        python_callable=create_etab_enrichment_table,
+    )
+
+    create_etablissement_document_table_task = PythonOperator(
+        task_id="create_etablissement_document_table",
+        provide_context=True,
+        python_callable=create_etablissement_document_table,
+    )
+
+    create_slug_table_task = PythonOperator(
+        task_id="create_slug_table",
+        provide_context=True,
+        python_callable=create_slug_table,
+    )
+
+    analyze_database_task = PythonOperator(
+        task_id="analyze_database",
+        provide_context=True,
+        python_callable=analyze_sirene_database,
+    )
+
     send_database_to_minio_task = PythonOperator(
         task_id="upload_db_to_minio",
         provide_context=True,
@@ -373,7 +427,8 @@ def database_constructor():
         deferrable=False,
     )
 
-    clean_previous_tmp_folder() >> create_unite_legale_table_task
+    clean_previous_tmp_folder_task = clean_previous_tmp_folder()
+    clean_previous_tmp_folder_task >> create_unite_legale_table_task
 
     create_historique_unite_legale_table_task.set_upstream(
         create_unite_legale_table_task
@@ -410,29 +465,55 @@ def database_constructor():
         create_date_fermeture_etablissement_table_task
     )
 
-    get_latest_rne_database_task.set_upstream(insert_date_fermeture_etablissement_task)
-    inject_rne_unite_legale_data_task.set_upstream(get_latest_rne_database_task)
+    fill_missing_coordinates_task.set_upstream(insert_date_fermeture_etablissement_task)
+    get_latest_rne_database_task.set_upstream(clean_previous_tmp_folder_task)
+    inject_rne_unite_legale_data_task.set_upstream(
+        [fill_missing_coordinates_task, get_latest_rne_database_task]
+    )
     inject_rne_siege_data_task.set_upstream(inject_rne_unite_legale_data_task)
-    create_dirig_pp_table_task.set_upstream(inject_rne_siege_data_task)
-    create_dirig_pm_table_task.set_upstream(create_dirig_pp_table_task)
-    create_benef_table_task.set_upstream(create_dirig_pm_table_task)
-    create_immatriculation_table_task.set_upstream(create_benef_table_task)
-
-    create_bilan_financier_table_task.set_upstream(create_immatriculation_table_task)
-    create_convention_collective_table_task.set_upstream(
-        create_bilan_financier_table_task
-    )
-    create_ess_table_task.set_upstream(create_convention_collective_table_task)
-    create_rge_table_task.set_upstream(create_ess_table_task)
-    create_finess_table_task.set_upstream(create_rge_table_task)
-    create_uai_table_task.set_upstream(create_organisme_formation_table_task)
-    create_spectacle_table_task.set_upstream(create_uai_table_task)
-    create_egapro_table_task.set_upstream(create_spectacle_table_task)
-    create_colter_table_task.set_upstream(create_egapro_table_task)
-    create_elu_table_task.set_upstream(create_colter_table_task)
-    create_marche_inclusion_table_task.set_upstream(create_elu_table_task)
-
-    send_database_to_minio_task.set_upstream(create_marche_inclusion_table_task)
+
+    # The additional tables are built into their own databases, concurrently with
+    # the tables of the unités légales and établissements, then merged
+    rne_table_tasks = [
+        create_dirig_pp_table_task,
+        create_dirig_pm_table_task,
+        create_benef_table_task,
+        create_immatriculation_table_task,
+    ]
+    for rne_table_task in rne_table_tasks:
+        rne_table_task.set_upstream(get_latest_rne_database_task)
+
+    data_source_table_tasks = [
+        create_bilan_financier_table_task,
+        create_convention_collective_table_task,
+        create_ess_table_task,
+        create_rge_table_task,
+        create_finess_table_task,
+        *tasks,
+        create_organisme_formation_table_task,
+        create_uai_table_task,
+        create_spectacle_table_task,
+        create_egapro_table_task,
+        create_colter_table_task,
+        create_elu_table_task,
+        create_marche_inclusion_table_task,
+    ]
+    for data_source_table_task in data_source_table_tasks:
+        data_source_table_task.set_upstream(clean_previous_tmp_folder_task)
+
+    merge_additional_tables_task.set_upstream(
+        [inject_rne_siege_data_task, *rne_table_tasks, *data_source_table_tasks]
+    )
+    create_ul_enrichment_table_task.set_upstream(merge_additional_tables_task)
+    create_etab_enrichment_table_task.set_upstream(create_ul_enrichment_table_task)
+
+    create_etablissement_document_table_task.set_upstream(
+        create_etab_enrichment_table_task
+    )
+
+    create_slug_table_task.set_upstream(create_etablissement_document_table_task)
+    analyze_database_task.set_upstream(create_slug_table_task)
+    send_database_to_minio_task.set_upstream(analyze_database_task)
     create_data_source_last_modified_file_task.set_upstream(send_database_to_minio_task)
 
     (
@@ -1,27 +1,97 @@
+import json
 import logging
+import os
 import pandas as pd
 import requests
 import minio
-import shutil
 from datetime import datetime
 from airflow.exceptions import AirflowSkipException
 from dag_datalake_sirene.helpers.minio_helpers import minio_client
+from dag_datalake_sirene.helpers.utils import (
+    download_file,
+    iter_parquet_chunks,
+    read_parquet_file,
+)
 from dag_datalake_sirene.config import (
     URL_STOCK_ETABLISSEMENTS,
 )
 from dag_datalake_sirene.workflows.data_pipelines.sirene.flux.config import (
+    FLUX_ETABLISSEMENT_COLUMNS,
     FLUX_SIRENE_CONFIG,
 )
 from dag_datalake_sirene.workflows.data_pipelines.sirene.stock.config import (
+    HISTORIQUE_ETABLISSEMENT_COLUMNS,
     STOCK_SIRENE_CONFIG,
 )
 
 
-def download_stock(departement):
+def get_stock_file_path(departement, data_dir):
+    return f"{data_dir}geo_siret_{departement}.csv.gz"
+
+
+def read_validators(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path) as validators_file:
+        return json.load(validators_file)
+
+
+def download_stock(departement, data_dir):
+    """
+    Download the file of the établissements of a département into `data_dir`,
+    unless it did not change since the previous download.
+
+    The ETag and Last-Modified headers of each download are stored next to the
+    file, to make the request conditional the next time. The file is downloaded
+    into a `.part` file first, whose download is resumed if it was interrupted.
+
+    Returns:
+        str: local path of the file of the département.
+    """
     url = f"{URL_STOCK_ETABLISSEMENTS}_{departement}.csv.gz"
-    logging.info(f"Département file url: {url}")
+    file_path = get_stock_file_path(departement, data_dir)
+    part_path = f"{file_path}.part"
+    validators = read_validators(f"{file_path}.json")
+    part_validators = read_validators(f"{part_path}.json")
+
+    headers = {}
+    if os.path.exists(part_path) and part_validators.get("etag"):
+        # Only the missing bytes, if the file did not change in the meantime
+        headers["Range"] = f"bytes={os.path.getsize(part_path)}-"
+        headers["If-Range"] = part_validators["etag"]
+    elif os.path.exists(file_path):
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
+    with requests.get(url, headers=headers, stream=True, timeout=60) as response:
+        if response.status_code == 304:
+            logging.info(f"Département file unchanged: {url}")
+            return file_path
+        response.raise_for_status()
+        logging.info(f"Downloading département file: {url}")
+        if response.status_code != 206:
+            with open(f"{part_path}.json", "w") as validators_file:
+                json.dump(
+                    {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                    },
+                    validators_file,
+                )
+        with open(part_path, "ab" if response.status_code == 206 else "wb") as file:
+            for chunk in response.iter_content(chunk_size=1024 * 1024):
+                file.write(chunk)
+
+    os.replace(part_path, file_path)
+    os.replace(f"{part_path}.json", f"{file_path}.json")
+    return file_path
+
+
+def read_stock(file_path):
     df_dep = pd.read_csv(
-        url,
+        file_path,
         compression="gzip",
         dtype=str,
         usecols=[
@@ -90,65 +160,15 @@ def download_flux(data_dir):
             list_files=[
                 {
                     "source_path": FLUX_SIRENE_CONFIG.minio_path,
-                    "source_name": f"flux_etablissement_{year_month}.csv.gz",
+                    "source_name": f"flux_etablissement_{year_month}.parquet",
                     "dest_path": f"{data_dir}",
-                    "dest_name": f"flux_etablissement_{year_month}.csv.gz",
+                    "dest_name": f"flux_etablissement_{year_month}.parquet",
                 }
             ],
         )
-        df_flux = pd.read_csv(
-            f"{data_dir}flux_etablissement_{year_month}.csv.gz",
-            dtype=str,
-            compression="gzip",
-            usecols=[
-                "siren",
-                "siret",
-                "dateCreationEtablissement",
-                "trancheEffectifsEtablissement",
-                "caractereEmployeurEtablissement",
-                "anneeEffectifsEtablissement",
-                "dateDernierTraitementEtablissement",
-                "activitePrincipaleRegistreMetiersEtablissement",
-                "etablissementSiege",
-                "numeroVoieEtablissement",
-                "libelleVoieEtablissement",
-                "codePostalEtablissement",
-                "libelleCommuneEtablissement",
-                "libelleCedexEtablissement",
-                "typeVoieEtablissement",
-                "codeCommuneEtablissement",
-                "codeCedexEtablissement",
-                "complementAdresseEtablissement",
-                "distributionSpecialeEtablissement",
-                "complementAdresse2Etablissement",
-                "indiceRepetition2Etablissement",
-                "libelleCedex2Etablissement",
-                "codeCedex2Etablissement",
-                "numeroVoie2Etablissement",
-                "typeVoie2Etablissement",
-                "libelleVoie2Etablissement",
-                "codeCommune2Etablissement",
-                "libelleCommune2Etablissement",
-                "distributionSpeciale2Etablissement",
-                "dateDebut",
-                "etatAdministratifEtablissement",
-                "enseigne1Etablissement",
-                "enseigne1Etablissement",
-                "enseigne2Etablissement",
-                "enseigne3Etablissement",
-                "denominationUsuelleEtablissement",
-                "activitePrincipaleEtablissement",
-                "indiceRepetitionEtablissement",
-                "libelleCommuneEtrangerEtablissement",
-                "codePaysEtrangerEtablissement",
-                "libellePaysEtrangerEtablissement",
-                "libelleCommuneEtranger2Etablissement",
-                "codePaysEtranger2Etablissement",
-                "libellePaysEtranger2Etablissement",
-                "statutDiffusionEtablissement",
-                "coordonneeLambertAbscisseEtablissement",
-                "coordonneeLambertOrdonneeEtablissement",
-            ],
+        df_flux = read_parquet_file(
+            f"{data_dir}flux_etablissement_{year_month}.parquet",
+            FLUX_ETABLISSEMENT_COLUMNS,
         )
         return df_flux
     # At the start of each month, a new stock file is published on data.gouv.
@@ -163,23 +183,19 @@ def download_flux(data_dir):
 
 
 def download_historique(data_dir):
-    r = requests.get(
-        f"{STOCK_SIRENE_CONFIG.url_minio}StockEtablissementHistorique_utf8.zip",
-        allow_redirects=True,
+    download_file(
+        f"{STOCK_SIRENE_CONFIG.url_minio}StockEtablissementHistorique_utf8.parquet",
+        f"{data_dir}StockEtablissementHistorique_utf8.parquet",
     )
-    open(data_dir + "StockEtablissementHistorique_utf8.zip", "wb").write(r.content)
-    shutil.unpack_archive(data_dir + "StockEtablissementHistorique_utf8.zip", data_dir)
-    df_iterator = pd.read_csv(
-        f"{data_dir}StockEtablissementHistorique_utf8.csv",
-        chunksize=100000,
-        dtype=str,
+    return iter_parquet_chunks(
+        f"{data_dir}StockEtablissementHistorique_utf8.parquet",
+        HISTORIQUE_ETABLISSEMENT_COLUMNS,
     )
-    return df_iterator
 
 
 def preprocess_etablissement_data(siret_file_type, departement=None, data_dir=None):
     if siret_file_type == "stock":
-        df_etablissement = download_stock(departement)
+        df_etablissement = read_stock(get_stock_file_path(departement, data_dir))
     if siret_file_type == "flux":
         df_etablissement = download_flux(data_dir)
 
@@ -1,4 +1,5 @@
 import pandas as pd
+from dag_datalake_sirene.helpers.utils import to_json
 from dag_datalake_sirene.workflows.data_pipelines.uai.config import UAI_CONFIG
 
 
@@ -8,7 +9,7 @@ def preprocess_uai_data(data_dir):
         df_uai.groupby(["siret"])["uai"].apply(list).reset_index(name="liste_uai")
     )
     df_list_uai = df_list_uai[["siret", "liste_uai"]]
-    df_list_uai["liste_uai"] = df_list_uai["liste_uai"].astype(str)
+    df_list_uai["liste_uai"] = df_list_uai["liste_uai"].map(to_json)
     del df_uai
 
     return df_list_uai
@@ -1,47 +1,41 @@
 from datetime import datetime
 import ast
-import shutil
 import logging
 import minio
-import pandas as pd
-import requests
 from airflow.exceptions import AirflowSkipException
 from dag_datalake_sirene.helpers.minio_helpers import minio_client
+from dag_datalake_sirene.helpers.utils import download_file, iter_parquet_chunks
 
 from dag_datalake_sirene.workflows.data_pipelines.sirene.flux.config import (
     FLUX_SIRENE_CONFIG,
+    FLUX_UNITE_LEGALE_COLUMNS,
 )
 from dag_datalake_sirene.workflows.data_pipelines.sirene.stock.config import (
+    HISTORIQUE_UNITE_LEGALE_COLUMNS,
     STOCK_SIRENE_CONFIG,
+    STOCK_UNITE_LEGALE_COLUMNS,
 )
 
 
 def download_historique(data_dir):
-    r = requests.get(
-        f"{STOCK_SIRENE_CONFIG.url_minio}StockUniteLegaleHistorique_utf8.zip",
-        allow_redirects=True,
+    download_file(
+        f"{STOCK_SIRENE_CONFIG.url_minio}StockUniteLegaleHistorique_utf8.parquet",
+        f"{data_dir}StockUniteLegaleHistorique_utf8.parquet",
     )
-    open(data_dir + "StockUniteLegaleHistorique_utf8.zip", "wb").write(r.content)
-    shutil.unpack_archive(data_dir + "StockUniteLegaleHistorique_utf8.zip", data_dir)
-    df_iterator = pd.read_csv(
-        f"{data_dir}StockUniteLegaleHistorique_utf8.csv",
-        chunksize=100000,
-        dtype=str,
+    return iter_parquet_chunks(
+        f"{data_dir}StockUniteLegaleHistorique_utf8.parquet",
+        HISTORIQUE_UNITE_LEGALE_COLUMNS,
     )
-    return df_iterator
 
 
 def download_stock(data_dir):
-    r = requests.get(
-        f"{STOCK_SIRENE_CONFIG.url_minio}StockUniteLegale_utf8.zip",
-        allow_redirects=True,
+    download_file(
+        f"{STOCK_SIRENE_CONFIG.url_minio}StockUniteLegale_utf8.parquet",
+        f"{data_dir}StockUniteLegale_utf8.parquet",
     )
-    open(data_dir + "StockUniteLegale_utf8.zip", "wb").write(r.content)
-    shutil.unpack_archive(data_dir + "StockUniteLegale_utf8.zip", data_dir)
-    df_iterator = pd.read_csv(
-        f"{data_dir}StockUniteLegale_utf8.csv", chunksize=100000, dtype=str
+    return iter_parquet_chunks(
+        f"{data_dir}StockUniteLegale_utf8.parquet", STOCK_UNITE_LEGALE_COLUMNS
     )
-    return df_iterator
 
 
 def download_flux(data_dir):
@@ -52,19 +46,16 @@ def download_flux(data_dir):
             list_files=[
                 {
                     "source_path": FLUX_SIRENE_CONFIG.minio_path,
-                    "source_name": f"flux_unite_legale_{year_month}.csv.gz",
+                    "source_name": f"flux_unite_legale_{year_month}.parquet",
                     "dest_path": f"{data_dir}",
-                    "dest_name": f"flux_unite_legale_{year_month}.csv.gz",
+                    "dest_name": f"flux_unite_legale_{year_month}.parquet",
                 }
             ],
         )
-        df_iterator = pd.read_csv(
-            f"{data_dir}flux_unite_legale_{year_month}.csv.gz",
-            chunksize=100000,
-            dtype=str,
-            compression="gzip",
+        return iter_parquet_chunks(
+            f"{data_dir}flux_unite_legale_{year_month}.parquet",
+            FLUX_UNITE_LEGALE_COLUMNS,
         )
-        return df_iterator
     except minio.error.S3Error as e:
         logging.warning(f"No flux data has been found for: {year_month}")
         if e.code == "NoSuchKey":
@@ -1,14 +1,26 @@
 import logging
+import os
+import time
+from contextlib import contextmanager
 
+from airflow.operators.python import get_current_context
 
-from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_BULK_BUILD,
+    SQLITE_PROFILE_SCRATCH_BUILD,
+    SqliteClient,
+)
+from dag_datalake_sirene.helpers.utils import str_to_json
 
 
 from dag_datalake_sirene.config import (
     AIRFLOW_ETL_DATA_DIR,
+    ETL_ADDITIONAL_TABLES_DATA_DIR,
     SIRENE_DATABASE_LOCATION,
 )
 
+INDEX_DURATIONS_XCOM_KEY = "index_durations"
+
 
 def drop_table(name):
     return f"""DROP TABLE IF EXISTS {name}"""
@@ -32,41 +44,129 @@ def get_table_count(name):
     return f"""SELECT COUNT() FROM {name};"""
 
 
-def create_and_fill_table_model(
+def push_index_duration(index_name, duration):
+    """
+    Add the creation time of an index, in seconds, to the ones pushed to XCom by the
+    current task, reported in the notification of the DAG by the task analyzing the
+    database.
+    """
+    ti = get_current_context()["ti"]
+    index_durations = ti.xcom_pull(task_ids=ti.task_id, key=INDEX_DURATIONS_XCOM_KEY)
+    ti.xcom_push(
+        key=INDEX_DURATIONS_XCOM_KEY,
+        value={**(index_durations or {}), index_name: duration},
+    )
+
+
+def create_timed_index(
+    sqlite_client, create_index_func, index_name, table_name, index_column
+):
+    start_time = time.perf_counter()
+    sqlite_client.execute(create_index_func(index_name, table_name, index_column))
+    duration = round(time.perf_counter() - start_time, 1)
+    logging.info(f"************ {index_name} index created in {duration}s!")
+    push_index_duration(index_name, duration)
+
+
+def insert_dataframe(sqlite_client, table_name, df):
+    """
+    Append the rows of a DataFrame to an existing table, like
+    `DataFrame.to_sql(if_exists="append", index=False)` but with a single
+    `executemany` of one prepared statement, missing values being stored as NULL.
+
+    The rows are inserted in the current transaction, committed by the caller.
+    Return the number of rows inserted.
+    """
+    columns = ", ".join(f'"{column}"' for column in df.columns)
+    placeholders = ", ".join("?" * len(df.columns))
+    # Python objects (str, int, float...) bound as they are by sqlite3
+    rows = zip(
+        *(df[column].to_numpy(dtype=object, na_value=None) for column in df.columns)
+    )
+    sqlite_client.execute_many(
+        f"INSERT INTO {table_name} ({columns}) VALUES ({placeholders})", rows
+    )
+    return len(df)
+
+
+@contextmanager
+def bulk_load_table_model(
     table_name,
     create_table_query,
     create_index_func,
     index_name,
     index_column,
-    preprocess_table_data,
+    db_location=SIRENE_DATABASE_LOCATION,
+    profile=SQLITE_PROFILE_BULK_BUILD,
 ):
-    sqlite_client = SqliteClient(SIRENE_DATABASE_LOCATION)
-    sqlite_client.execute(drop_table(table_name))
-    sqlite_client.execute(create_table_query)
-    sqlite_client.execute(create_index_func(index_name, table_name, index_column))
-    df_table = preprocess_table_data(data_dir=AIRFLOW_ETL_DATA_DIR)
-    df_table.to_sql(table_name, sqlite_client.db_conn, if_exists="append", index=False)
-    del df_table
-    for row in sqlite_client.execute(get_table_count(table_name)):
-        logging.info(
-            f"************ {row} total records have been added to the "
-            f"{table_name} table!"
+    """
+    Create a table, and yield a client of the bulk_build profile (or `profile`) to
+    fill it (see `insert_dataframe`). The index of the table is created once it is
+    filled, which is faster than filling an indexed table, then the table is
+    committed and the connection closed.
+    """
+    with SqliteClient(db_location, profile=profile) as sqlite_client:
+        sqlite_client.execute(drop_table(table_name))
+        sqlite_client.execute(create_table_query)
+        yield sqlite_client
+        create_timed_index(
+            sqlite_client, create_index_func, index_name, table_name, index_column
         )
-    sqlite_client.commit_and_close_conn()
 
 
-def create_table_model(
+def get_table_database_location(table_name):
+    """Database in which an additional table is built, before being merged."""
+    return f"{ETL_ADDITIONAL_TABLES_DATA_DIR}{table_name}.db"
+
+
+def reset_table_database(table_name):
+    """
+    Delete the database of an additional table left by a previous attempt of the
+    task, which may be corrupted as it is built without journal (scratch_build
+    profile), and return its location.
+    """
+    db_location = get_table_database_location(table_name)
+    if os.path.exists(db_location):
+        os.remove(db_location)
+    return db_location
+
+
+def create_and_fill_table_model(
     table_name,
     create_table_query,
     create_index_func,
     index_name,
     index_column,
+    preprocess_table_data,
+    json_columns=(),
 ):
-    sqlite_client = SqliteClient(SIRENE_DATABASE_LOCATION)
-    sqlite_client.execute(drop_table(table_name))
-    sqlite_client.execute(create_table_query)
-    sqlite_client.execute(create_index_func(index_name, table_name, index_column))
-    return sqlite_client
+    """
+    Create a table from the data returned by `preprocess_table_data`, the lists and
+    dicts of `json_columns` being stored as JSON (see `str_to_json`), so that they
+    are parsed quickly and can be queried with the JSON functions of SQLite.
+
+    The table is created in its own database (see `get_table_database_location`),
+    so that the tables are built concurrently, and later merged into the SIRENE
+    database with `merge_table_databases`.
+    """
+    df_table = preprocess_table_data(data_dir=AIRFLOW_ETL_DATA_DIR)
+    for column in json_columns:
+        df_table[column] = df_table[column].map(str_to_json)
+    with bulk_load_table_model(
+        table_name,
+        create_table_query,
+        create_index_func,
+        index_name,
+        index_column,
+        db_location=reset_table_database(table_name),
+        profile=SQLITE_PROFILE_SCRATCH_BUILD,
+    ) as sqlite_client:
+        row_count = insert_dataframe(sqlite_client, table_name, df_table)
+    del df_table
+    logging.info(
+        f"************ {row_count} total records have been added to the "
+        f"{table_name} table!"
+    )
 
 
 def create_only_index(
@@ -74,15 +174,76 @@ def create_only_index(
     create_index_func,
     index_name,
     index_column,
+    db_location=SIRENE_DATABASE_LOCATION,
+    profile=SQLITE_PROFILE_BULK_BUILD,
 ):
-    sqlite_client = SqliteClient(SIRENE_DATABASE_LOCATION)
-    sqlite_client.execute(create_index_func(index_name, table_name, index_column))
+    sqlite_client = SqliteClient(db_location, profile=profile)
+    create_timed_index(
+        sqlite_client, create_index_func, index_name, table_name, index_column
+    )
     sqlite_client.commit_and_close_conn()
 
 
 def execute_query(
     query,
+    db_location=SIRENE_DATABASE_LOCATION,
 ):
-    sqlite_client = SqliteClient(SIRENE_DATABASE_LOCATION)
+    sqlite_client = SqliteClient(db_location)
     sqlite_client.execute(query)
     sqlite_client.commit_and_close_conn()
+
+
+def merge_table_databases(db_location, table_db_locations):
+    """
+    Copy the tables of the databases of `table_db_locations` into the database of
+    `db_location`, replacing the tables of the same name, then delete them.
+
+    The indexes are created before the tables are filled : copying a whole table
+    into an empty one with the same indexes, SQLite copies the pages of the indexes
+    already built instead of building them again.
+    """
+    with SqliteClient(db_location, profile=SQLITE_PROFILE_BULK_BUILD) as sqlite_client:
+        for table_db_location in table_db_locations:
+            sqlite_client.connect_to_another_db(table_db_location, "table_db")
+            tables = sqlite_client.execute(
+                """SELECT name, sql FROM table_db.sqlite_master
+                WHERE type = 'table'"""
+            ).fetchall()
+            for table_name, sql in tables:
+                # Unqualified, the table of the attached database would be dropped
+                # if the main database has none
+                sqlite_client.drop_table(f"main.{table_name}")
+                sqlite_client.execute(sql)
+                for (index_sql,) in sqlite_client.execute(
+                    """SELECT sql FROM table_db.sqlite_master
+                    WHERE type = 'index' AND tbl_name = ? AND sql IS NOT NULL""",
+                    (table_name,),
+                ).fetchall():
+                    sqlite_client.execute(index_sql)
+                start_time = time.perf_counter()
+                sqlite_client.execute(
+                    f"INSERT INTO main.{table_name} SELECT * FROM table_db.{table_name}"
+                )
+                logging.info(
+                    f"************ {sqlite_client.get_table_count(table_name)} "
+                    f"records of the {table_name} table have been merged in "
+                    f"{time.perf_counter() - start_time:.1f}s!"
+                )
+            # Databases cannot be detached within a transaction
+            sqlite_client.db_conn.commit()
+            sqlite_client.detach_database("table_db")
+            os.remove(table_db_location)
+
+
+def analyze_database(db_location):
+    """
+    Gather the statistics of the tables and indexes used by the query planner, once
+    the database is built. Return the time it took, in seconds.
+    """
+    start_time = time.perf_counter()
+    with SqliteClient(db_location, profile=SQLITE_PROFILE_BULK_BUILD) as sqlite_client:
+        # Statistics from a sample of each index, enough for the query planner
+        sqlite_client.execute("PRAGMA analysis_limit = 1000")
+        sqlite_client.execute("ANALYZE")
+        sqlite_client.execute("PRAGMA optimize")
+    return round(time.perf_counter() - start_time, 1)
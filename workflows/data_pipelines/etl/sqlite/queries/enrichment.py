@@ -0,0 +1,244 @@
+# Data of the auxiliary tables indexed with each unité légale and établissement,
+# pre-aggregated into one row per SIREN or SIRET so that the indexing query joins
+# them instead of running one subquery per field.
+#
+# Columns of the enrichment tables taken from each auxiliary table, with the
+# expression reading them.
+UL_ENRICHMENT_SOURCES = {
+    "convention_collective": {
+        "sirets_par_idcc": "sirets_par_idcc",
+        "liste_idcc_unite_legale": "liste_idcc_unite_legale",
+    },
+    "count_etablissement": {"nombre_etablissements": "count"},
+    "count_etablissement_ouvert": {"nombre_etablissements_ouverts": "count"},
+    "spectacle": {
+        "est_entrepreneur_spectacle": "est_entrepreneur_spectacle",
+        "statut_entrepreneur_spectacle": "statut_entrepreneur_spectacle",
+    },
+    "egapro": {"egapro_renseignee": "egapro_renseignee"},
+    "colter": {
+        "colter_code_insee": "colter_code_insee",
+        "colter_code": "colter_code",
+        "colter_niveau": "colter_niveau",
+    },
+    "ess_france": {"est_ess_france": "est_ess_france"},
+    "organisme_formation": {
+        "est_qualiopi": "est_qualiopi",
+        "liste_id_organisme_formation": "liste_id_organisme_formation",
+    },
+    "marche_inclusion": {"est_siae": "est_siae", "type_siae": "type_siae"},
+}
+
+ETAB_ENRICHMENT_SOURCES = {
+    "ancien_siege": {"ancien_siege": "TRUE"},
+    "finess": {"liste_finess": "liste_finess"},
+    "agence_bio": {"liste_id_bio": "liste_id_bio"},
+    "convention_collective": {"liste_idcc": "liste_idcc_etablissement"},
+    "rge": {"liste_rge": "liste_rge"},
+    "uai": {"liste_uai": "liste_uai"},
+}
+
+
+def create_table_enrichment_query(table_name, key, sources):
+    # The key is left untyped, as in the auxiliary tables, so that it is compared
+    # with the unités légales and établissements the same way
+    columns = [column for source in sources.values() for column in source]
+    return f"""CREATE TABLE IF NOT EXISTS {table_name}
+        (
+            {key} PRIMARY KEY,
+            {", ".join(columns)}
+        ) WITHOUT ROWID"""
+
+
+def fill_enrichment_table_query(table_name, key, source_table, columns):
+    """
+    Copy the columns of the first row of each key of `source_table`, as the
+    subqueries `(SELECT column FROM source_table WHERE key = ...)` would read them.
+    """
+    return f"""INSERT INTO {table_name} ({key}, {", ".join(columns)})
+        SELECT {key}, {", ".join(columns.values())}
+        FROM {source_table}
+        WHERE rowid IN (
+            SELECT MIN(rowid) FROM {source_table}
+            WHERE {key} IS NOT NULL
+            GROUP BY {key}
+        )
+        ON CONFLICT({key}) DO UPDATE SET
+        {", ".join(f"{column} = excluded.{column}" for column in columns)};"""
+
+
+# Établissements of each unité légale, formatted once by the ETL into a JSON list
+# read as is by the indexing query, along with their complements
+create_table_etablissement_document_query = """CREATE TABLE IF NOT EXISTS
+        etablissement_document
+        (
+            siren TEXT PRIMARY KEY,
+            etablissements TEXT,
+            complements TEXT
+        ) WITHOUT ROWID"""
+
+select_etablissements_by_siren_range_query = """SELECT
+        ul.siren,
+        ul.statut_diffusion_unite_legale as statut_diffusion_unite_legale,
+        (SELECT json_group_array(
+                json_object(
+                    'activite_principale',activite_principale,
+                    'activite_principale_registre_metier',
+                    activite_principale_registre_metier,
+                    'ancien_siege',ancien_siege,
+                    'caractere_employeur',caractere_employeur,
+                    'cedex',cedex,
+                    'cedex_2',cedex_2,
+                    'code_pays_etranger',code_pays_etranger,
+                    'code_pays_etranger_2',code_pays_etranger_2,
+                    'code_postal',code_postal,
+                    'commune',commune,
+                    'commune_2',commune_2,
+                    'complement_adresse',complement_adresse,
+                    'complement_adresse_2',complement_adresse_2,
+                    'date_creation',date_creation,
+                    'date_debut_activite',date_debut_activite,
+                    'date_fermeture',date_fermeture,
+                    'distribution_speciale',distribution_speciale,
+                    'distribution_speciale_2',distribution_speciale_2,
+                    'enseigne_1',enseigne_1,
+                    'enseigne_2',enseigne_2,
+                    'enseigne_3',enseigne_3,
+                    'est_siege',est_siege,
+                    'etat_administratif',etat_administratif_etablissement,
+                    'geo_adresse',geo_adresse,
+                    'geo_id',geo_id,
+                    'geo_score',geo_score,
+                    'indice_repetition',indice_repetition,
+                    'indice_repetition_2',indice_repetition_2,
+                    'latitude',latitude,
+                    'libelle_cedex',libelle_cedex,
+                    'libelle_cedex_2',libelle_cedex_2,
+                    'libelle_commune',libelle_commune,
+                    'libelle_commune_2',libelle_commune_2,
+                    'libelle_commune_etranger',libelle_commune_etranger,
+                    'libelle_commune_etranger_2',libelle_commune_etranger_2,
+                    'libelle_pays_etranger',libelle_pays_etranger,
+                    'libelle_pays_etranger_2',libelle_pays_etranger_2,
+                    'libelle_voie',libelle_voie,
+                    'libelle_voie_2',libelle_voie_2,
+                    'liste_finess',liste_finess,
+                    'liste_id_bio',liste_id_bio,
+                    'liste_idcc',liste_idcc,
+                    'liste_rge',liste_rge,
+                    'liste_uai',liste_uai,
+                    'longitude',longitude,
+                    'nom_commercial',nom_commercial,
+                    'numero_voie',numero_voie,
+                    'numero_voie_2',numero_voie_2,
+                    'siren',siren,
+                    'siret',siret,
+                    'statut_diffusion_etablissement',
+                    statut_diffusion_etablissement,
+                    'tranche_effectif_salarie',tranche_effectif_salarie,
+                    'annee_tranche_effectif_salarie',annee_tranche_effectif_salarie,
+                    'date_mise_a_jour_insee',date_mise_a_jour_insee,
+                    'type_voie',type_voie,
+                    'type_voie_2',type_voie_2,
+                    'x',x,
+                    'y',y
+                    )
+                ) FROM
+                (
+                    SELECT
+                    s.activite_principale as activite_principale,
+                    s.activite_principale_registre_metier as
+                    activite_principale_registre_metier,
+                    COALESCE(ee.ancien_siege, FALSE) AS ancien_siege,
+                    s.caractere_employeur as caractere_employeur,
+                    s.cedex as cedex,
+                    s.cedex_2 as cedex_2,
+                    s.code_pays_etranger as code_pays_etranger,
+                    s.code_pays_etranger_2 as code_pays_etranger_2,
+                    s.code_postal as code_postal,
+                    s.commune as commune,
+                    s.commune_2 as commune_2,
+                    s.complement_adresse as complement_adresse,
+                    s.complement_adresse_2 as complement_adresse_2,
+                    s.date_creation as date_creation,
+                    s.date_debut_activite as date_debut_activite,
+                    s.date_fermeture_etablissement as date_fermeture,
+                    s.distribution_speciale as distribution_speciale,
+                    s.distribution_speciale_2 as distribution_speciale_2,
+                    s.enseigne_1 as enseigne_1,
+                    s.enseigne_2 as enseigne_2,
+                    s.enseigne_3 as enseigne_3,
+                    s.est_siege as est_siege,
+                    s.etat_administratif_etablissement as
+                    etat_administratif_etablissement,
+                    s.geo_adresse as geo_adresse,
+                    s.geo_id as geo_id,
+                    s.geo_score as geo_score,
+                    s.indice_repetition as indice_repetition,
+                    s.indice_repetition_2 as indice_repetition_2,
+                    s.latitude as latitude,
+                    s.libelle_cedex as libelle_cedex,
+                    s.libelle_cedex_2 as libelle_cedex_2,
+                    s.libelle_commune as libelle_commune,
+                    s.libelle_commune_2 as libelle_commune_2,
+                    s.libelle_commune_etranger as libelle_commune_etranger,
+                    s.libelle_commune_etranger_2 as libelle_commune_etranger_2,
+                    s.libelle_pays_etranger as libelle_pays_etranger,
+                    s.libelle_pays_etranger_2 as libelle_pays_etranger_2,
+                    s.libelle_voie as libelle_voie,
+                    s.libelle_voie_2 as libelle_voie_2,
+                    s.longitude as longitude,
+                    ee.liste_finess as liste_finess,
+                    ee.liste_id_bio as liste_id_bio,
+                    ee.liste_idcc as liste_idcc,
+                    ee.liste_rge as liste_rge,
+                    ee.liste_uai as liste_uai,
+                    s.nom_commercial as nom_commercial,
+                    s.numero_voie as numero_voie,
+                    s.numero_voie_2 as numero_voie_2,
+                    s.siren as siren,
+                    s.siret as siret,
+                    s.statut_diffusion_etablissement as
+                    statut_diffusion_etablissement,
+                    s.tranche_effectif_salarie as
+                    tranche_effectif_salarie,
+                    s.annee_tranche_effectif_salarie as
+                    annee_tranche_effectif_salarie,
+                    s.date_mise_a_jour_insee as date_mise_a_jour_insee,
+                    s.type_voie as type_voie,
+                    s.type_voie_2 as type_voie_2,
+                    s.x as x,
+                    s.y as y
+                    FROM etablissement s
+                    LEFT JOIN etab_enrichment ee ON ee.siret = s.siret
+                    WHERE s.siren = ul.siren
+                )
+            ) as etablissements
+        FROM unite_legale ul
+        WHERE ul.siren BETWEEN ? AND ?
+        ORDER BY ul.siren"""
+
+
+# Slug of each unité légale, computed once by the ETL and read both by the indexing
+# and by the sitemap
+create_table_slug_query = """CREATE TABLE IF NOT EXISTS slug
+        (
+            siren TEXT PRIMARY KEY,
+            slug TEXT
+        ) WITHOUT ROWID"""
+
+select_slug_fields_query = """SELECT
+        ul.siren as siren,
+        ul.nom as nom,
+        ul.nom_usage as nom_usage,
+        ul.nom_raison_sociale as nom_raison_sociale,
+        ul.prenom as prenom,
+        ul.sigle as sigle,
+        ul.denomination_usuelle_1 as denomination_usuelle_1_unite_legale,
+        ul.denomination_usuelle_2 as denomination_usuelle_2_unite_legale,
+        ul.denomination_usuelle_3 as denomination_usuelle_3_unite_legale,
+        ul.statut_diffusion_unite_legale as statut_diffusion_unite_legale,
+        st.nom_commercial as nom_commercial
+        FROM unite_legale ul
+        LEFT JOIN siege st ON st.siren = ul.siren
+        WHERE ul.siren IS NOT NULL"""
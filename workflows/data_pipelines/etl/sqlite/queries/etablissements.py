@@ -636,3 +636,73 @@ insert_date_fermeture_siege_query = """
     )
     WHERE siege.etat_administratif_etablissement = 'F'
 """
+
+
+def select_missing_coordinates_query(table_name):
+    # Rows from `rowid` (excluded) lacking latitude or longitude, by batches
+    return f"""SELECT rowid, commune, x, y
+        FROM {table_name}
+        WHERE rowid > ?
+        AND (latitude IS NULL OR longitude IS NULL)
+        AND x IS NOT NULL AND y IS NOT NULL
+        ORDER BY rowid
+        LIMIT ?"""
+
+
+# Coordinates computed by each run, reused by the next one : keyed by the EPSG code
+# and the Lambert coordinates as stored in the établissements, so that only the new
+# or moved établissements are reprojected
+create_table_coordinates_cache_query = """CREATE TABLE IF NOT EXISTS
+        coordinates_cache.coordinates
+        (
+            epsg INTEGER,
+            x TEXT,
+            y TEXT,
+            latitude TEXT,
+            longitude TEXT,
+            PRIMARY KEY (epsg, x, y)
+        ) WITHOUT ROWID"""
+
+create_table_coordinates_batch_query = """CREATE TEMP TABLE IF NOT EXISTS
+        coordinates_batch
+        (
+            row_id INTEGER PRIMARY KEY,
+            epsg INTEGER,
+            x TEXT,
+            y TEXT
+        )"""
+
+insert_coordinates_batch_query = """INSERT INTO coordinates_batch (row_id, epsg, x, y)
+        VALUES (?, ?, ?, ?)"""
+
+# Copy the coordinates of the batch computed by the previous run into the cache
+insert_previous_coordinates_query = """INSERT OR IGNORE INTO
+        coordinates_cache.coordinates
+        SELECT c.epsg, c.x, c.y, c.latitude, c.longitude
+        FROM coordinates_batch b
+        JOIN previous_coordinates_cache.coordinates c
+        ON c.epsg = b.epsg AND c.x = b.x AND c.y = b.y"""
+
+select_uncached_coordinates_query = """SELECT DISTINCT epsg, x, y
+        FROM coordinates_batch b
+        WHERE NOT EXISTS (
+            SELECT 1 FROM coordinates_cache.coordinates c
+            WHERE c.epsg = b.epsg AND c.x = b.x AND c.y = b.y
+        )"""
+
+insert_coordinates_cache_query = """INSERT OR IGNORE INTO coordinates_cache.coordinates
+        (epsg, x, y, latitude, longitude)
+        VALUES (?, ?, ?, ?, ?)"""
+
+
+def update_coordinates_query(table_name):
+    # Coordinates of the rows of the batch, read from the cache
+    return f"""UPDATE {table_name}
+        SET (latitude, longitude) = (
+            SELECT c.latitude, c.longitude
+            FROM coordinates_batch b
+            JOIN coordinates_cache.coordinates c
+            ON c.epsg = b.epsg AND c.x = b.x AND c.y = b.y
+            WHERE b.row_id = {table_name}.rowid
+        )
+        WHERE rowid IN (SELECT row_id FROM coordinates_batch)"""
@@ -0,0 +1,36 @@
+import logging
+
+from dag_datalake_sirene.config import SIRENE_DATABASE_LOCATION
+from dag_datalake_sirene.helpers import Notification
+from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
+    INDEX_DURATIONS_XCOM_KEY,
+    analyze_database,
+)
+
+
+def format_index_durations(index_durations):
+    """Creation times of the indexes, the slowest first."""
+    return ", ".join(
+        f"{index_name} {duration}s"
+        for index_name, duration in sorted(
+            index_durations.items(), key=lambda item: item[1], reverse=True
+        )
+    )
+
+
+def analyze_sirene_database(**kwargs):
+    analyze_duration = analyze_database(SIRENE_DATABASE_LOCATION)
+
+    # Creation times of the indexes, pushed by the tasks which built the tables
+    index_durations = {}
+    for ti in kwargs["dag_run"].get_task_instances():
+        index_durations.update(
+            ti.xcom_pull(task_ids=ti.task_id, key=INDEX_DURATIONS_XCOM_KEY) or {}
+        )
+    message = (
+        f"Index ({sum(index_durations.values()):.1f}s) : "
+        f"{format_index_durations(index_durations)} ; "
+        f"ANALYZE : {analyze_duration}s"
+    )
+    logging.info(message)
+    kwargs["ti"].xcom_push(key=Notification.notification_xcom_key, value=message)
@@ -1,3 +1,10 @@
+import glob
+import shutil
+
+from dag_datalake_sirene.config import (
+    ETL_ADDITIONAL_TABLES_DATA_DIR,
+    SIRENE_DATABASE_LOCATION,
+)
 from dag_datalake_sirene.workflows.data_pipelines.etl.data_fetch_clean import (
     collectivite_territoriale as ct,
     bilan_financier as bf,
@@ -11,12 +18,15 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.data_fetch_clean import (
     uai,
     marche_inclusion as mi,
 )
+from dag_datalake_sirene.helpers.sqlite_client import SQLITE_PROFILE_SCRATCH_BUILD
 from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
     create_unique_index,
     create_index,
     create_and_fill_table_model,
     create_only_index,
     execute_query,
+    get_table_database_location,
+    merge_table_databases,
 )
 
 from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries import (
@@ -32,6 +42,14 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries import (
     uai as q_uai,
     marche_inclusion as q_mi,
 )
+from dag_datalake_sirene.workflows.data_pipelines.convcollective.config import (
+    CONVENTION_COLLECTIVE_CONFIG,
+)
+from dag_datalake_sirene.workflows.data_pipelines.finess.config import FINESS_CONFIG
+from dag_datalake_sirene.workflows.data_pipelines.formation.config import (
+    FORMATION_CONFIG,
+)
+from dag_datalake_sirene.workflows.data_pipelines.rge.config import RGE_CONFIG
 
 
 def create_bilan_financier_table():
@@ -53,12 +71,15 @@ def create_convention_collective_table():
         index_name="index_convention_collective",
         index_column="siret",
         preprocess_table_data=cc.preprocess_convcollective_data,
+        json_columns=CONVENTION_COLLECTIVE_CONFIG.json_columns,
     )
     create_only_index(
         table_name="convention_collective",
         create_index_func=create_index,
         index_name="index_siren_convention_collective",
         index_column="siren",
+        db_location=get_table_database_location("convention_collective"),
+        profile=SQLITE_PROFILE_SCRATCH_BUILD,
     )
 
 
@@ -70,6 +91,7 @@ def create_rge_table():
         index_name="index_rge",
         index_column="siret",
         preprocess_table_data=rge.preprocess_rge_data,
+        json_columns=RGE_CONFIG.json_columns,
     )
 
 
@@ -92,6 +114,7 @@ def create_finess_table():
         index_name="index_finess",
         index_column="siret",
         preprocess_table_data=finess.preprocess_finess_data,
+        json_columns=FINESS_CONFIG.json_columns,
     )
 
 
@@ -103,6 +126,7 @@ def create_organisme_formation_table():
         index_name="index_organisme_formation",
         index_column="siren",
         preprocess_table_data=of.preprocess_organisme_formation_data,
+        json_columns=FORMATION_CONFIG.json_columns,
     )
 
 
@@ -148,7 +172,10 @@ def create_elu_table():
         index_column="siren",
         preprocess_table_data=ct.preprocess_elus_data,
     )
-    execute_query(q_ct.delete_duplicates_elus_query)
+    execute_query(
+        q_ct.delete_duplicates_elus_query,
+        db_location=get_table_database_location("elus"),
+    )
 
 
 def create_ess_table():
@@ -171,3 +198,11 @@ def create_marche_inclusion_table():
         index_column="siren",
         preprocess_table_data=mi.preprocess_marche_inclusion_data,
     )
+
+
+def merge_additional_tables():
+    merge_table_databases(
+        SIRENE_DATABASE_LOCATION,
+        sorted(glob.glob(f"{ETL_ADDITIONAL_TABLES_DATA_DIR}*.db")),
+    )
+    shutil.rmtree(ETL_ADDITIONAL_TABLES_DATA_DIR)
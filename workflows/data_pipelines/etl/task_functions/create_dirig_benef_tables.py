@@ -15,12 +15,18 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries.beneficiair
     get_chunk_benef_from_db_query,
 )
 # fmt: on
-from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_SCRATCH_BUILD,
+    SqliteClient,
+)
 
 from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
     drop_table,
     get_distinct_column_count,
+    reset_table_database,
     create_index,
+    create_timed_index,
+    insert_dataframe,
 )
 
 from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries.dirigeants import (
@@ -35,7 +41,6 @@ from dag_datalake_sirene.helpers.minio_helpers import minio_client
 
 
 from dag_datalake_sirene.config import (
-    SIRENE_DATABASE_LOCATION,
     AIRFLOW_ENV,
     RNE_DATABASE_LOCATION,
 )
@@ -58,7 +63,9 @@ def get_latest_rne_database(**kwargs):
 
 
 def create_dirig_pp_table():
-    sqlite_client_siren = SqliteClient(SIRENE_DATABASE_LOCATION)
+    sqlite_client_siren = SqliteClient(
+        reset_table_database("dirigeant_pp"), profile=SQLITE_PROFILE_SCRATCH_BUILD
+    )
     sqlite_client_dirig = SqliteClient(RNE_DATABASE_LOCATION)
     chunk_size = int(100000)
     for row in sqlite_client_dirig.execute(
@@ -67,27 +74,26 @@ def create_dirig_pp_table():
         nb_iter = int(int(row[0]) / chunk_size) + 1
     sqlite_client_siren.execute(drop_table("dirigeant_pp"))
     sqlite_client_siren.execute(create_table_dirigeant_pp_query)
-    sqlite_client_siren.execute(create_index("siren_pp", "dirigeant_pp", "siren"))
     for i in range(nb_iter):
         query = sqlite_client_dirig.execute(
             get_chunk_dirig_pp_from_db_query(chunk_size, i)
         )
         dir_pp_clean = preprocess_personne_physique(query)
-        dir_pp_clean.to_sql(
-            "dirigeant_pp",
-            sqlite_client_siren.db_conn,
-            if_exists="append",
-            index=False,
-        )
+        insert_dataframe(sqlite_client_siren, "dirigeant_pp", dir_pp_clean)
         logging.info(f"Iter: {i}")
 
     del dir_pp_clean
+    create_timed_index(
+        sqlite_client_siren, create_index, "siren_pp", "dirigeant_pp", "siren"
+    )
     sqlite_client_siren.commit_and_close_conn()
     sqlite_client_dirig.commit_and_close_conn()
 
 
 def create_dirig_pm_table():
-    sqlite_client_siren = SqliteClient(SIRENE_DATABASE_LOCATION)
+    sqlite_client_siren = SqliteClient(
+        reset_table_database("dirigeant_pm"), profile=SQLITE_PROFILE_SCRATCH_BUILD
+    )
     sqlite_client_dirig = SqliteClient(RNE_DATABASE_LOCATION)
 
     chunk_size = int(100000)
@@ -96,29 +102,28 @@ def create_dirig_pm_table():
     ):
         nb_iter = int(int(row[0]) / chunk_size) + 1
 
-    # Create table dirigeant_pm in siren database
+    # Create table dirigeant_pm in its own database, merged into the siren one
     sqlite_client_siren.execute(drop_table("dirigeant_pm"))
     sqlite_client_siren.execute(create_table_dirigeant_pm_query)
-    sqlite_client_siren.execute(create_index("siren_pm", "dirigeant_pm", "siren"))
     for i in range(nb_iter):
         query = sqlite_client_dirig.execute(
             get_chunk_dirig_pm_from_db_query(chunk_size, i)
         )
         dir_pm_clean = preprocess_dirigeant_pm(query)
-        dir_pm_clean.to_sql(
-            "dirigeant_pm",
-            sqlite_client_siren.db_conn,
-            if_exists="append",
-            index=False,
-        )
+        insert_dataframe(sqlite_client_siren, "dirigeant_pm", dir_pm_clean)
         logging.info(f"Iter: {i}")
     del dir_pm_clean
+    create_timed_index(
+        sqlite_client_siren, create_index, "siren_pm", "dirigeant_pm", "siren"
+    )
     sqlite_client_siren.commit_and_close_conn()
     sqlite_client_dirig.commit_and_close_conn()
 
 
 def create_benef_table():
-    sqlite_client_siren = SqliteClient(SIRENE_DATABASE_LOCATION)
+    sqlite_client_siren = SqliteClient(
+        reset_table_database("beneficiaire"), profile=SQLITE_PROFILE_SCRATCH_BUILD
+    )
     sqlite_client_rne = SqliteClient(RNE_DATABASE_LOCATION)
     chunk_size = int(100000)
     for row in sqlite_client_rne.execute(
@@ -127,18 +132,15 @@ def create_benef_table():
         nb_iter = int(int(row[0]) / chunk_size) + 1
     sqlite_client_siren.execute(drop_table("beneficiaire"))
     sqlite_client_siren.execute(create_table_benef_query)
-    sqlite_client_siren.execute(create_index("siren_benef", "beneficiaire", "siren"))
     for i in range(nb_iter):
         query = sqlite_client_rne.execute(get_chunk_benef_from_db_query(chunk_size, i))
         benef_clean = preprocess_personne_physique(query)
-        benef_clean.to_sql(
-            "beneficiaire",
-            sqlite_client_siren.db_conn,
-            if_exists="append",
-            index=False,
-        )
+        insert_dataframe(sqlite_client_siren, "beneficiaire", benef_clean)
         logging.info(f"Iter: {i}")
 
     del benef_clean
+    create_timed_index(
+        sqlite_client_siren, create_index, "siren_benef", "beneficiaire", "siren"
+    )
     sqlite_client_siren.commit_and_close_conn()
     sqlite_client_rne.commit_and_close_conn()
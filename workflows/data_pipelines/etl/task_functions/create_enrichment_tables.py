@@ -0,0 +1,177 @@
+import json
+import logging
+import multiprocessing
+import os
+
+from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
+    drop_table,
+    get_table_count,
+)
+from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries.enrichment import (
+    ETAB_ENRICHMENT_SOURCES,
+    UL_ENRICHMENT_SOURCES,
+    create_table_enrichment_query,
+    create_table_etablissement_document_query,
+    create_table_slug_query,
+    fill_enrichment_table_query,
+    select_etablissements_by_siren_range_query,
+    select_slug_fields_query,
+)
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.data_enrichment import (
+    format_etablissement,
+    format_nom_complet,
+    format_slug,
+    get_etablissements_complements,
+    slugify_name,
+)
+from dag_datalake_sirene.helpers.utils import log_cache_info
+from dag_datalake_sirene.config import (
+    AIRFLOW_ETL_DATA_DIR,
+    ETL_PROCESS_COUNT,
+    SIRENE_DATABASE_LOCATION,
+)
+
+# SIREN ranges formatted independently, by their first 3 digits
+ETABLISSEMENT_DOCUMENT_SIREN_RANGES = [
+    (f"{prefix:03d}000000", f"{prefix:03d}999999") for prefix in range(1000)
+]
+
+
+def create_enrichment_table(table_name, key, sources):
+    sqlite_client = SqliteClient(SIRENE_DATABASE_LOCATION)
+    sqlite_client.execute(drop_table(table_name))
+    sqlite_client.execute(create_table_enrichment_query(table_name, key, sources))
+    for source_table, columns in sources.items():
+        sqlite_client.execute(
+            fill_enrichment_table_query(table_name, key, source_table, columns)
+        )
+    for row in sqlite_client.execute(get_table_count(table_name)):
+        logging.info(
+            f"************ {row} total records have been added to the "
+            f"{table_name} table!"
+        )
+    sqlite_client.commit_and_close_conn()
+
+
+def create_ul_enrichment_table():
+    create_enrichment_table("ul_enrichment", "siren", UL_ENRICHMENT_SOURCES)
+
+
+def create_etab_enrichment_table():
+    create_enrichment_table("etab_enrichment", "siret", ETAB_ENRICHMENT_SOURCES)
+
+
+def format_etablissement_documents(siren_range):
+    """
+    Returns:
+        list[tuple[str, str, str]]: SIREN, formatted établissements and complements
+        of each unité légale of the range, as compact JSON.
+    """
+    documents = []
+    with SqliteClient(SIRENE_DATABASE_LOCATION) as sqlite_client:
+        for unites_legales in sqlite_client.iter_dicts(
+            select_etablissements_by_siren_range_query, siren_range
+        ):
+            for unite_legale in unites_legales:
+                is_non_diffusible = unite_legale["statut_diffusion_unite_legale"] != "O"
+                etablissements = [
+                    format_etablissement(etablissement, is_non_diffusible)
+                    for etablissement in json.loads(unite_legale["etablissements"])
+                ]
+                documents.append(
+                    (
+                        unite_legale["siren"],
+                        json.dumps(
+                            etablissements, ensure_ascii=False, separators=(",", ":")
+                        ),
+                        json.dumps(
+                            get_etablissements_complements(etablissements),
+                            separators=(",", ":"),
+                        ),
+                    )
+                )
+    return documents
+
+
+def create_etablissement_document_table():
+    """
+    Format the établissements of every unité légale once, so that the indexing
+    only reads them. SIREN ranges are formatted in parallel and written to a
+    separate database, which does not lock the one read by the workers, then
+    copied into the `etablissement_document` table.
+    """
+    table_name = "etablissement_document"
+    document_db_location = f"{AIRFLOW_ETL_DATA_DIR}{table_name}.db"
+    if os.path.exists(document_db_location):
+        os.remove(document_db_location)
+    with SqliteClient(document_db_location) as document_sqlite_client:
+        document_sqlite_client.execute(create_table_etablissement_document_query)
+        with multiprocessing.get_context("fork").Pool(ETL_PROCESS_COUNT) as pool:
+            for documents in pool.imap(
+                format_etablissement_documents, ETABLISSEMENT_DOCUMENT_SIREN_RANGES
+            ):
+                document_sqlite_client.execute_many(
+                    f"INSERT INTO {table_name} VALUES (?, ?, ?)", documents
+                )
+                document_sqlite_client.db_conn.commit()
+
+    sqlite_client = SqliteClient(SIRENE_DATABASE_LOCATION)
+    sqlite_client.execute(drop_table(table_name))
+    sqlite_client.execute(create_table_etablissement_document_query)
+    sqlite_client.connect_to_another_db(document_db_location, "document")
+    sqlite_client.execute(
+        f"INSERT INTO {table_name} SELECT * FROM document.{table_name}"
+    )
+    sqlite_client.db_conn.commit()
+    sqlite_client.detach_database("document")
+    for row in sqlite_client.execute(get_table_count(table_name)):
+        logging.info(
+            f"************ {row} total records have been added to the "
+            f"{table_name} table!"
+        )
+    sqlite_client.commit_and_close_conn()
+    os.remove(document_db_location)
+
+
+def create_slug_table():
+    """
+    Compute the slug of every unité légale once, so that the documents indexed and
+    the sitemap share it.
+    """
+    table_name = "slug"
+    sqlite_client = SqliteClient(SIRENE_DATABASE_LOCATION)
+    sqlite_client.execute(drop_table(table_name))
+    sqlite_client.execute(create_table_slug_query)
+    for unites_legales in sqlite_client.iter_dicts(select_slug_fields_query):
+        sqlite_client.execute_many(
+            f"INSERT OR REPLACE INTO {table_name} VALUES (?, ?)",
+            (
+                (
+                    unite_legale["siren"],
+                    format_slug(
+                        format_nom_complet(
+                            unite_legale["nom"],
+                            unite_legale["nom_usage"],
+                            unite_legale["nom_raison_sociale"],
+                            unite_legale["prenom"],
+                        ),
+                        unite_legale["sigle"],
+                        unite_legale["nom_commercial"],
+                        unite_legale["denomination_usuelle_1_unite_legale"],
+                        unite_legale["denomination_usuelle_2_unite_legale"],
+                        unite_legale["denomination_usuelle_3_unite_legale"],
+                        unite_legale["siren"],
+                        unite_legale["statut_diffusion_unite_legale"],
+                    ),
+                )
+                for unite_legale in unites_legales
+            ),
+        )
+    log_cache_info(slugify_name)
+    for row in sqlite_client.execute(get_table_count(table_name)):
+        logging.info(
+            f"************ {row} total records have been added to the "
+            f"{table_name} table!"
+        )
+    sqlite_client.commit_and_close_conn()
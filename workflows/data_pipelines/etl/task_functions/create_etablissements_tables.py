@@ -1,20 +1,37 @@
+import gzip
 import logging
+import multiprocessing
+import os
+import shutil
 import sqlite3
+from concurrent.futures import ThreadPoolExecutor
 
+import pandas as pd
+
+from dag_datalake_sirene.helpers.geolocalisation import (
+    get_epsg,
+    transform_coordinates_by_epsg,
+)
+from dag_datalake_sirene.helpers.minio_helpers import minio_client
 from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.workflows.data_pipelines.elasticsearch.data_enrichment import (
+    format_departement,
+)
 
 # fmt: off
 from dag_datalake_sirene.workflows.data_pipelines.etl.data_fetch_clean.etablissements\
     import (
+        download_stock,
         preprocess_etablissement_data,
         preprocess_historique_etablissement_data,
     )
 from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
-    get_table_count,
+    bulk_load_table_model,
     create_index,
-    create_table_model,
+    create_timed_index,
     create_unique_index,
     execute_query,
+    insert_dataframe,
 )
 from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries.etablissements\
     import (
@@ -28,6 +45,14 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries.etablisseme
     populate_table_siege_query,
     replace_table_etablissement_query,
     replace_table_siege_query,
+    create_table_coordinates_batch_query,
+    create_table_coordinates_cache_query,
+    insert_coordinates_batch_query,
+    insert_coordinates_cache_query,
+    insert_previous_coordinates_query,
+    select_missing_coordinates_query,
+    select_uncached_coordinates_query,
+    update_coordinates_query,
     create_table_count_etablissement_query,
     count_nombre_etablissement_query,
     create_table_count_etablissement_ouvert_query,
@@ -39,82 +64,117 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries.etablisseme
 from dag_datalake_sirene.helpers.labels.departements import all_deps
 from dag_datalake_sirene.config import AIRFLOW_ETL_DATA_DIR
 from dag_datalake_sirene.config import (
+    ETL_COORDINATES_CACHE_MINIO_PATH,
+    ETL_DOWNLOAD_THREAD_COUNT,
+    ETL_PROCESS_COUNT,
+    ETL_STOCK_ETABLISSEMENTS_TMP_FOLDER,
     SIRENE_DATABASE_LOCATION,
     RNE_DATABASE_LOCATION,
 )
 
+# Number of établissements whose coordinates are computed at once
+COORDINATES_BATCH_SIZE = 100_000
+COORDINATES_CACHE_FILENAME = "coordinates_cache.db"
+
+
+def download_stock_etablissement(departement):
+    download_stock(departement, ETL_STOCK_ETABLISSEMENTS_TMP_FOLDER)
+    return departement
+
+
+def parse_stock_etablissement(departement):
+    """
+    Preprocess the downloaded file of a département into a Parquet file, read by
+    the process writing the `etablissement` table.
+    """
+    df_dep = preprocess_etablissement_data(
+        "stock", departement, ETL_STOCK_ETABLISSEMENTS_TMP_FOLDER
+    )
+    parquet_path = f"{AIRFLOW_ETL_DATA_DIR}geo_siret_{departement}.parquet"
+    df_dep.to_parquet(parquet_path, index=False)
+    return parquet_path
+
 
 def create_etablissement_table():
-    sqlite_client = create_table_model(
+    """
+    The files of the départements are downloaded by a pool of threads, only if they
+    changed since the previous run, then parsed by a pool of processes as they
+    arrive, while this process alone writes them into the table, in the order of
+    the départements.
+    """
+    os.makedirs(ETL_STOCK_ETABLISSEMENTS_TMP_FOLDER, exist_ok=True)
+    count_etablissement = 0
+    with bulk_load_table_model(
         table_name="etablissement",
         create_table_query=create_table_etablissement_query,
         create_index_func=create_index,
         index_name="index_etablissement",
         index_column="siren",
+    ) as sqlite_client:
+        # The processes are forked before the download threads are started
+        with multiprocessing.get_context("fork").Pool(ETL_PROCESS_COUNT) as pool:
+            with ThreadPoolExecutor(ETL_DOWNLOAD_THREAD_COUNT) as executor:
+                for parquet_path in pool.imap(
+                    parse_stock_etablissement,
+                    executor.map(download_stock_etablissement, all_deps),
+                ):
+                    df_dep = pd.read_parquet(parquet_path)
+                    count_etablissement += insert_dataframe(
+                        sqlite_client, "etablissement", df_dep
+                    )
+                    os.remove(parquet_path)
+                    logging.debug(
+                        f"************ {count_etablissement} records have been added "
+                        f"to the `établissements` table!"
+                    )
+        del df_dep
+
+    logging.info(
+        f"************ {count_etablissement} total records have been added to the "
+        f"siret table!"
     )
-    # Upload geo data by departement
-    for dep in all_deps:
-        df_dep = preprocess_etablissement_data("stock", dep, None)
-        df_dep.to_sql(
-            "etablissement", sqlite_client.db_conn, if_exists="append", index=False
-        )
-        for row in sqlite_client.execute(get_table_count("etablissement")):
-            logging.debug(
-                f"************ {row} records have been added to the "
-                f"`établissements` table!"
-            )
-    del df_dep
-
-    for count_etablissement in sqlite_client.execute(get_table_count("etablissement")):
-        logging.info(
-            f"************ {count_etablissement} total records have been added to the "
-            f"siret table!"
-        )
-    sqlite_client.commit_and_close_conn()
 
 
 def create_flux_etablissement_table():
-    sqlite_client = create_table_model(
+    with bulk_load_table_model(
         table_name="flux_etablissement",
         create_table_query=create_table_flux_etablissement_query,
         create_index_func=create_index,
         index_name="index_flux_etablissement",
         index_column="siren",
-    )
-    # Upload flux data
-    df_etablissement = preprocess_etablissement_data("flux", None, AIRFLOW_ETL_DATA_DIR)
-    df_etablissement.to_sql(
-        "flux_etablissement",
-        sqlite_client.db_conn,
-        if_exists="append",
-        index=False,
-    )
-    del df_etablissement
-    for row in sqlite_client.execute(get_table_count("flux_etablissement")):
-        logging.info(
-            f"************ {row} total records have been added to the "
-            f"`flux établissements` table!"
+    ) as sqlite_client:
+        # Upload flux data
+        df_etablissement = preprocess_etablissement_data(
+            "flux", None, AIRFLOW_ETL_DATA_DIR
         )
-    sqlite_client.commit_and_close_conn()
+        count_etablissement = insert_dataframe(
+            sqlite_client, "flux_etablissement", df_etablissement
+        )
+        del df_etablissement
+    logging.info(
+        f"************ {count_etablissement} total records have been added to the "
+        f"`flux établissements` table!"
+    )
 
 
 def create_siege_table(**kwargs):
-    sqlite_client = create_table_model(
+    with bulk_load_table_model(
         table_name="siege",
         create_table_query=create_table_siege_query,
         create_index_func=create_index,
         index_name="index_siege_siren",
         index_column="siren",
-    )
-    sqlite_client.execute(create_index("index_siege_siege", "siege", "siret"))
-    sqlite_client.execute(populate_table_siege_query)
-    for count_siege in sqlite_client.execute(get_table_count("siege")):
-        logging.info(
-            f"************ {count_siege} total records have been added to the "
-            f"siege table!"
+    ) as sqlite_client:
+        sqlite_client.execute(populate_table_siege_query)
+        create_timed_index(
+            sqlite_client, create_index, "index_siege_siege", "siege", "siret"
         )
-    kwargs["ti"].xcom_push(key="count_siege", value=count_siege[0])
-    sqlite_client.commit_and_close_conn()
+        count_siege = sqlite_client.get_table_count("siege")
+    logging.info(
+        f"************ {count_siege} total records have been added to the "
+        f"siege table!"
+    )
+    kwargs["ti"].xcom_push(key="count_siege", value=count_siege)
 
 
 def replace_etablissement_table():
@@ -130,28 +190,25 @@ def replace_siege_table():
 
 
 def count_nombre_etablissement():
-    sqlite_client = create_table_model(
+    with bulk_load_table_model(
         table_name="count_etablissement",
         create_table_query=create_table_count_etablissement_query,
         create_index_func=create_unique_index,
         index_name="index_count_siren",
         index_column="siren",
-    )
-
-    sqlite_client.execute(count_nombre_etablissement_query)
-    sqlite_client.commit_and_close_conn()
+    ) as sqlite_client:
+        sqlite_client.execute(count_nombre_etablissement_query)
 
 
 def count_nombre_etablissement_ouvert():
-    sqlite_client = create_table_model(
+    with bulk_load_table_model(
         table_name="count_etablissement_ouvert",
         create_table_query=create_table_count_etablissement_ouvert_query,
         create_index_func=create_unique_index,
         index_name="index_count_ouvert_siren",
         index_column="siren",
-    )
-    sqlite_client.execute(count_nombre_etablissement_ouvert_query)
-    sqlite_client.commit_and_close_conn()
+    ) as sqlite_client:
+        sqlite_client.execute(count_nombre_etablissement_ouvert_query)
 
 
 def add_rne_data_to_siege_table(**kwargs):
@@ -187,34 +244,31 @@ def add_rne_data_to_siege_table(**kwargs):
 
 def create_historique_etablissement_table(**kwargs):
     table_name = "historique_etablissement"
-    sqlite_client = create_table_model(
+    count_etablissement = 0
+    with bulk_load_table_model(
         table_name=table_name,
         create_table_query=create_table_historique_etablissement_query,
         create_index_func=create_index,
         index_name="index_historique_siret",
         index_column="siret",
-    )
-
-    for df_hist_etablissement in preprocess_historique_etablissement_data(
-        AIRFLOW_ETL_DATA_DIR,
-    ):
-        df_hist_etablissement.to_sql(
-            table_name, sqlite_client.db_conn, if_exists="append", index=False
-        )
-        for row in sqlite_client.execute(get_table_count(table_name)):
+    ) as sqlite_client:
+        for df_hist_etablissement in preprocess_historique_etablissement_data(
+            AIRFLOW_ETL_DATA_DIR,
+        ):
+            count_etablissement += insert_dataframe(
+                sqlite_client, table_name, df_hist_etablissement
+            )
             logging.debug(
-                f"************ {row} total records have been added "
+                f"************ {count_etablissement} total records have been added "
                 f"to the {table_name} table!"
             )
 
-    del df_hist_etablissement
+        del df_hist_etablissement
 
-    for count_etablissement in sqlite_client.execute(get_table_count(table_name)):
-        logging.info(
-            f"************ {count_etablissement} total records have been added to the "
-            f"{table_name} table!"
-        )
-    sqlite_client.commit_and_close_conn()
+    logging.info(
+        f"************ {count_etablissement} total records have been added to the "
+        f"{table_name} table!"
+    )
     kwargs["ti"].xcom_push(
         key="count_historique_etablissement", value=count_etablissement
     )
@@ -222,20 +276,18 @@ def create_historique_etablissement_table(**kwargs):
 
 def create_date_fermeture_etablissement_table(**kwargs):
     table_name = "date_fermeture_etablissement"
-    sqlite_client = create_table_model(
+    with bulk_load_table_model(
         table_name=table_name,
         create_table_query=create_table_date_fermeture_etablissement_query,
         create_index_func=create_unique_index,
         index_name="index_date_fermeture_siret",
         index_column="siret",
+    ) as sqlite_client:
+        count_etablissement = sqlite_client.get_table_count(table_name)
+    logging.info(
+        f"************ {count_etablissement} total records have been added to the "
+        f"{table_name} table!"
     )
-
-    for count_etablissement in sqlite_client.execute(get_table_count(table_name)):
-        logging.info(
-            f"************ {count_etablissement} total records have been added to the "
-            f"{table_name} table!"
-        )
-    sqlite_client.commit_and_close_conn()
     kwargs["ti"].xcom_push(
         key="count_date_fermeture_etablissement", value=count_etablissement
     )
@@ -246,3 +298,128 @@ def insert_date_fermeture_etablissement(**kwargs):
     sqlite_client.execute(insert_date_fermeture_etablissement_query)
     sqlite_client.execute(insert_date_fermeture_siege_query)
     sqlite_client.commit_and_close_conn()
+
+
+def download_coordinates_cache():
+    """
+    Download the coordinates computed by the previous run, if any.
+
+    Returns:
+        str | None: local path of the coordinates cache database.
+    """
+    if not minio_client.get_files_from_prefix(
+        prefix=f"{ETL_COORDINATES_CACHE_MINIO_PATH}/{COORDINATES_CACHE_FILENAME}.gz"
+    ):
+        logging.warning("No coordinates cache found, every coordinate is computed.")
+        return None
+    db_location = f"{AIRFLOW_ETL_DATA_DIR}previous_{COORDINATES_CACHE_FILENAME}"
+    minio_client.get_files(
+        list_files=[
+            {
+                "source_path": f"{ETL_COORDINATES_CACHE_MINIO_PATH}/",
+                "source_name": f"{COORDINATES_CACHE_FILENAME}.gz",
+                "dest_path": AIRFLOW_ETL_DATA_DIR,
+                "dest_name": f"previous_{COORDINATES_CACHE_FILENAME}.gz",
+            }
+        ],
+    )
+    with gzip.open(f"{db_location}.gz", "rb") as f_in:
+        with open(db_location, "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+    os.remove(f"{db_location}.gz")
+    return db_location
+
+
+def upload_coordinates_cache(db_location):
+    with open(db_location, "rb") as f_in:
+        with gzip.open(f"{db_location}.gz", "wb") as f_out:
+            shutil.copyfileobj(f_in, f_out)
+    minio_client.send_files(
+        list_files=[
+            {
+                "source_path": AIRFLOW_ETL_DATA_DIR,
+                "source_name": f"{COORDINATES_CACHE_FILENAME}.gz",
+                "dest_path": f"{ETL_COORDINATES_CACHE_MINIO_PATH}/",
+                "dest_name": f"{COORDINATES_CACHE_FILENAME}.gz",
+            }
+        ],
+    )
+    os.remove(db_location)
+    os.remove(f"{db_location}.gz")
+
+
+def fill_coordinates(database_location, cache_location, previous_cache_location):
+    """
+    Compute the latitude and longitude of the établissements and sièges lacking
+    them from their Lambert coordinates (x, y).
+
+    The coordinates are stored in the cache at `cache_location`, along with the
+    ones found in the cache of the previous run, if any, which are not computed
+    again. The cache thus only holds the coordinates of the current établissements.
+    """
+    sqlite_client = SqliteClient(database_location)
+    sqlite_client.connect_to_another_db(cache_location, "coordinates_cache")
+    sqlite_client.execute(create_table_coordinates_cache_query)
+    if previous_cache_location:
+        sqlite_client.connect_to_another_db(
+            previous_cache_location, "previous_coordinates_cache"
+        )
+    sqlite_client.execute(create_table_coordinates_batch_query)
+
+    for table_name in ["etablissement", "siege"]:
+        filled_count = 0
+        computed_count = 0
+        last_rowid = 0
+        while True:
+            rows = sqlite_client.execute(
+                select_missing_coordinates_query(table_name),
+                (last_rowid, COORDINATES_BATCH_SIZE),
+            ).fetchall()
+            if not rows:
+                break
+            sqlite_client.execute("DELETE FROM coordinates_batch")
+            sqlite_client.execute_many(
+                insert_coordinates_batch_query,
+                (
+                    (rowid, get_epsg(format_departement(commune)), x, y)
+                    for rowid, commune, x, y in rows
+                ),
+            )
+            if previous_cache_location:
+                sqlite_client.execute(insert_previous_coordinates_query)
+            uncached_points = sqlite_client.execute(
+                select_uncached_coordinates_query
+            ).fetchall()
+            if uncached_points:
+                epsgs, xs, ys = zip(*uncached_points)
+                latitudes, longitudes = transform_coordinates_by_epsg(epsgs, xs, ys)
+                sqlite_client.execute_many(
+                    insert_coordinates_cache_query,
+                    zip(epsgs, xs, ys, latitudes, longitudes),
+                )
+                computed_count += len(uncached_points)
+            filled_count += sqlite_client.execute(
+                update_coordinates_query(table_name)
+            ).rowcount
+            last_rowid = rows[-1][0]
+        logging.info(
+            f"************ {filled_count} coordinates have been filled in the "
+            f"{table_name} table, {computed_count} of which have been computed!"
+        )
+    sqlite_client.commit_and_close_conn()
+
+
+def fill_missing_coordinates(**kwargs):
+    """
+    Fill the coordinates of the établissements and sièges once for the indexing and
+    the data.gouv files instead of each time they are read, reusing the ones
+    computed by the previous run.
+    """
+    previous_cache_location = download_coordinates_cache()
+    cache_location = AIRFLOW_ETL_DATA_DIR + COORDINATES_CACHE_FILENAME
+    if os.path.exists(cache_location):
+        os.remove(cache_location)
+    fill_coordinates(SIRENE_DATABASE_LOCATION, cache_location, previous_cache_location)
+    if previous_cache_location:
+        os.remove(previous_cache_location)
+    upload_coordinates_cache(cache_location)
@@ -1,19 +1,26 @@
-from dag_datalake_sirene.config import (
-    SIRENE_DATABASE_LOCATION,
-    RNE_DATABASE_LOCATION,
+from dag_datalake_sirene.config import RNE_DATABASE_LOCATION
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_SCRATCH_BUILD,
+    SqliteClient,
+)
+from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
+    create_index,
+    create_timed_index,
+    reset_table_database,
 )
-from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
 
 
 def create_immatriculation_table():
-    # Connect to the destination database
-    sqlite_client_siren = SqliteClient(SIRENE_DATABASE_LOCATION)
+    table_name = "immatriculation"
+
+    # Connect to the destination database, merged into the siren one afterwards
+    sqlite_client_siren = SqliteClient(
+        reset_table_database(table_name), profile=SQLITE_PROFILE_SCRATCH_BUILD
+    )
 
     # Attach the RNE database
     sqlite_client_siren.connect_to_another_db(RNE_DATABASE_LOCATION, "db_rne")
 
-    table_name = "immatriculation"
-
     # Create table with the same structure as the source table immatriculation
     sqlite_client_siren.execute(
         f"""
@@ -30,9 +37,8 @@ def create_immatriculation_table():
     """
     )
 
-    sqlite_client_siren.execute(
-        f"""CREATE INDEX IF NOT EXISTS idx_siren_immat
-        ON {table_name} (siren);"""
+    create_timed_index(
+        sqlite_client_siren, create_index, "idx_siren_immat", table_name, "siren"
     )
     sqlite_client_siren.db_conn.commit()
 
@@ -1,6 +1,9 @@
 import logging
 import sqlite3
-from dag_datalake_sirene.helpers.sqlite_client import SqliteClient
+from dag_datalake_sirene.helpers.sqlite_client import (
+    SQLITE_PROFILE_BULK_BUILD,
+    SqliteClient,
+)
 
 # fmt: off
 from dag_datalake_sirene.workflows.data_pipelines.etl.data_fetch_clean.unite_legale\
@@ -24,11 +27,14 @@ from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.queries.unite_legal
 )
 # fmt: on
 from dag_datalake_sirene.workflows.data_pipelines.etl.sqlite.helpers import (
+    bulk_load_table_model,
     create_index,
-    create_table_model,
+    create_timed_index,
+    drop_table,
     create_unique_index,
     execute_query,
     get_table_count,
+    insert_dataframe,
 )
 from dag_datalake_sirene.config import AIRFLOW_ETL_DATA_DIR
 from dag_datalake_sirene.config import (
@@ -38,34 +44,32 @@ from dag_datalake_sirene.config import (
 
 
 def create_table(query, table_name, index, sirene_file_type):
-    sqlite_client = create_table_model(
+    count_unite_legale = 0
+    with bulk_load_table_model(
         table_name=table_name,
         create_table_query=query,
         create_index_func=create_unique_index,
         index_name=index,
         index_column="siren",
-    )
-    for df_unite_legale in preprocess_unite_legale_data(
-        AIRFLOW_ETL_DATA_DIR, sirene_file_type
-    ):
-        df_unite_legale.to_sql(
-            table_name, sqlite_client.db_conn, if_exists="append", index=False
-        )
-        for row in sqlite_client.execute(get_table_count(table_name)):
+    ) as sqlite_client:
+        for df_unite_legale in preprocess_unite_legale_data(
+            AIRFLOW_ETL_DATA_DIR, sirene_file_type
+        ):
+            count_unite_legale += insert_dataframe(
+                sqlite_client, table_name, df_unite_legale
+            )
             logging.debug(
-                f"************ {row} total records have been added "
+                f"************ {count_unite_legale} total records have been added "
                 f"to the {table_name} table!"
             )
 
-    del df_unite_legale
+        del df_unite_legale
 
-    for count_unite_legale in sqlite_client.execute(get_table_count(table_name)):
-        logging.info(
-            f"************ {count_unite_legale} total records have been added to the "
-            f"{table_name} table!"
-        )
-    sqlite_client.commit_and_close_conn()
-    return count_unite_legale[0]
+    logging.info(
+        f"************ {count_unite_legale} total records have been added to the "
+        f"{table_name} table!"
+    )
+    return count_unite_legale
 
 
 def create_unite_legale_table(**kwargs):
@@ -89,19 +93,21 @@ def create_flux_unite_legale_table(**kwargs):
 
 
 def add_ancien_siege_flux_data(**kwargs):
-    sqlite_client = SqliteClient(SIRENE_DATABASE_LOCATION)
+    sqlite_client = SqliteClient(
+        SIRENE_DATABASE_LOCATION, profile=SQLITE_PROFILE_BULK_BUILD
+    )
 
     table_name = "ancien_siege"
 
+    count_ancien_siege = 0
     for df_unite_legale in process_ancien_siege_flux(AIRFLOW_ETL_DATA_DIR):
-        df_unite_legale.to_sql(
-            table_name, sqlite_client.db_conn, if_exists="append", index=False
+        count_ancien_siege += insert_dataframe(
+            sqlite_client, table_name, df_unite_legale
+        )
+        logging.info(
+            f"************ {count_ancien_siege} records have been added "
+            f"to the {table_name} table!"
         )
-        for row in sqlite_client.execute(get_table_count(table_name)):
-            logging.info(
-                f"************ {row} total records have been added "
-                f"to the {table_name} table!"
-            )
     del df_unite_legale
     sqlite_client.execute(delete_current_siege_from_ancien_siege_query)
     for row in sqlite_client.execute(get_table_count(table_name)):
@@ -150,61 +156,49 @@ def add_rne_data_to_unite_legale_table(**kwargs):
 
 
 def create_historique_unite_legale_tables(**kwargs):
-
-    sqlite_client = create_table_model(
-        table_name="ancien_siege",
-        create_table_query=create_table_ancien_siege_query,
-        create_index_func=create_index,
-        index_name="index_ancien_siege",
-        index_column="siret",
-    )
-    sqlite_client.commit_and_close_conn()
-
     table_name = "historique_unite_legale"
-    sqlite_client = create_table_model(
+    count_unite_legale = 0
+    count_ancien_siege = 0
+    with bulk_load_table_model(
         table_name=table_name,
         create_table_query=create_table_historique_unite_legale_query,
         create_index_func=create_index,
         index_name="index_historique_siren",
         index_column="siren",
-    )
-
-    for (
-        df_hist_unite_legale,
-        df_ancien_siege,
-    ) in preprocess_historique_unite_legale_data(
-        AIRFLOW_ETL_DATA_DIR,
-    ):
-        df_hist_unite_legale.to_sql(
-            table_name, sqlite_client.db_conn, if_exists="append", index=False
-        )
-
-        df_ancien_siege.to_sql(
-            "ancien_siege",
-            sqlite_client.db_conn,
-            if_exists="append",
-            index=False,
-        )
+    ) as sqlite_client:
+        sqlite_client.execute(drop_table("ancien_siege"))
+        sqlite_client.execute(create_table_ancien_siege_query)
+        for (
+            df_hist_unite_legale,
+            df_ancien_siege,
+        ) in preprocess_historique_unite_legale_data(
+            AIRFLOW_ETL_DATA_DIR,
+        ):
+            count_unite_legale += insert_dataframe(
+                sqlite_client, table_name, df_hist_unite_legale
+            )
+            count_ancien_siege += insert_dataframe(
+                sqlite_client, "ancien_siege", df_ancien_siege
+            )
 
-        for row in sqlite_client.execute(get_table_count(table_name)):
             logging.debug(
-                f"************ {row} total records have been added "
+                f"************ {count_unite_legale} total records have been added "
                 f"to the {table_name} table!"
             )
-        for row in sqlite_client.execute(get_table_count("ancien_siege")):
             logging.debug(
-                f"************ {row} total records have been added "
+                f"************ {count_ancien_siege} total records have been added "
                 f"to the ancien_siege table!"
             )
 
-    del df_hist_unite_legale
-
-    for count_unite_legale in sqlite_client.execute(get_table_count(table_name)):
-        logging.info(
-            f"************ {count_unite_legale} total records have been added to the "
-            f"{table_name} table!"
+        del df_hist_unite_legale
+        create_timed_index(
+            sqlite_client, create_index, "index_ancien_siege", "ancien_siege", "siret"
         )
-    sqlite_client.commit_and_close_conn()
+
+    logging.info(
+        f"************ {count_unite_legale} total records have been added to the "
+        f"{table_name} table!"
+    )
     kwargs["ti"].xcom_push(
         key="count_historique_unite_legale", value=count_unite_legale
     )
@@ -212,20 +206,18 @@ def create_historique_unite_legale_tables(**kwargs):
 
 def create_date_fermeture_unite_legale_table(**kwargs):
     table_name = "date_fermeture_unite_legale"
-    sqlite_client = create_table_model(
+    with bulk_load_table_model(
         table_name=table_name,
         create_table_query=create_table_date_fermeture_unite_legale_query,
         create_index_func=create_unique_index,
         index_name="index_date_fermeture_siren",
         index_column="siren",
+    ) as sqlite_client:
+        count_unite_legale = sqlite_client.get_table_count(table_name)
+    logging.info(
+        f"************ {count_unite_legale} total records have been added to the "
+        f"{table_name} table!"
     )
-
-    for count_unite_legale in sqlite_client.execute(get_table_count(table_name)):
-        logging.info(
-            f"************ {count_unite_legale} total records have been added to the "
-            f"{table_name} table!"
-        )
-    sqlite_client.commit_and_close_conn()
     kwargs["ti"].xcom_push(
         key="count_date_fermeture_unite_legale", value=count_unite_legale
     )
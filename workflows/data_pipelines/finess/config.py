@@ -18,4 +18,5 @@ FINESS_CONFIG = DataSourceConfig(
     },
     url_minio=f"{MINIO_BASE_URL}finess/latest/finess.csv",
     url_minio_metadata=f"{MINIO_BASE_URL}finess/latest/metadata.json",
+    json_columns=["liste_finess"],
 )
@@ -27,8 +27,7 @@ class FinessProcessor(DataProcessor):
             .reset_index(name="liste_finess")
         )
         df_list_finess = df_list_finess[["siret", "liste_finess"]]
-        df_list_finess["liste_finess"] = df_list_finess["liste_finess"].astype(str)
-        df_list_finess.to_csv(f"{self.config.tmp_folder}/finess.csv", index=False)
+        self.write_csv(df_list_finess, f"{self.config.tmp_folder}/finess.csv")
 
         DataProcessor.push_unique_count(
             df_list_finess["siret"],
@@ -16,4 +16,5 @@ FORMATION_CONFIG = DataSourceConfig(
     url_minio=f"{MINIO_BASE_URL}formation/latest/formation.csv",
     url_minio_metadata=f"{MINIO_BASE_URL}formation/latest/metadata.json",
     file_output=f"{DataSourceConfig.base_tmp_folder}/formation/formation.csv",
+    json_columns=["liste_id_organisme_formation"],
 )
@@ -35,7 +35,7 @@ class FormationProcessor(DataProcessor):
             .sort_values("siren")
         )
 
-        df_organisme_formation.to_csv(self.config.file_output, index=False)
+        self.write_csv(df_organisme_formation, self.config.file_output)
         logging.info(f"Formation dataset saved in {self.config.file_output}")
 
         DataProcessor.push_unique_count(
@@ -16,4 +16,5 @@ RGE_CONFIG = DataSourceConfig(
     },
     url_minio=f"{MINIO_BASE_URL}rge/latest/rge.csv",
     url_minio_metadata=f"{MINIO_BASE_URL}rge/latest/metadata.json",
+    json_columns=["liste_rge"],
 )
@@ -48,9 +48,8 @@ class RgeProcessor(DataProcessor):
             .reset_index(name="liste_rge")
         )
         df_list_rge = df_list_rge[["siret", "liste_rge"]]
-        df_list_rge["liste_rge"] = df_list_rge["liste_rge"].astype(str)
 
-        df_list_rge.to_csv(f"{self.config.tmp_folder}/rge.csv", index=False)
+        self.write_csv(df_list_rge, f"{self.config.tmp_folder}/rge.csv")
         DataProcessor.push_unique_count(
             df_list_rge["siret"], Notification.notification_xcom_key, "établissements"
         )
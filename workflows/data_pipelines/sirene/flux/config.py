@@ -3,6 +3,9 @@ from dag_datalake_sirene.config import (
     DataSourceConfig,
     MINIO_BASE_URL,
 )
+from dag_datalake_sirene.workflows.data_pipelines.sirene.stock.config import (
+    STOCK_UNITE_LEGALE_COLUMNS,
+)
 
 
 FLUX_SIRENE_CONFIG = DataSourceConfig(
@@ -14,3 +17,55 @@ FLUX_SIRENE_CONFIG = DataSourceConfig(
     url_api="https://api.insee.fr/api-sirene/3.11/",
     auth_api=Variable.get("SECRET_BEARER_INSEE", None),
 )
+
+# Columns of the flux files read by the ETL, the only ones kept in their Parquet
+# version
+FLUX_UNITE_LEGALE_COLUMNS = STOCK_UNITE_LEGALE_COLUMNS + ["periodesUniteLegale"]
+FLUX_ETABLISSEMENT_COLUMNS = [
+    "siren",
+    "siret",
+    "dateCreationEtablissement",
+    "trancheEffectifsEtablissement",
+    "caractereEmployeurEtablissement",
+    "anneeEffectifsEtablissement",
+    "dateDernierTraitementEtablissement",
+    "activitePrincipaleRegistreMetiersEtablissement",
+    "etablissementSiege",
+    "numeroVoieEtablissement",
+    "libelleVoieEtablissement",
+    "codePostalEtablissement",
+    "libelleCommuneEtablissement",
+    "libelleCedexEtablissement",
+    "typeVoieEtablissement",
+    "codeCommuneEtablissement",
+    "codeCedexEtablissement",
+    "complementAdresseEtablissement",
+    "distributionSpecialeEtablissement",
+    "complementAdresse2Etablissement",
+    "indiceRepetition2Etablissement",
+    "libelleCedex2Etablissement",
+    "codeCedex2Etablissement",
+    "numeroVoie2Etablissement",
+    "typeVoie2Etablissement",
+    "libelleVoie2Etablissement",
+    "codeCommune2Etablissement",
+    "libelleCommune2Etablissement",
+    "distributionSpeciale2Etablissement",
+    "dateDebut",
+    "etatAdministratifEtablissement",
+    "enseigne1Etablissement",
+    "enseigne2Etablissement",
+    "enseigne3Etablissement",
+    "denominationUsuelleEtablissement",
+    "activitePrincipaleEtablissement",
+    "indiceRepetitionEtablissement",
+    "libelleCommuneEtrangerEtablissement",
+    "codePaysEtrangerEtablissement",
+    "libellePaysEtrangerEtablissement",
+    "libelleCommuneEtranger2Etablissement",
+    "codePaysEtranger2Etablissement",
+    "libellePaysEtranger2Etablissement",
+    "statutDiffusionEtablissement",
+    "coordonneeLambertAbscisseEtablissement",
+    "coordonneeLambertOrdonneeEtablissement",
+]
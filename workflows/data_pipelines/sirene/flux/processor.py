@@ -4,9 +4,12 @@ from dag_datalake_sirene.workflows.data_pipelines.sirene.flux.api import (
 )
 from dag_datalake_sirene.helpers.data_processor import DataProcessor, Notification
 from dag_datalake_sirene.workflows.data_pipelines.sirene.flux.config import (
+    FLUX_ETABLISSEMENT_COLUMNS,
     FLUX_SIRENE_CONFIG,
+    FLUX_UNITE_LEGALE_COLUMNS,
 )
 from dag_datalake_sirene.helpers.utils import (
+    convert_csv_to_parquet,
     save_data_to_zipped_csv,
 )
 from dag_datalake_sirene.helpers.minio_helpers import File
@@ -28,6 +31,14 @@ class SireneFluxProcessor(DataProcessor):
     def _construct_endpoint(self, base_endpoint: str, fields: str) -> str:
         return base_endpoint.format(self.current_month, fields)
 
+    def _convert_flux_to_parquet(self, file_name: str, columns: list[str]) -> None:
+        """Convert the columns of a flux file read by the ETL into a Parquet file."""
+        convert_csv_to_parquet(
+            f"{self.config.tmp_folder}{file_name}.csv.gz",
+            f"{self.config.tmp_folder}{file_name}.parquet",
+            columns,
+        )
+
     def get_current_flux_unite_legale(self):
         fields = (
             "siren,dateCreationUniteLegale,sigleUniteLegale,"
@@ -47,6 +58,9 @@ class SireneFluxProcessor(DataProcessor):
         save_data_to_zipped_csv(
             df, self.config.tmp_folder, f"flux_unite_legale_{self.current_month}.csv"
         )
+        self._convert_flux_to_parquet(
+            f"flux_unite_legale_{self.current_month}", FLUX_UNITE_LEGALE_COLUMNS
+        )
         DataProcessor.push_unique_count(
             df["siren"], Notification.notification_xcom_key, "unités légales"
         )
@@ -86,6 +100,9 @@ class SireneFluxProcessor(DataProcessor):
         save_data_to_zipped_csv(
             df, self.config.tmp_folder, f"flux_etablissement_{self.current_month}.csv"
         )
+        self._convert_flux_to_parquet(
+            f"flux_etablissement_{self.current_month}", FLUX_ETABLISSEMENT_COLUMNS
+        )
         self.push_unique_count(
             df["siret"], Notification.notification_xcom_key, "établissements"
         )
@@ -105,6 +122,15 @@ class SireneFluxProcessor(DataProcessor):
                     dest_path=self.config.minio_path,
                     dest_name=f"flux_etablissement_{self.current_month}.csv.gz",
                 ),
+                *[
+                    File(
+                        source_path=self.config.tmp_folder,
+                        source_name=f"{file_name}_{self.current_month}.parquet",
+                        dest_path=self.config.minio_path,
+                        dest_name=f"{file_name}_{self.current_month}.parquet",
+                    )
+                    for file_name in ["flux_unite_legale", "flux_etablissement"]
+                ],
                 File(
                     source_path=self.config.tmp_folder,
                     source_name="metadata.json",
@@ -27,3 +27,53 @@ STOCK_SIRENE_CONFIG = DataSourceConfig(
     minio_path="insee/stock/",
     url_minio=f"{MINIO_BASE_URL}insee/stock/",
 )
+
+# Columns of the stock files read by the ETL, the only ones kept in their Parquet
+# version
+STOCK_UNITE_LEGALE_COLUMNS = [
+    "siren",
+    "dateCreationUniteLegale",
+    "sigleUniteLegale",
+    "prenomUsuelUniteLegale",
+    "identifiantAssociationUniteLegale",
+    "trancheEffectifsUniteLegale",
+    "dateDernierTraitementUniteLegale",
+    "categorieEntreprise",
+    "etatAdministratifUniteLegale",
+    "nomUniteLegale",
+    "nomUsageUniteLegale",
+    "denominationUniteLegale",
+    "denominationUsuelle1UniteLegale",
+    "denominationUsuelle2UniteLegale",
+    "denominationUsuelle3UniteLegale",
+    "categorieJuridiqueUniteLegale",
+    "activitePrincipaleUniteLegale",
+    "economieSocialeSolidaireUniteLegale",
+    "statutDiffusionUniteLegale",
+    "societeMissionUniteLegale",
+    "anneeCategorieEntreprise",
+    "anneeEffectifsUniteLegale",
+    "caractereEmployeurUniteLegale",
+]
+HISTORIQUE_UNITE_LEGALE_COLUMNS = [
+    "siren",
+    "dateFin",
+    "dateDebut",
+    "etatAdministratifUniteLegale",
+    "changementEtatAdministratifUniteLegale",
+    "nicSiegeUniteLegale",
+    "changementNicSiegeUniteLegale",
+]
+HISTORIQUE_ETABLISSEMENT_COLUMNS = [
+    "siren",
+    "siret",
+    "dateFin",
+    "dateDebut",
+    "etatAdministratifEtablissement",
+    "changementEtatAdministratifEtablissement",
+]
+STOCK_SIRENE_PARQUET_COLUMNS = {
+    "StockUniteLegale_utf8": STOCK_UNITE_LEGALE_COLUMNS,
+    "StockUniteLegaleHistorique_utf8": HISTORIQUE_UNITE_LEGALE_COLUMNS,
+    "StockEtablissementHistorique_utf8": HISTORIQUE_ETABLISSEMENT_COLUMNS,
+}
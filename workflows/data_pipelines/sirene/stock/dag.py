@@ -42,11 +42,20 @@ def data_processing_sirene_stock():
     def download_stock():
         return sirene_stock_processor.download_data()
 
+    @task()
+    def convert_stock_to_parquet():
+        return sirene_stock_processor.convert_stock_to_parquet()
+
     @task()
     def send_stock_file_to_minio():
         return sirene_stock_processor.send_stock_to_minio()
 
-    (clean_previous_outputs() >> download_stock() >> send_stock_file_to_minio())
+    (
+        clean_previous_outputs()
+        >> download_stock()
+        >> convert_stock_to_parquet()
+        >> send_stock_file_to_minio()
+    )
 
 
 # Instantiate the DAG
@@ -2,14 +2,28 @@ from dag_datalake_sirene.helpers import DataProcessor
 
 from dag_datalake_sirene.workflows.data_pipelines.sirene.stock.config import (
     STOCK_SIRENE_CONFIG,
+    STOCK_SIRENE_PARQUET_COLUMNS,
 )
 from dag_datalake_sirene.helpers.minio_helpers import File
+from dag_datalake_sirene.helpers.utils import convert_csv_to_parquet
 
 
 class SireneStockProcessor(DataProcessor):
     def __init__(self):
         super().__init__(STOCK_SIRENE_CONFIG)
 
+    def convert_stock_to_parquet(self):
+        """
+        Convert the columns of the stock files read by the ETL into Parquet files,
+        which it reads instead of parsing the whole CSV files.
+        """
+        for file_name, columns in STOCK_SIRENE_PARQUET_COLUMNS.items():
+            convert_csv_to_parquet(
+                f"{self.config.tmp_folder}{file_name}.zip",
+                f"{self.config.tmp_folder}{file_name}.parquet",
+                columns,
+            )
+
     def send_stock_to_minio(self):
         self.minio_client.send_files(
             list_files=[
@@ -31,5 +45,14 @@ class SireneStockProcessor(DataProcessor):
                     dest_path=f"{self.config.minio_path}",
                     dest_name="StockEtablissementHistorique_utf8.zip",
                 ),
+                *[
+                    File(
+                        source_path=f"{self.config.tmp_folder}",
+                        source_name=f"{file_name}.parquet",
+                        dest_path=f"{self.config.minio_path}",
+                        dest_name=f"{file_name}.parquet",
+                    )
+                    for file_name in STOCK_SIRENE_PARQUET_COLUMNS
+                ],
             ],
         )